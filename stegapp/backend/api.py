@@ -2,17 +2,24 @@
 API Flask pour la stéganographie.
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
 from flask_cors import CORS
 import os
+import shutil
 import tempfile
 from werkzeug.utils import secure_filename
-from stego.image import ImageSteganography
+from stego.image import SAME_AS_INPUT, ImageSteganography, output_type
 from stego.audio import AudioSteganography
 from stego.audio_alt import AudioSteganographyAlt
+from stego.video import Y4M_SIGNATURE, VideoSteganography, output_type as video_output_type
 from stego.pdf_meta import PDFSteganography
 from stego.pdf_meta_alt import PDFSteganography as PDFSteganographyAlt
 from stego.pdf_meta_simple import PDFSteganographySimple
+from stego.payload import HiddenFile
+from stego.crypto import PasswordError
+from stego.compression import compression_ratio
+from stego.kdf import cache_info as kdf_cache_info
+from stego.lsb import MAX_DEPTH
 import base64
 import io
 
@@ -22,10 +29,14 @@ CORS(app)
 # Configuration
 UPLOAD_FOLDER = tempfile.gettempdir()
 ALLOWED_EXTENSIONS = {
-    'image': {'png', 'jpg', 'jpeg', 'bmp', 'tiff'},
+    'image': {'png', 'jpg', 'jpeg', 'bmp', 'tif', 'tiff', 'webp', 'gif'},
     'audio': {'wav'},
+    'video': {'y4m', 'avi'},
     'pdf': {'pdf'}
 }
+# Images renvoyées dans leur format d'origine par défaut (BMP et TIFF modifiés
+# en place lorsqu'ils ne sont pas compressés, GIF à palette conservée)
+SAME_FORMAT_EXTENSIONS = {'bmp', 'tif', 'tiff', 'gif'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max
@@ -33,6 +44,7 @@ app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max
 # Instances des classes de stéganographie
 image_stego = ImageSteganography()
 audio_stego = AudioSteganography()
+video_stego = VideoSteganography()
 
 # PDF avec fallback en cas d'erreur
 try:
@@ -56,10 +68,79 @@ def get_file_type(filename):
     return None
 
 
+def parse_bits_per_channel(form):
+    """Lit le nombre de bits modifiés par canal (1 par défaut), ou None s'il est invalide."""
+    try:
+        bits_per_channel = int(form.get('bits_per_channel', 1))
+    except ValueError:
+        return None
+    return bits_per_channel if 1 <= bits_per_channel <= MAX_DEPTH else None
+
+
+def parse_flag(form, name):
+    """Lit une option booléenne d'un formulaire ('1', 'true', 'on' ou 'yes')."""
+    return form.get(name, '').strip().lower() in ('1', 'true', 'on', 'yes')
+
+
+def hide_stream(stego, file, *args, **kwargs):
+    """
+    Cache des données dans un fichier reçu (audio ou vidéo), produit morceau
+    par morceau par la méthode hide_stream du moteur.
+    
+    Flask ferme les fichiers reçus à la fin de la vue, avant l'envoi d'une
+    réponse en flux : l'envoi est d'abord recopié dans un fichier temporaire,
+    fermé une fois la réponse envoyée. Les erreurs (format, capacité) sont
+    levées ici.
+    """
+    source = tempfile.TemporaryFile()
+    try:
+        shutil.copyfileobj(file.stream, source)
+        source.seek(0)
+        pieces = stego.hide_stream(source, *args, **kwargs)
+    except Exception:
+        source.close()
+        raise
+    
+    def generate():
+        with source:
+            yield from pieces
+    
+    return generate()
+
+
+def hide_bitmap(file, *args, **kwargs):
+    """
+    Cache des données dans une image BMP ou TIFF non compressée reçue, gardée
+    dans son format, sans la charger en mémoire : l'envoi est recopié dans un
+    fichier temporaire, puis une copie est modifiée sur le disque (voir
+    BitmapSteganography.hide_file).
+    
+    Returns:
+        Fichier produit, ouvert en lecture (supprimé à sa fermeture), ou None
+        si l'image n'est pas modifiable en place (le flux reçu est rembobiné)
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        source = os.path.join(directory, 'source')
+        output = os.path.join(directory, 'output')
+        file.save(source)
+        if not image_stego.supports_in_place(source):
+            file.stream.seek(0)
+            return None
+        image_stego.bitmap.hide_file(source, output, *args, **kwargs)
+        return open(output, 'rb')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Endpoint de vérification de santé."""
-    return jsonify({'status': 'healthy', 'message': 'StegApp API is running'})
+    return jsonify({
+        'status': 'healthy',
+        'message': 'StegApp API is running',
+        'kdf_cache': kdf_cache_info()
+    })
 
 
 @app.route('/api/capacity/<file_type>', methods=['POST'])
@@ -76,15 +157,21 @@ def get_capacity(file_type):
         if not allowed_file(file.filename, file_type):
             return jsonify({'error': 'Type de fichier non supporté'}), 400
         
+        bits_per_channel = parse_bits_per_channel(request.form)
+        if bits_per_channel is None:
+            return jsonify({'error': f'bits_per_channel doit être un entier entre 1 et {MAX_DEPTH}'}), 400
+        
         # Lire le fichier
         file_data = file.read()
         
         # Calculer la capacité
         try:
             if file_type == 'image':
-                capacity = image_stego.get_capacity(file_data)
+                capacity = image_stego.get_capacity(file_data, bits_per_channel)
             elif file_type == 'audio':
                 capacity = audio_stego.get_capacity(file_data)
+            elif file_type == 'video':
+                capacity = video_stego.get_capacity(file_data, bits_per_channel)
             elif file_type == 'pdf':
                 capacity = pdf_stego.get_capacity(file_data)
             else:
@@ -112,12 +199,32 @@ def get_capacity(file_type):
             else:
                 return jsonify({'error': f'Erreur lors du traitement du fichier: {str(e)}'}), 500
         
-        return jsonify({
+        result = {
             'capacity': capacity,
             'capacity_bits': capacity,
             'capacity_bytes': capacity // 8,
             'capacity_chars': capacity // 8  # Approximation pour le texte
-        })
+        }
+        if file_type in ('image', 'video'):
+            result['bits_per_channel'] = bits_per_channel
+        
+        # Capacité effective estimée à partir d'un échantillon compressé
+        sample_file = request.files.get('sample')
+        if sample_file and sample_file.filename:
+            sample = sample_file.read()
+        else:
+            sample = request.form.get('sample', '').encode('utf-8')
+        if sample:
+            compression = request.form.get('compression', 'auto')
+            try:
+                ratio = compression_ratio(sample, compression)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            result['compression'] = compression
+            result['compression_ratio'] = round(ratio, 2)
+            result['effective_capacity_bytes'] = int(capacity // 8 * ratio)
+        
+        return jsonify(result)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -131,12 +238,26 @@ def hide_data(file_type):
         if 'file' not in request.files:
             return jsonify({'error': 'Aucun fichier fourni'}), 400
         
-        if 'data' not in request.form:
+        # Données à cacher : fichier binaire ('payload') ou texte ('data')
+        payload_file = request.files.get('payload')
+        if payload_file and payload_file.filename:
+            data = payload_file.read()
+            payload_name = secure_filename(payload_file.filename) or None
+        elif 'data' in request.form:
+            data = request.form['data']
+            payload_name = None
+        else:
             return jsonify({'error': 'Aucune donnée fournie'}), 400
         
         file = request.files['file']
-        data = request.form['data']
         password = request.form.get('password', '')
+        compression = request.form.get('compression') or None
+        cipher = request.form.get('cipher') or None
+        output = request.form.get('output') or None
+        scatter = parse_flag(request.form, 'scatter')
+        bits_per_channel = parse_bits_per_channel(request.form)
+        if bits_per_channel is None:
+            return jsonify({'error': f'bits_per_channel doit être un entier entre 1 et {MAX_DEPTH}'}), 400
         
         if file.filename == '':
             return jsonify({'error': 'Aucun fichier sélectionné'}), 400
@@ -144,19 +265,47 @@ def hide_data(file_type):
         if not allowed_file(file.filename, file_type):
             return jsonify({'error': 'Type de fichier non supporté'}), 400
         
-        # Lire le fichier
-        file_data = file.read()
+        if isinstance(data, bytes) and file_type == 'pdf':
+            return jsonify({'error': 'Les fichiers binaires ne peuvent pas être cachés dans un PDF'}), 400
+        
+        if scatter and not password:
+            return jsonify({'error': 'La dispersion des données nécessite un mot de passe'}), 400
+        
+        if output is None and file.filename.rsplit('.', 1)[1].lower() in SAME_FORMAT_EXTENSIONS:
+            output = SAME_AS_INPUT
+        
+        # Lire le fichier (l'audio et la vidéo sont lus en flux, une image
+        # gardée dans son format est d'abord essayée en place sur le disque)
+        file_data = file.read() if file_type not in ('audio', 'video', 'image') else None
+        result_stream = None
+        result_file = None
         
         # Cacher les données
         try:
             if file_type == 'image':
-                result_data = image_stego.hide_data(file_data, data, password if password else None)
-                mimetype = 'image/png'
-                extension = 'png'
+                if output == SAME_AS_INPUT:
+                    result_file = hide_bitmap(file, data, password if password else None, payload_name,
+                                              compression=compression, cipher=cipher,
+                                              bits_per_channel=bits_per_channel, scatter=scatter)
+                if result_file is not None:
+                    mimetype, extension = output_type(result_file)
+                else:
+                    result_data = image_stego.hide_data(file.read(), data, password if password else None,
+                                                      payload_name, compression=compression, cipher=cipher,
+                                                      bits_per_channel=bits_per_channel, output=output,
+                                                      scatter=scatter)
+                    mimetype, extension = output_type(result_data)
             elif file_type == 'audio':
-                result_data = audio_stego.hide_data(file_data, data, password if password else None)
+                result_stream = hide_stream(audio_stego, file, data, password if password else None, payload_name,
+                                            compression=compression, cipher=cipher, scatter=scatter)
                 mimetype = 'audio/wav'
                 extension = 'wav'
+            elif file_type == 'video':
+                mimetype, extension = video_output_type(file.stream.read(len(Y4M_SIGNATURE)))
+                file.stream.seek(0)
+                result_stream = hide_stream(video_stego, file, data, password if password else None, payload_name,
+                                            compression=compression, cipher=cipher,
+                                            bits_per_channel=bits_per_channel, scatter=scatter)
             elif file_type == 'pdf':
                 result_data = pdf_stego.hide_data(file_data, data, password if password else None)
                 mimetype = 'application/pdf'
@@ -164,11 +313,13 @@ def hide_data(file_type):
             else:
                 return jsonify({'error': 'Type de fichier non supporté'}), 400
         except Exception as e:
-            if file_type == 'audio':
-                # Essayer la version alternative pour l'audio
+            if file_type == 'audio' and not scatter:
+                # Essayer la version alternative pour l'audio (sans dispersion)
                 try:
+                    file.stream.seek(0)
                     audio_stego_alt = AudioSteganographyAlt()
-                    result_data = audio_stego_alt.hide_data(file_data, data, password if password else None)
+                    result_data = audio_stego_alt.hide_data(file.stream.read(), data, password if password else None, payload_name,
+                                                      compression=compression, cipher=cipher)
                     mimetype = 'audio/wav'
                     extension = 'wav'
                 except Exception as alt_e:
@@ -192,9 +343,15 @@ def hide_data(file_type):
             else:
                 return jsonify({'error': f'Erreur lors du traitement du fichier: {str(e)}'}), 500
         
-        # Retourner le fichier modifié
+        # Retourner le fichier modifié (audio, vidéo : envoyé au fil de l'insertion)
+        if result_stream is not None:
+            return Response(
+                result_stream,
+                mimetype=mimetype,
+                headers={'Content-Disposition': f'attachment; filename=hidden_data.{extension}'}
+            )
         return send_file(
-            io.BytesIO(result_data),
+            result_file if result_file is not None else io.BytesIO(result_data),
             mimetype=mimetype,
             as_attachment=True,
             download_name=f'hidden_data.{extension}'
@@ -221,8 +378,8 @@ def extract_data(file_type):
         if not allowed_file(file.filename, file_type):
             return jsonify({'error': 'Type de fichier non supporté'}), 400
         
-        # Lire le fichier
-        file_data = file.read()
+        # Lire le fichier (la vidéo est lue image par image)
+        file_data = file.read() if file_type != 'video' else None
         
         # Extraire les données
         try:
@@ -230,10 +387,15 @@ def extract_data(file_type):
                 extracted_data = image_stego.extract_data(file_data, password if password else None)
             elif file_type == 'audio':
                 extracted_data = audio_stego.extract_data(file_data, password if password else None)
+            elif file_type == 'video':
+                extracted_data = video_stego.extract_stream(file.stream, password if password else None)
             elif file_type == 'pdf':
                 extracted_data = pdf_stego.extract_data(file_data, password if password else None)
             else:
                 return jsonify({'error': 'Type de fichier non supporté'}), 400
+        except PasswordError as e:
+            # Mot de passe absent ou incorrect : inutile d'essayer les autres moteurs
+            return jsonify({'error': str(e), 'code': e.code}), 401
         except Exception as e:
             if file_type == 'audio':
                 # Essayer la version alternative pour l'audio
@@ -247,16 +409,31 @@ def extract_data(file_type):
                 try:
                     pdf_stego_alt = PDFSteganographyAlt()
                     extracted_data = pdf_stego_alt.extract_data(file_data, password if password else None)
+                except PasswordError as alt_e:
+                    return jsonify({'error': str(alt_e), 'code': alt_e.code}), 401
                 except Exception as alt_e:
                     # Dernier recours : version simplifiée
                     try:
                         pdf_stego_simple = PDFSteganographySimple()
                         extracted_data = pdf_stego_simple.extract_data(file_data, password if password else None)
+                    except PasswordError as simple_e:
+                        return jsonify({'error': str(simple_e), 'code': simple_e.code}), 401
                     except Exception as simple_e:
                         return jsonify({'error': f'Erreur lors de l\'extraction du PDF: {str(e)}'}), 500
             else:
                 return jsonify({'error': f'Erreur lors de l\'extraction: {str(e)}'}), 500
         
+        # Fichier binaire : renvoyé tel quel en téléchargement
+        if isinstance(extracted_data, HiddenFile):
+            response = send_file(
+                io.BytesIO(extracted_data),
+                mimetype='application/octet-stream',
+                as_attachment=True,
+                download_name=extracted_data.filename or 'hidden_data.bin'
+            )
+            response.headers['X-Payload-Size'] = str(extracted_data.size)
+            return response
+        
         return jsonify({
             'data': extracted_data,
             'success': True
@@ -272,6 +449,7 @@ def get_supported_formats():
     return jsonify({
         'image': list(ALLOWED_EXTENSIONS['image']),
         'audio': list(ALLOWED_EXTENSIONS['audio']),
+        'video': list(ALLOWED_EXTENSIONS['video']),
         'pdf': list(ALLOWED_EXTENSIONS['pdf'])
     })
 
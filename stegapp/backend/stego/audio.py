@@ -2,80 +2,102 @@
 Module de stéganographie pour les fichiers audio (LSB).
 """
 
-import wave
 import numpy as np
-from typing import Union, Optional
+from typing import BinaryIO, Iterable, Iterator, Union, Optional
 import io
-from .utils import text_to_binary, binary_to_text, encrypt_data, decrypt_data
+from itertools import chain
+from .bitbuffer import ByteFeed, unpack_bits
+from .bitmap import recover_rows
+from .lsb import embed_lsb, embed_lsb_chunks
+from .payload import HEADER_BITS, HEADER_SIZE, SCATTER_PREFIX_SIZE, HiddenFile, stream_payload
+from .scatter import ScatteredStream, scatter_permutation
+from .wav import FIRST_READ, WavReader
 
 
 class AudioSteganography:
     """Classe pour la stéganographie audio utilisant LSB."""
     
     def __init__(self):
-        self.delimiter = "1111111111111110"  # Marqueur de fin
+        self.header_bits = HEADER_BITS  # Surcoût de l'en-tête du conteneur
     
-    def hide_data(self, audio_path: Union[str, bytes], data: str, password: Optional[str] = None) -> bytes:
+    def hide_data(self, audio_path: Union[str, bytes], data: Union[str, bytes], password: Optional[str] = None,
+                  filename: Optional[str] = None, compression: Optional[str] = None,
+                  cipher: Optional[str] = None, scatter: bool = False) -> bytes:
         """
         Cache des données dans un fichier audio en utilisant LSB.
         
         Args:
             audio_path: Chemin vers le fichier audio ou données audio
-            data: Données à cacher
+            data: Texte ou contenu binaire d'un fichier à cacher
             password: Mot de passe optionnel pour chiffrer les données
+            filename: Nom du fichier d'origine (données binaires)
+            compression: 'zlib', 'lzma', 'bz2', 'auto' ou None
+            cipher: 'fernet' (par défaut), 'aesgcm', 'chacha20' ou 'aesgcm-stream'
+            scatter: Disperser les données sur les échantillons selon le mot de
+                passe (voir scatter.py)
         
         Returns:
             Données du fichier audio modifié
         """
-        # Charger le fichier audio
-        if isinstance(audio_path, str):
-            with wave.open(audio_path, 'rb') as audio_file:
-                frames = audio_file.readframes(audio_file.getnframes())
-                params = audio_file.getparams()
-        else:
-            with wave.open(io.BytesIO(audio_path), 'rb') as audio_file:
-                frames = audio_file.readframes(audio_file.getnframes())
-                params = audio_file.getparams()
-        
-        # Vérifier que c'est du PCM 16-bit
-        if params.sampwidth != 2:
-            raise ValueError("Seuls les fichiers audio PCM 16-bit sont supportés")
+        with self._open(audio_path) as source:
+            return b''.join(self.hide_stream(source, data, password, filename, compression, cipher, scatter))
+    
+    def hide_file(self, audio_path: str, output_path: str, data: Union[str, bytes],
+                  password: Optional[str] = None, filename: Optional[str] = None,
+                  compression: Optional[str] = None, cipher: Optional[str] = None,
+                  scatter: bool = False) -> None:
+        """
+        Cache des données dans un fichier audio, écrit directement dans un
+        fichier : la mémoire utilisée est celle d'un bloc de frames.
         
-        # Convertir les frames en array numpy
-        audio_array = np.frombuffer(frames, dtype=np.int16)
+        Args:
+            audio_path: Chemin vers le fichier audio d'origine
+            output_path: Chemin du fichier audio produit
+            (autres arguments : voir hide_data)
+        """
+        with open(audio_path, 'rb') as source, open(output_path, 'wb') as output:
+            for piece in self.hide_stream(source, data, password, filename, compression, cipher, scatter):
+                output.write(piece)
+    
+    def hide_stream(self, source: BinaryIO, data: Union[str, bytes], password: Optional[str] = None,
+                    filename: Optional[str] = None, compression: Optional[str] = None,
+                    cipher: Optional[str] = None, scatter: bool = False) -> Iterator[bytes]:
+        """
+        Cache des données dans un flux WAV, RF64 ou Wave64, produit morceau
+        par morceau.
         
-        # Créer une copie modifiable
-        audio_array = audio_array.copy()
+        Les en-têtes sont recopiés tels quels, puis les échantillons sont lus,
+        modifiés et rendus par blocs de MAX_READ frames, et enfin la fin du
+        fichier est recopiée : la mémoire reste bornée par un bloc, quelle que
+        soit la taille du fichier. Avec scatter, les positions du corps sont
+        calculées et triées d'avance, puis écrites au passage des blocs.
         
-        # Préparer les données
-        if password:
-            data = encrypt_data(data.encode(), password).decode('latin-1')
+        Les en-têtes et la capacité sont vérifiés avant le retour : les
+        erreurs sont levées ici, pas pendant la lecture des morceaux.
         
-        # Convertir en binaire
-        binary_data = text_to_binary(data)
-        binary_data += self.delimiter
+        Args:
+            source: Flux du fichier audio, lu une seule fois dans l'ordre
+            (autres arguments : voir hide_data)
         
-        # Vérifier la capacité
-        if len(binary_data) > len(audio_array):
-            raise ValueError("Les données sont trop volumineuses pour ce fichier audio")
+        Returns:
+            Itérateur des morceaux du fichier produit, de même taille que
+            l'original
         
-        # Masquer les données
-        for i in range(len(binary_data)):
-            # Modifier le LSB
-            audio_array[i] = (audio_array[i] & 0xFFFE) | int(binary_data[i])
+        Raises:
+            ValueError: Format non pris en charge ou données trop volumineuses
+        """
+        reader = WavReader(source)
         
-        # Convertir en bytes
-        modified_frames = audio_array.astype(np.int16).tobytes()
+        # Préparer le conteneur (produit par blocs, chiffrés à la demande)
+        size, chunks = stream_payload(data, password, filename, compression, cipher, scatter=scatter)
         
-        # Créer le nouveau fichier audio
-        output = io.BytesIO()
-        with wave.open(output, 'wb') as output_file:
-            output_file.setparams(params)
-            output_file.writeframes(modified_frames)
+        # Vérifier la capacité
+        if size * 8 > reader.samples_count:
+            raise ValueError("Les données sont trop volumineuses pour ce fichier audio")
         
-        return output.getvalue()
+        return self._embed(reader, size, chunks, password, scatter)
     
-    def extract_data(self, audio_path: Union[str, bytes], password: Optional[str] = None) -> str:
+    def extract_data(self, audio_path: Union[str, bytes], password: Optional[str] = None) -> Union[str, HiddenFile]:
         """
         Extrait des données cachées d'un fichier audio.
         
@@ -84,37 +106,16 @@ class AudioSteganography:
             password: Mot de passe optionnel pour déchiffrer les données
         
         Returns:
-            Données extraites
+            Texte extrait, ou HiddenFile (bytes) pour un fichier binaire
         """
-        # Charger le fichier audio
-        if isinstance(audio_path, str):
-            with wave.open(audio_path, 'rb') as audio_file:
-                frames = audio_file.readframes(audio_file.getnframes())
-        else:
-            with wave.open(io.BytesIO(audio_path), 'rb') as audio_file:
-                frames = audio_file.readframes(audio_file.getnframes())
-        
-        # Convertir les frames en array numpy
-        audio_array = np.frombuffer(frames, dtype=np.int16)
-        
-        # Extraire les bits LSB
-        binary_data = ""
-        for sample in audio_array:
-            binary_data += str(sample & 1)
-        
-        # Trouver la fin des données
-        delimiter_index = binary_data.find(self.delimiter)
-        if delimiter_index == -1:
+        # Lire les frames par blocs : seuls l'en-tête et le corps annoncé sont
+        # lus (jusqu'au dernier élément dispersé pour un corps dispersé)
+        with self._open(audio_path) as source:
+            reader = WavReader(source)
+            data = recover_rows(reader.samples(FIRST_READ), password, size=reader.samples_count)
+        if data is None:
             raise ValueError("Aucune donnée cachée trouvée dans le fichier audio")
         
-        # Extraire les données
-        data_binary = binary_data[:delimiter_index]
-        data = binary_to_text(data_binary)
-        
-        # Déchiffrer si nécessaire
-        if password:
-            data = decrypt_data(data.encode('latin-1'), password).decode()
-        
         return data
     
     def get_capacity(self, audio_path: Union[str, bytes]) -> int:
@@ -127,11 +128,50 @@ class AudioSteganography:
         Returns:
             Capacité en bits
         """
-        if isinstance(audio_path, str):
-            with wave.open(audio_path, 'rb') as audio_file:
-                frames = audio_file.getnframes()
-        else:
-            with wave.open(io.BytesIO(audio_path), 'rb') as audio_file:
-                frames = audio_file.getnframes()
+        with self._open(audio_path) as source:
+            frames = WavReader(source).frames
         
-        return frames - len(self.delimiter)  # Moins la taille du délimiteur
+        return frames - self.header_bits  # Moins la taille de l'en-tête
+    
+    def _embed(self, reader: WavReader, size: int, chunks: Iterable[bytes], password: Optional[str],
+               scatter: bool) -> Iterator[bytes]:
+        yield reader.header
+        if scatter:
+            # En-tête sur les premiers échantillons, corps dispersé sur tous :
+            # positions du corps triées, écrites au passage de chaque bloc
+            chunks = iter(chunks)
+            first = next(chunks)
+            permutation = scatter_permutation(first[:SCATTER_PREFIX_SIZE], password,
+                                              reader.samples_count - HEADER_BITS)
+            body = ScatteredStream(permutation, (size - HEADER_SIZE) * 8, HEADER_BITS)
+            body.load(chain([first[HEADER_SIZE:]], chunks))
+            header = unpack_bits(first[:HEADER_SIZE])
+            for block in reader.blocks():
+                audio_array = np.frombuffer(block, dtype='<i2', count=len(block) // 2)
+                if header.size:
+                    embed_lsb(audio_array, header[:audio_array.size])
+                    header = header[audio_array.size:]
+                body.write(audio_array)
+                yield block
+            if not body.finished:
+                raise ValueError("Fichier audio tronqué")
+        else:
+            # (échantillons & ~1) | bits, une opération vectorisée par bloc ;
+            # les blocs ont un nombre entier d'octets du conteneur
+            feed = ByteFeed(chunks)
+            remaining = size
+            for block in reader.blocks():
+                if remaining:
+                    audio_array = np.frombuffer(block, dtype='<i2', count=len(block) // 2)
+                    count = min(remaining, audio_array.size // 8)
+                    embed_lsb_chunks(audio_array, feed.take(count))
+                    remaining -= count
+                yield block
+            if remaining:
+                raise ValueError("Fichier audio tronqué")
+        yield from reader.trailer()
+    
+    def _open(self, audio_path: Union[str, bytes]) -> BinaryIO:
+        if isinstance(audio_path, str):
+            return open(audio_path, 'rb')
+        return io.BytesIO(audio_path)
@@ -2,116 +2,59 @@
 Module de stéganographie audio alternatif (version robuste).
 """
 
-import wave
-import numpy as np
-from typing import Union, Optional
+from typing import BinaryIO, Union, Optional
 import io
-from .utils import text_to_binary, binary_to_text, encrypt_data, decrypt_data
+from .audio import AudioSteganography
+from .bitmap import recover_rows
+from .payload import HEADER_BITS, HiddenFile
+from .wav import FIRST_READ, WavReader
 
 
 class AudioSteganographyAlt:
     """Classe alternative pour la stéganographie audio utilisant LSB."""
     
     def __init__(self):
-        self.delimiter = "1111111111111110"  # Marqueur de fin
+        self.header_bits = HEADER_BITS  # Surcoût de l'en-tête du conteneur
     
-    def hide_data(self, audio_path: Union[str, bytes], data: str, password: Optional[str] = None) -> bytes:
+    def hide_data(self, audio_path: Union[str, bytes], data: Union[str, bytes], password: Optional[str] = None,
+                  filename: Optional[str] = None, compression: Optional[str] = None,
+                  cipher: Optional[str] = None) -> bytes:
         """
         Cache des données dans un fichier audio en utilisant LSB.
         Version alternative plus robuste.
         """
-        # Charger le fichier audio
-        if isinstance(audio_path, str):
-            with wave.open(audio_path, 'rb') as audio_file:
-                frames = audio_file.readframes(audio_file.getnframes())
-                params = audio_file.getparams()
-        else:
-            with wave.open(io.BytesIO(audio_path), 'rb') as audio_file:
-                frames = audio_file.readframes(audio_file.getnframes())
-                params = audio_file.getparams()
-        
-        # Vérifier que c'est du PCM 16-bit
-        if params.sampwidth != 2:
-            raise ValueError("Seuls les fichiers audio PCM 16-bit sont supportés")
-        
-        # Préparer les données
-        if password:
-            data = encrypt_data(data.encode(), password).decode('latin-1')
-        
-        # Convertir en binaire
-        binary_data = text_to_binary(data)
-        binary_data += self.delimiter
-        
-        # Vérifier la capacité
-        if len(binary_data) > len(frames) // 2:  # 2 bytes par sample
-            raise ValueError("Les données sont trop volumineuses pour ce fichier audio")
-        
-        # Méthode alternative : modification byte par byte
-        frames_list = list(frames)
-        
-        # Masquer les données
-        for i in range(len(binary_data)):
-            byte_index = i * 2  # 2 bytes par sample (16-bit)
-            if byte_index + 1 < len(frames_list):
-                # Modifier le LSB du premier byte du sample
-                frames_list[byte_index] = (frames_list[byte_index] & 0xFE) | int(binary_data[i])
-        
-        # Convertir en bytes
-        modified_frames = bytes(frames_list)
-        
-        # Créer le nouveau fichier audio
-        output = io.BytesIO()
-        with wave.open(output, 'wb') as output_file:
-            output_file.setparams(params)
-            output_file.writeframes(modified_frames)
-        
-        return output.getvalue()
+        # Même écriture que le LSB du premier octet de chaque sample
+        # (petit-boutiste), par blocs de frames : sans liste d'octets
+        # intermédiaire, la mémoire reste bornée par un bloc
+        with self._open(audio_path) as source:
+            return b''.join(AudioSteganography().hide_stream(source, data, password, filename, compression, cipher))
     
-    def extract_data(self, audio_path: Union[str, bytes], password: Optional[str] = None) -> str:
+    def extract_data(self, audio_path: Union[str, bytes], password: Optional[str] = None) -> Union[str, HiddenFile]:
         """
         Extrait des données cachées d'un fichier audio.
         Version alternative plus robuste.
         """
-        # Charger le fichier audio
-        if isinstance(audio_path, str):
-            with wave.open(audio_path, 'rb') as audio_file:
-                frames = audio_file.readframes(audio_file.getnframes())
-        else:
-            with wave.open(io.BytesIO(audio_path), 'rb') as audio_file:
-                frames = audio_file.readframes(audio_file.getnframes())
-        
-        # Extraire les bits LSB
-        binary_data = ""
-        for i in range(0, len(frames), 2):  # 2 bytes par sample
-            if i < len(frames):
-                # Extraire le LSB du premier byte du sample
-                binary_data += str(frames[i] & 1)
-        
-        # Trouver la fin des données
-        delimiter_index = binary_data.find(self.delimiter)
-        if delimiter_index == -1:
+        # Le LSB du premier octet de chaque sample est celui du sample
+        # (petit-boutiste) : lecture par blocs, arrêtée à la fin du message
+        with self._open(audio_path) as source:
+            reader = WavReader(source)
+            data = recover_rows(reader.samples(FIRST_READ), password, size=reader.samples_count)
+        if data is None:
             raise ValueError("Aucune donnée cachée trouvée dans le fichier audio")
         
-        # Extraire les données
-        data_binary = binary_data[:delimiter_index]
-        data = binary_to_text(data_binary)
-        
-        # Déchiffrer si nécessaire
-        if password:
-            data = decrypt_data(data.encode('latin-1'), password).decode()
-        
         return data
     
     def get_capacity(self, audio_path: Union[str, bytes]) -> int:
         """
         Retourne la capacité maximale en bits pour un fichier audio.
         """
-        if isinstance(audio_path, str):
-            with wave.open(audio_path, 'rb') as audio_file:
-                frames = audio_file.getnframes()
-        else:
-            with wave.open(io.BytesIO(audio_path), 'rb') as audio_file:
-                frames = audio_file.getnframes()
+        with self._open(audio_path) as source:
+            frames = WavReader(source).frames
         
-        # Capacité = nombre de samples (frames / 2 pour 16-bit) - délimiteur
-        return (frames // 2) - len(self.delimiter)
+        # Capacité = nombre de samples (frames / 2 pour 16-bit) - en-tête
+        return (frames // 2) - self.header_bits
+    
+    def _open(self, audio_path: Union[str, bytes]) -> BinaryIO:
+        if isinstance(audio_path, str):
+            return open(audio_path, 'rb')
+        return io.BytesIO(audio_path)
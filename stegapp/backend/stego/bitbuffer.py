@@ -0,0 +1,165 @@
+"""
+Tampons de bits compacts (8 bits par octet) pour la préparation et la
+lecture des données cachées.
+
+Les bits ne sont jamais représentés par des chaînes de '0'/'1' : l'écriture
+accumule des octets, la lecture consomme des blocs d'octets à la demande, et
+les conversions passent par np.unpackbits / np.packbits.
+"""
+
+from itertools import chain
+from typing import Iterable, Iterator
+
+import numpy as np
+
+
+def unpack_bits(data: bytes) -> np.ndarray:
+    """Convertit des octets en tableau de bits (uint8, bit de poids fort en premier)."""
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+
+def pack_bits(bits: np.ndarray) -> bytes:
+    """Regroupe un tableau de bits en octets (complété par des zéros)."""
+    return np.packbits(bits.astype(np.uint8, copy=False)).tobytes()
+
+
+def _uint_to_bits(value: int, width: int) -> np.ndarray:
+    if value < 0 or value >= 1 << width:
+        raise ValueError(f"Valeur hors limites pour {width} bits : {value}")
+    shifts = np.arange(width - 1, -1, -1, dtype=np.uint64)
+    return ((np.uint64(value) >> shifts) & np.uint64(1)).astype(np.uint8)
+
+
+class BitWriter:
+    """Écriture séquentielle de bits dans un tampon d'octets."""
+
+    __slots__ = ('_buffer', '_nbits')
+
+    def __init__(self, data: bytes = b''):
+        self._buffer = bytearray(data)
+        self._nbits = len(data) * 8
+
+    def __len__(self) -> int:
+        """Nombre de bits écrits."""
+        return self._nbits
+
+    def write_bytes(self, data: bytes) -> None:
+        """Écrit des octets."""
+        if self._nbits % 8 == 0:
+            self._buffer += data
+            self._nbits += len(data) * 8
+        else:
+            self.write_bits(unpack_bits(data))
+
+    def write_bits(self, bits: np.ndarray) -> None:
+        """Écrit un tableau de bits (0 ou 1)."""
+        used = self._nbits % 8
+        if used:
+            # Reprendre les bits déjà écrits du dernier octet incomplet
+            last = np.array([self._buffer.pop()], dtype=np.uint8)
+            bits = np.concatenate([np.unpackbits(last)[:used], bits])
+            self._nbits -= used
+        self._buffer += pack_bits(bits)
+        self._nbits += bits.size
+
+    def write_uint(self, value: int, width: int) -> None:
+        """Écrit un entier non signé sur width bits."""
+        self.write_bits(_uint_to_bits(value, width))
+
+    def getvalue(self) -> bytes:
+        """Retourne les octets écrits (dernier octet complété par des zéros)."""
+        return bytes(self._buffer)
+
+    def to_bits(self) -> np.ndarray:
+        """Retourne les bits écrits sous forme de tableau."""
+        return np.unpackbits(np.frombuffer(self._buffer, dtype=np.uint8), count=self._nbits)
+
+
+class BitReader:
+    """
+    Lecture séquentielle de bits à partir de blocs d'octets.
+
+    Les blocs ne sont demandés à la source qu'au moment où ils sont
+    nécessaires : un lecteur qui s'arrête tôt ne consomme pas le reste. Les
+    octets lus ne sont retirés du tampon qu'une fois la position au-delà de
+    sa moitié : une suite de petites lectures reste linéaire.
+    """
+
+    __slots__ = ('_chunks', '_buffer', '_pos')
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+        self._pos = 0  # Position en bits dans le tampon
+
+    def _fill(self, nbits: int) -> None:
+        while len(self._buffer) * 8 - self._pos < nbits:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+
+    def _compact(self) -> None:
+        consumed = self._pos // 8
+        if consumed * 2 > len(self._buffer):
+            del self._buffer[:consumed]
+            self._pos -= consumed * 8
+
+    def read_bits(self, count: int) -> np.ndarray:
+        """Lit count bits (moins si la source est épuisée)."""
+        self._fill(count)
+        end = min(self._pos + count, len(self._buffer) * 8)
+        first_byte = self._pos // 8
+        last_byte = (end + 7) // 8
+        bits = unpack_bits(bytes(self._buffer[first_byte:last_byte]))
+        offset = self._pos - first_byte * 8
+        result = bits[offset:offset + end - self._pos]
+        self._pos = end
+        self._compact()
+        return result
+
+    def read_bytes(self, size: int) -> bytes:
+        """Lit size octets (moins si la source est épuisée)."""
+        if self._pos % 8:
+            bits = self.read_bits(size * 8)
+            return pack_bits(bits[:bits.size // 8 * 8])
+        self._fill(size * 8)
+        start = self._pos // 8
+        data = bytes(self._buffer[start:start + size])
+        self._pos += len(data) * 8
+        self._compact()
+        return data
+
+    def read_uint(self, width: int) -> int:
+        """Lit un entier non signé sur width bits."""
+        bits = self.read_bits(width)
+        if bits.size < width:
+            raise EOFError("Fin des données atteinte")
+        return int.from_bytes(pack_bits(np.concatenate([np.zeros(-width % 8, dtype=np.uint8), bits])), 'big')
+
+    def remaining(self) -> Iterator[bytes]:
+        """Retourne les octets non consommés, bloc par bloc."""
+        if self._pos % 8:
+            raise ValueError("Lecture non alignée sur un octet")
+        return chain([bytes(self._buffer[self._pos // 8:])], self._chunks)
+
+
+class ByteFeed:
+    """Découpe une suite de blocs d'octets en tranches de taille donnée."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b'')
+
+    def take(self, count: int) -> Iterator[memoryview]:
+        """Produit les count octets suivants, par morceaux."""
+        while count:
+            if not self._pending:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    return
+                self._pending = memoryview(chunk)
+            piece = self._pending[:count]
+            self._pending = self._pending[len(piece):]
+            count -= len(piece)
+            yield piece
@@ -0,0 +1,473 @@
+"""
+Insertion en place dans les images BMP et TIFF non compressées.
+
+Les pixels de ces formats sont stockés tels quels dans le fichier : ils sont
+modifiés directement dans un tableau mappé en mémoire (np.memmap), sans
+décodage ni réencodage. Seules les pages touchées par le message sont lues
+ou écrites, quelle que soit la taille de l'image, et le fichier produit
+garde son format et ses métadonnées.
+
+Les vues construites par BitmapLayout.pixels parcourent les pixels dans
+l'ordre de Pillow (lignes de haut en bas, canaux R, G, B) : une image
+modifiée ici se relit avec ImageSteganography, et inversement.
+"""
+
+import os
+import shutil
+import struct
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Optional, Union
+
+import numpy as np
+
+from .bitbuffer import BitReader
+from .lsb import MAX_DEPTH, embed_lsb, iter_lsb_stream
+from .payload import (HEADER_BITS, HEADER_SIZE, KDF_SLOT_SIZE, SCATTER_PREFIX_SIZE, HiddenFile, payload_depth,
+                      payload_scattered, payload_size, recover_data, stream_payload)
+from .scatter import (ScatteredStream, embed_scattered, iter_scattered_bytes, read_scatter_prefix,
+                      scatter_permutation)
+
+
+FIRST_BATCH = 1 << 16   # Taille du premier lot de lignes lu (éléments)
+BATCH_SIZE = 1 << 22    # Taille maximale d'un lot de lignes (éléments)
+
+_BMP_HEADERS = {40, 52, 56, 64, 108, 124}  # BITMAPINFOHEADER à BITMAPV5HEADER
+
+# Types TIFF : (format struct, taille)
+_TIFF_TYPES = {1: ('B', 1), 3: ('H', 2), 4: ('I', 4)}
+
+
+class BitmapLayout:
+    """Disposition des pixels dans un fichier BMP ou TIFF non compressé."""
+
+    __slots__ = ('format', 'offset', 'width', 'height', 'samples', 'bands', 'dtype', 'stride',
+                 'bottom_up', 'bgr')
+
+    def __init__(self, format: str, offset: int, width: int, height: int, samples: int, bands: int,
+                 dtype: np.dtype, stride: int, bottom_up: bool = False, bgr: bool = False):
+        self.format = format
+        self.offset = offset        # Position des pixels dans le fichier
+        self.width = width
+        self.height = height
+        self.samples = samples      # Échantillons stockés par pixel (BGRX : 4)
+        self.bands = bands          # Canaux utilisés par pixel (BGRX : 3)
+        self.dtype = np.dtype(dtype)
+        self.stride = stride        # Taille d'une ligne stockée, remplissage compris
+        self.bottom_up = bottom_up  # Lignes stockées de bas en haut (BMP)
+        self.bgr = bgr              # Canaux stockés dans l'ordre B, G, R (BMP)
+
+    @property
+    def end(self) -> int:
+        """Position de la fin des pixels dans le fichier."""
+        return self.offset + self.height * self.stride
+
+    def pixels(self, buffer: np.ndarray) -> np.ndarray:
+        """
+        Construit une vue (hauteur, largeur, canaux) des pixels d'un fichier.
+
+        Args:
+            buffer: Contenu du fichier (tableau uint8, mappé en mémoire ou non)
+
+        Returns:
+            Vue partageant la mémoire de buffer, dans l'ordre de Pillow
+        """
+        rows = buffer[self.offset:self.end].reshape(self.height, self.stride)
+        samples = rows[:, :self.width * self.samples * self.dtype.itemsize]
+        if self.dtype.itemsize > 1:
+            samples = samples.view(self.dtype)
+        pixels = samples.reshape(self.height, self.width, self.samples)
+        if self.bottom_up:
+            pixels = pixels[::-1]
+        if self.bgr:
+            # BGR ou BGRX -> RGB
+            pixels = pixels[:, :, self.bands - 1::-1]
+        return pixels
+
+
+def _read_bmp(buffer: np.ndarray) -> Optional[BitmapLayout]:
+    if buffer.size < 54 or bytes(buffer[:2]) != b'BM':
+        return None
+    offset, header_size, width, height, planes, bits, compression = struct.unpack_from('<IIiiHHI', buffer, 10)
+    if header_size not in _BMP_HEADERS or width <= 0 or height == 0 or compression != 0:
+        return None
+
+    if bits in (24, 32):
+        samples, bgr = bits // 8, True
+    elif bits == 8:
+        # Palette de gris identité uniquement : Pillow lit l'image en mode L
+        colors = struct.unpack_from('<I', buffer, 46)[0] or 256
+        palette_offset = 14 + header_size
+        if colors != 256 or palette_offset + 1024 > buffer.size:
+            return None
+        palette = buffer[palette_offset:palette_offset + 1024].reshape(256, 4)[:, :3]
+        if not np.array_equal(palette, np.repeat(np.arange(256, dtype=np.uint8), 3).reshape(256, 3)):
+            return None
+        samples, bgr = 1, False
+    else:
+        return None
+
+    layout = BitmapLayout('BMP', offset, width, abs(height), samples, min(samples, 3), np.uint8,
+                          (width * bits + 31) // 32 * 4, bottom_up=height > 0, bgr=bgr)
+    return layout if layout.end <= buffer.size else None
+
+
+def _read_tiff(buffer: np.ndarray) -> Optional[BitmapLayout]:
+    if buffer.size < 8:
+        return None
+    order = {b'II': '<', b'MM': '>'}.get(bytes(buffer[:2]))
+    if order is None or struct.unpack_from(order + 'H', buffer, 2)[0] != 42:
+        return None
+
+    # Premier IFD : seule la première image est utilisée, comme avec Pillow
+    ifd = struct.unpack_from(order + 'I', buffer, 4)[0]
+    if ifd + 2 > buffer.size:
+        return None
+    count = struct.unpack_from(order + 'H', buffer, ifd)[0]
+    if ifd + 2 + count * 12 > buffer.size:
+        return None
+    tags = {}
+    for index in range(count):
+        tag, kind, length, value = struct.unpack_from(order + 'HHI4s', buffer, ifd + 2 + index * 12)
+        if kind not in _TIFF_TYPES:
+            continue
+        code, size = _TIFF_TYPES[kind]
+        if length * size > 4:
+            position = struct.unpack(order + 'I', value)[0]
+            if position + length * size > buffer.size:
+                return None
+            value = buffer[position:position + length * size].tobytes()
+        tags[tag] = struct.unpack_from(f'{order}{length}{code}', value)
+
+    width, height = tags.get(256, (0,))[0], tags.get(257, (0,))[0]
+    samples = tags.get(277, (1,))[0]
+    bits = set(tags.get(258, (1,)))
+    photometric = tags.get(262, (None,))[0]
+    offsets, counts = tags.get(273), tags.get(279)
+    if (not width or not height or not offsets or not counts or len(offsets) != len(counts)
+            or tags.get(259, (1,))[0] != 1 or tags.get(284, (1,))[0] != 1
+            or tags.get(274, (1,))[0] != 1 or set(tags.get(339, (1,))) != {1}):
+        return None
+
+    # Modes natifs du moteur image : L, LA, RGB, RGBA (8 bits), I;16 (16 bits,
+    # petit-boutiste ; Pillow lit les TIFF 16 bits gros-boutistes en I;16B)
+    if bits == {8} and (photometric, samples) in ((1, 1), (1, 2), (2, 3), (2, 4)):
+        if samples in (2, 4) and tags.get(338) != (2,):
+            return None  # Canal alpha absent ou prémultiplié
+        dtype = np.uint8
+    elif bits == {16} and photometric == 1 and samples == 1 and order == '<':
+        dtype = np.dtype('<u2')
+    else:
+        return None
+
+    # Bandes contiguës : les pixels forment un seul bloc
+    for position, size, following in zip(offsets, counts, offsets[1:]):
+        if position + size != following:
+            return None
+    layout = BitmapLayout('TIFF', offsets[0], width, height, samples, samples, dtype,
+                          width * samples * np.dtype(dtype).itemsize)
+    if layout.end > min(buffer.size, offsets[0] + sum(counts)):
+        return None
+    return layout
+
+
+def read_layout(buffer: np.ndarray) -> Optional[BitmapLayout]:
+    """
+    Analyse l'en-tête d'une image BMP ou TIFF non compressée.
+
+    Args:
+        buffer: Contenu du fichier (tableau uint8)
+
+    Returns:
+        La disposition des pixels, ou None si le fichier n'est pas une image
+        prise en charge (compressée, à palette, en tuiles, ...)
+    """
+    return _read_bmp(buffer) or _read_tiff(buffer)
+
+
+def _map(image_path: Union[str, bytes], mode: str = 'r') -> np.ndarray:
+    """Mappe un fichier en mémoire, ou expose des données sans copie."""
+    if isinstance(image_path, str):
+        if not os.path.getsize(image_path):
+            return np.zeros(0, dtype=np.uint8)
+        return np.memmap(image_path, dtype=np.uint8, mode=mode)
+    return np.frombuffer(image_path, dtype=np.uint8)
+
+
+def iter_row_batches(pixels: np.ndarray) -> Iterator[np.ndarray]:
+    """
+    Parcourt une vue (hauteur, largeur, canaux) par lots de lignes.
+
+    Les lots grandissent de FIRST_BATCH à BATCH_SIZE éléments : un petit
+    message n'est lu que sur les premières lignes.
+
+    Yields:
+        Les éléments de chaque lot, en tableau 1D contigu
+    """
+    height = pixels.shape[0]
+    row_size = max(1, pixels.shape[1] * pixels.shape[2])
+    batch = FIRST_BATCH
+    row = 0
+    while row < height:
+        rows = max(1, batch // row_size)
+        yield np.ascontiguousarray(pixels[row:row + rows]).reshape(-1)
+        row += rows
+        batch = min(batch * 2, BATCH_SIZE)
+
+
+def embed_rows(pixels: np.ndarray, chunks: Iterable[bytes], depth: int = 1, workers: int = 1) -> None:
+    """
+    Insère un conteneur dans une vue de pixels quelconque, en place.
+
+    La vue peut être non contiguë (remplissage des lignes, ordre BGR) :
+    elle est traitée par lots de lignes copiés puis réécrits. L'en-tête est
+    inséré à 1 bit par élément, la suite à la profondeur choisie ; les lots
+    situés après la fin des données ne sont pas parcourus.
+
+    Args:
+        pixels: Vue modifiable (hauteur, largeur, canaux)
+        chunks: Blocs du conteneur (voir stream_payload)
+        depth: Nombre de bits de poids faible écrits par élément (1 à 4)
+        workers: Nombre de threads par lot
+    """
+    reader = BitReader(chunks)
+    height = pixels.shape[0]
+    row_size = max(1, pixels.shape[1] * pixels.shape[2])
+    rows = max(1, BATCH_SIZE // row_size)
+    position = 0
+    for row in range(0, height, rows):
+        view = pixels[row:row + rows]
+        block = np.ascontiguousarray(view)
+        flat = block.reshape(-1)
+
+        start = 0
+        done = False
+        if position < HEADER_BITS:
+            wanted = min(HEADER_BITS - position, flat.size)
+            bits = reader.read_bits(wanted)
+            embed_lsb(flat, bits)
+            start = bits.size
+            done = bits.size < wanted
+        if not done:
+            wanted = (flat.size - start) * depth
+            bits = reader.read_bits(wanted)
+            embed_lsb(flat, bits, start, depth, workers, row_size)
+            done = bits.size < wanted
+
+        if not np.shares_memory(block, view):
+            view[...] = block
+        position += flat.size
+        if done:
+            return
+    if reader.read_bits(1).size:
+        raise ValueError("Les données sont trop volumineuses pour ce support")
+
+
+def recover_rows(rows: Iterable[np.ndarray], password: Optional[str] = None,
+                 carrier: Union[np.ndarray, Callable[[], np.ndarray], None] = None,
+                 size: Optional[int] = None) -> Union[str, HiddenFile, None]:
+    """
+    Extrait un conteneur d'une image lue par lignes ou lots de lignes, à la
+    demande (lignes PNG décodées une à une, lots d'un fichier mappé, ...).
+
+    Args:
+        rows: Éléments de l'image par lignes ou lots de lignes, dans l'ordre
+        password: Mot de passe optionnel pour déchiffrer les données
+        carrier: Image entière, ou fonction qui la décode, pour lire un corps
+            dispersé par accès direct
+        size: Nombre total d'éléments, pour lire un corps dispersé au fil
+            des lignes, sans accès direct (à défaut de carrier et de size,
+            toutes les lignes sont réunies)
+
+    Returns:
+        Les données extraites, ou None si aucun conteneur n'est trouvé
+    """
+    rows = iter(rows)
+    # Réunir les lignes qui portent l'en-tête (1 bit par élément)
+    head = []
+    count = 0
+    for row in rows:
+        head.append(row)
+        count += row.size
+        if count >= HEADER_BITS:
+            break
+    first = np.concatenate(head) if head else np.zeros(0, dtype=np.uint8)
+    header = np.packbits(first[:HEADER_BITS] & 1).tobytes()
+    depth = payload_depth(header)
+
+    if payload_scattered(header) and carrier is None and size is not None:
+        chunks = _iter_scattered_rows(first, rows, header, password, size)
+    elif payload_scattered(header):
+        if carrier is None:
+            carrier = np.concatenate([first] + list(rows))
+        elif callable(carrier):
+            carrier = carrier()
+        prefix = read_scatter_prefix(carrier, header, depth)
+        permutation = scatter_permutation(prefix, password, carrier.size - HEADER_BITS, depth)
+        chunks = iter_scattered_bytes(carrier, permutation, HEADER_BITS, depth)
+    else:
+        # Les lignes suivantes ne sont lues que si le corps l'exige
+        chunks = iter_lsb_stream(chain([first[HEADER_BITS:]], rows), depth)
+    return recover_data(chain([header], chunks), password)
+
+
+def _iter_scattered_rows(first: np.ndarray, rows: Iterator[np.ndarray], header: bytes,
+                         password: Optional[str], size: int) -> Iterator[bytes]:
+    # Corps dispersé lu au fil des lignes : paramètres de clé à la suite de
+    # l'en-tête, puis positions du corps triées, lues au passage des lignes
+    depth = payload_depth(header)
+    while first.size < HEADER_BITS + KDF_SLOT_SIZE * 8 // depth:
+        row = next(rows, None)
+        if row is None:
+            break
+        first = np.concatenate([first, row.reshape(-1)])
+    prefix = read_scatter_prefix(first, header, depth)
+    permutation = scatter_permutation(prefix, password, size - HEADER_BITS, depth)
+    elements = -(-(payload_size(header) - HEADER_SIZE) * 8 // depth)
+    body = ScatteredStream(permutation, min(-(-elements // 8) * 8, permutation.size // 8 * 8), HEADER_BITS, depth)
+    for row in chain([first], rows):
+        body.read(row.reshape(-1))
+        if body.finished:
+            break
+    yield body.data()
+
+
+class BitmapSteganography:
+    """Stéganographie LSB en place pour les images BMP et TIFF non compressées."""
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Nombre de threads pour l'insertion (par défaut : nombre
+                de cœurs)
+        """
+        self.header_bits = HEADER_BITS
+        self.workers = workers or os.cpu_count() or 1
+
+    def supports(self, image_path: Union[str, bytes]) -> bool:
+        """Indique si l'image peut être traitée en place."""
+        return read_layout(_map(image_path)) is not None
+
+    def hide_data(self, image_path: Union[str, bytes], data: Union[str, bytes], password: Optional[str] = None,
+                  filename: Optional[str] = None, compression: Optional[str] = None,
+                  cipher: Optional[str] = None, bits_per_channel: int = 1,
+                  scatter: bool = False) -> Union[bytearray, memoryview]:
+        """
+        Cache des données dans une image BMP ou TIFF non compressée.
+
+        Un fichier est mappé en copie sur écriture : il n'est pas modifié, et
+        seules les pages qui portent le message sont lues et copiées. Un
+        bytearray est modifié en place ; des bytes sont copiés une fois.
+
+        Args:
+            image_path: Chemin vers l'image ou données d'image
+            data: Texte ou contenu binaire d'un fichier à cacher
+            password: Mot de passe optionnel pour chiffrer les données
+            filename: Nom du fichier d'origine (données binaires)
+            compression: 'zlib', 'lzma', 'bz2', 'auto' ou None
+            cipher: 'fernet' (par défaut), 'aesgcm', 'chacha20' ou 'aesgcm-stream'
+            bits_per_channel: Nombre de bits modifiés par canal (1 à 4)
+            scatter: Disperser les données selon le mot de passe (voir scatter.py)
+
+        Returns:
+            Données de l'image modifiée, dans le format d'origine : vue sur le
+            fichier mappé (memoryview) pour un chemin, bytearray sinon
+        """
+        if isinstance(image_path, str):
+            buffer = _map(image_path, 'c')
+            self._embed(buffer, data, password, filename, compression, cipher, bits_per_channel, scatter)
+            return buffer.data
+
+        # Au plus une copie des données, modifiée puis retournée telle quelle
+        result = image_path if isinstance(image_path, bytearray) else bytearray(image_path)
+        self._embed(np.frombuffer(result, dtype=np.uint8), data, password, filename, compression, cipher,
+                    bits_per_channel, scatter)
+        return result
+
+    def hide_file(self, image_path: str, output_path: str, data: Union[str, bytes],
+                  password: Optional[str] = None, filename: Optional[str] = None,
+                  compression: Optional[str] = None, cipher: Optional[str] = None,
+                  bits_per_channel: int = 1, scatter: bool = False) -> None:
+        """
+        Cache des données dans une copie de l'image, modifiée sur le disque.
+
+        L'image n'est jamais chargée en mémoire : seules les pages qui
+        portent le message sont lues et réécrites.
+
+        Args:
+            image_path: Chemin vers l'image d'origine
+            output_path: Chemin de l'image produite
+            (autres arguments : voir hide_data)
+        """
+        if not self.supports(image_path):
+            raise ValueError("Image non prise en charge : BMP ou TIFF non compressé attendu")
+        shutil.copyfile(image_path, output_path)
+        buffer = _map(output_path, 'r+')
+        self._embed(buffer, data, password, filename, compression, cipher, bits_per_channel, scatter)
+        buffer.flush()
+
+    def extract_data(self, image_path: Union[str, bytes], password: Optional[str] = None) -> Union[str, HiddenFile]:
+        """
+        Extrait des données cachées d'une image BMP ou TIFF non compressée.
+
+        Args:
+            image_path: Chemin vers l'image ou données d'image
+            password: Mot de passe optionnel pour déchiffrer les données
+
+        Returns:
+            Texte extrait, ou HiddenFile (bytes) pour un fichier binaire
+        """
+        buffer = _map(image_path)
+        layout = self._layout(buffer)
+        pixels = layout.pixels(buffer)
+        data = recover_rows(iter_row_batches(pixels), password, pixels)
+        if data is None:
+            raise ValueError("Aucune donnée cachée trouvée dans l'image")
+        return data
+
+    def get_capacity(self, image_path: Union[str, bytes], bits_per_channel: int = 1) -> int:
+        """
+        Retourne la capacité maximale en bits pour une image.
+
+        Args:
+            image_path: Chemin vers l'image ou données d'image
+            bits_per_channel: Nombre de bits modifiés par canal (1 à 4)
+
+        Returns:
+            Capacité en bits
+        """
+        layout = self._layout(_map(image_path))
+        return self._capacity(layout.width * layout.height * layout.bands, bits_per_channel)
+
+    def _layout(self, buffer: np.ndarray) -> BitmapLayout:
+        layout = read_layout(buffer)
+        if layout is None:
+            raise ValueError("Image non prise en charge : BMP ou TIFF non compressé attendu")
+        return layout
+
+    def _embed(self, buffer: np.ndarray, data: Union[str, bytes], password: Optional[str],
+               filename: Optional[str], compression: Optional[str], cipher: Optional[str],
+               bits_per_channel: int, scatter: bool) -> None:
+        layout = self._layout(buffer)
+        capacity = self._capacity(layout.width * layout.height * layout.bands, bits_per_channel)
+        size, chunks = stream_payload(data, password, filename, compression, cipher,
+                                      depth=bits_per_channel, scatter=scatter)
+        if size * 8 - HEADER_BITS > capacity:
+            raise ValueError("Les données sont trop volumineuses pour cette image")
+
+        pixels = layout.pixels(buffer)
+        if not scatter:
+            embed_rows(pixels, chunks, bits_per_channel, self.workers)
+            return
+        # En-tête au début de l'image, corps aux positions de la permutation
+        chunks = iter(chunks)
+        first = next(chunks)
+        embed_rows(pixels, [first[:HEADER_SIZE]])
+        permutation = scatter_permutation(first[:SCATTER_PREFIX_SIZE], password, pixels.size - HEADER_BITS,
+                                          bits_per_channel)
+        embed_scattered(pixels, chain([first[HEADER_SIZE:]], chunks), permutation, HEADER_BITS, bits_per_channel)
+
+    def _capacity(self, channels: int, bits_per_channel: int) -> int:
+        """Capacité en bits hors en-tête (l'en-tête occupe 1 bit par canal)."""
+        if not 1 <= bits_per_channel <= MAX_DEPTH:
+            raise ValueError(f"Le nombre de bits par canal doit être compris entre 1 et {MAX_DEPTH}")
+        return max(0, channels - self.header_bits) * bits_per_channel
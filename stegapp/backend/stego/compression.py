@@ -0,0 +1,96 @@
+"""
+Compression des données avant insertion (bibliothèque standard uniquement).
+"""
+
+import bz2
+import lzma
+import zlib
+from typing import Optional, Tuple
+
+# Identifiants enregistrés dans l'en-tête du conteneur
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+COMPRESSION_BZ2 = 3
+
+COMPRESSION_METHODS = {
+    'zlib': COMPRESSION_ZLIB,
+    'lzma': COMPRESSION_LZMA,
+    'bz2': COMPRESSION_BZ2,
+}
+
+
+def _compress(data: bytes, algorithm: int) -> bytes:
+    if algorithm == COMPRESSION_ZLIB:
+        return zlib.compress(data, 9)
+    if algorithm == COMPRESSION_LZMA:
+        # Format .lzma : en-tête de 13 octets contre ~60 pour .xz
+        return lzma.compress(data, format=lzma.FORMAT_ALONE)
+    if algorithm == COMPRESSION_BZ2:
+        return bz2.compress(data, 9)
+    raise ValueError(f"Algorithme de compression inconnu : {algorithm}")
+
+
+def compress_data(data: bytes, method: Optional[str] = 'auto') -> Tuple[int, bytes]:
+    """
+    Compresse des données.
+
+    Args:
+        data: Données à compresser
+        method: 'zlib', 'lzma', 'bz2', 'auto' (le plus petit résultat, ou
+            aucune compression si elle n'apporte rien) ou None
+
+    Returns:
+        Identifiant de l'algorithme utilisé (COMPRESSION_*) et données
+    """
+    if not method or method == 'none':
+        return COMPRESSION_NONE, data
+
+    if method == 'auto':
+        best = (COMPRESSION_NONE, data)
+        for algorithm in COMPRESSION_METHODS.values():
+            compressed = _compress(data, algorithm)
+            if len(compressed) < len(best[1]):
+                best = (algorithm, compressed)
+        return best
+
+    if method not in COMPRESSION_METHODS:
+        raise ValueError(f"Méthode de compression non supportée : {method}")
+    algorithm = COMPRESSION_METHODS[method]
+    return algorithm, _compress(data, algorithm)
+
+
+def decompress_data(data: bytes, algorithm: int, max_size: int) -> bytes:
+    """
+    Décompresse des données.
+
+    Args:
+        data: Données compressées
+        algorithm: Identifiant de l'algorithme (COMPRESSION_*)
+        max_size: Taille attendue des données décompressées
+
+    Returns:
+        Données décompressées
+    """
+    if algorithm == COMPRESSION_ZLIB:
+        decompressor = zlib.decompressobj()
+    elif algorithm == COMPRESSION_LZMA:
+        decompressor = lzma.LZMADecompressor()
+    elif algorithm == COMPRESSION_BZ2:
+        decompressor = bz2.BZ2Decompressor()
+    else:
+        raise ValueError(f"Algorithme de compression inconnu : {algorithm}")
+
+    # Ne jamais produire plus que la taille annoncée (bombe de décompression)
+    result = decompressor.decompress(data, max_size + 1)
+    if len(result) != max_size:
+        raise ValueError("Taille des données décompressées incohérente")
+    return result
+
+
+def compression_ratio(sample: bytes, method: Optional[str] = 'auto') -> float:
+    """Rapport entre la taille d'un échantillon et sa taille compressée."""
+    if not sample:
+        return 1.0
+    _, compressed = compress_data(sample, method)
+    return len(sample) / len(compressed)
@@ -0,0 +1,204 @@
+"""
+Chiffrement des données cachées : Fernet (historique) ou AEAD binaire.
+
+Les modes AEAD (AES-GCM, ChaCha20-Poly1305) écrivent nonce || chiffré || tag
+sous forme d'octets bruts : 28 octets de surcoût fixe, sans encodage texte,
+contre ~57 octets + 33 % de base64 pour Fernet.
+
+Le mode segmenté (aesgcm-stream) découpe les gros volumes en segments
+authentifiés indépendants, chiffrés et déchiffrés au fil de l'insertion et
+de l'extraction.
+"""
+
+import base64
+import io
+import os
+import struct
+from typing import Callable, Iterator, Optional, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM, ChaCha20Poly1305
+
+from .lsb import thread_map
+
+# Identifiants enregistrés dans l'en-tête du conteneur
+CIPHER_FERNET = 1
+CIPHER_AES_GCM = 2
+CIPHER_CHACHA20 = 3
+CIPHER_AES_GCM_STREAM = 4
+
+CIPHERS = {
+    'fernet': CIPHER_FERNET,
+    'aesgcm': CIPHER_AES_GCM,
+    'chacha20': CIPHER_CHACHA20,
+    'aesgcm-stream': CIPHER_AES_GCM_STREAM,
+}
+
+NONCE_SIZE = 12
+TAG_SIZE = 16
+
+# Mode segmenté (AES-GCM par segments, voir stream_encrypt)
+STREAM_SEGMENT_SIZE = 64 * 1024
+STREAM_PREFIX_SIZE = 7
+
+
+class PasswordError(ValueError):
+    """Mot de passe absent ou incorrect (code : 'password_required' ou 'invalid_password')."""
+
+    def __init__(self, message: str, code: str = 'invalid_password'):
+        super().__init__(message)
+        self.code = code
+
+
+def _aead(cipher: int, key: bytes):
+    if cipher == CIPHER_AES_GCM:
+        return AESGCM(key)
+    if cipher == CIPHER_CHACHA20:
+        return ChaCha20Poly1305(key)
+    raise ValueError(f"Algorithme de chiffrement inconnu : {cipher}")
+
+
+def cipher_id(name: Optional[str]) -> int:
+    """Retourne l'identifiant d'un algorithme à partir de son nom."""
+    if not name:
+        return CIPHER_FERNET
+    if name not in CIPHERS:
+        raise ValueError(f"Algorithme de chiffrement non supporté : {name}")
+    return CIPHERS[name]
+
+
+def encrypt_payload(data: bytes, key: bytes, cipher: int = CIPHER_FERNET) -> bytes:
+    """
+    Chiffre des données avec l'algorithme demandé.
+
+    Args:
+        data: Données à chiffrer
+        key: Clé de 32 octets (voir stego.kdf)
+        cipher: Identifiant de l'algorithme (CIPHER_*)
+
+    Returns:
+        Données chiffrées (jeton Fernet ou nonce || chiffré || tag)
+    """
+    if cipher == CIPHER_FERNET:
+        return Fernet(base64.urlsafe_b64encode(key)).encrypt(data)
+    if cipher == CIPHER_AES_GCM_STREAM:
+        return b''.join(stream_encrypt(data, key))
+    nonce = os.urandom(NONCE_SIZE)
+    return nonce + _aead(cipher, key).encrypt(nonce, data, None)
+
+
+def decrypt_payload(data: bytes, key: bytes, cipher: int = CIPHER_FERNET) -> bytes:
+    """
+    Déchiffre des données chiffrées par encrypt_payload.
+
+    Args:
+        data: Données chiffrées
+        key: Clé de 32 octets (voir stego.kdf)
+        cipher: Identifiant de l'algorithme (CIPHER_*)
+
+    Returns:
+        Données déchiffrées
+    """
+    if cipher == CIPHER_FERNET:
+        try:
+            return Fernet(base64.urlsafe_b64encode(key)).decrypt(data)
+        except InvalidToken:
+            raise PasswordError("Mot de passe incorrect ou données altérées") from None
+    if cipher == CIPHER_AES_GCM_STREAM:
+        return b''.join(stream_decrypt(io.BytesIO(data).read, key, len(data)))
+    if len(data) < NONCE_SIZE + TAG_SIZE:
+        raise ValueError("Données chiffrées tronquées")
+    try:
+        return _aead(cipher, key).decrypt(data[:NONCE_SIZE], data[NONCE_SIZE:], None)
+    except InvalidTag:
+        raise PasswordError("Mot de passe incorrect ou données altérées") from None
+
+
+def _segment_nonce(prefix: bytes, index: int, last: bool) -> bytes:
+    # nonce = préfixe aléatoire (7 octets) || compteur (4 octets) || dernier (1 octet)
+    return prefix + struct.pack('>IB', index, 1 if last else 0)
+
+
+def stream_encrypted_size(size: int, segment_size: int = STREAM_SEGMENT_SIZE) -> int:
+    """Taille du chiffré segmenté de size octets (préfixe et tags compris)."""
+    segments = max(1, -(-size // segment_size))
+    return STREAM_PREFIX_SIZE + size + segments * TAG_SIZE
+
+
+def stream_encrypt(data: bytes, key: bytes, segment_size: int = STREAM_SEGMENT_SIZE,
+                   workers: int = 1) -> Iterator[bytes]:
+    """
+    Chiffre des données par segments authentifiés (construction STREAM).
+
+    Chaque segment de segment_size octets est chiffré en AES-GCM avec un nonce
+    formé d'un préfixe aléatoire, de son numéro et d'un indicateur de dernier
+    segment : un segment déplacé, dupliqué ou une troncature sont détectés.
+    Les segments sont produits à la demande, workers à la fois.
+
+    Args:
+        data: Données à chiffrer
+        key: Clé de 32 octets
+        segment_size: Taille des segments en clair
+        workers: Nombre de threads de chiffrement
+
+    Yields:
+        Le préfixe de nonce, puis les segments chiffrés dans l'ordre
+    """
+    aead = AESGCM(key)
+    prefix = os.urandom(STREAM_PREFIX_SIZE)
+    yield prefix
+
+    view = memoryview(data)
+    count = max(1, -(-len(data) // segment_size))
+
+    def encrypt(index: int) -> bytes:
+        segment = view[index * segment_size:(index + 1) * segment_size]
+        return aead.encrypt(_segment_nonce(prefix, index, index == count - 1), bytes(segment), None)
+
+    # Pool de threads partagé du processus (voir lsb.thread_map)
+    for first in range(0, count, workers):
+        yield from thread_map(encrypt, range(first, min(first + workers, count)), workers)
+
+
+def stream_decrypt(read: Callable[[int], bytes], key: bytes, size: int,
+                   segment_size: int = STREAM_SEGMENT_SIZE, workers: int = 1) -> Iterator[bytes]:
+    """
+    Déchiffre des données segmentées au fur et à mesure de leur lecture.
+
+    Args:
+        read: Fonction de lecture (nombre d'octets -> octets)
+        key: Clé de 32 octets
+        size: Taille totale du chiffré (voir stream_encrypted_size)
+        segment_size: Taille des segments en clair
+        workers: Nombre de threads de déchiffrement
+
+    Yields:
+        Les segments déchiffrés dans l'ordre
+    """
+    aead = AESGCM(key)
+    prefix = read(STREAM_PREFIX_SIZE)
+    remaining = size - len(prefix)
+    if len(prefix) < STREAM_PREFIX_SIZE or remaining < TAG_SIZE:
+        raise ValueError("Données chiffrées tronquées")
+
+    def decrypt(item: Tuple[int, bytes, bool]) -> bytes:
+        index, segment, last = item
+        try:
+            return aead.decrypt(_segment_nonce(prefix, index, last), segment, None)
+        except InvalidTag:
+            raise PasswordError("Mot de passe incorrect ou données altérées") from None
+
+    index = 0
+    while remaining > 0:
+        # Lire au plus un segment par thread : la mémoire reste bornée
+        batch = []
+        while remaining > 0 and len(batch) < workers:
+            length = min(segment_size + TAG_SIZE, remaining)
+            segment = read(length)
+            if len(segment) < length:
+                raise ValueError("Données chiffrées tronquées")
+            remaining -= length
+            batch.append((index, segment, remaining == 0))
+            index += 1
+        yield from thread_map(decrypt, batch, workers)
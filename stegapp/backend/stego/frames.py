@@ -0,0 +1,393 @@
+"""
+Stéganographie dans les images à plusieurs vues : GIF et PNG animés, TIFF
+multipage.
+
+Pillow ne décode que la première image d'un fichier animé ; les suivantes
+étaient perdues. Ici, les images sont parcourues une à une
+(ImageSequence) : le conteneur est réparti sur toutes, et chaque image est
+écrite dans le fichier produit dès qu'elle est modifiée. La mémoire utilisée
+dépend de la taille d'une image, pas de leur nombre.
+
+Disposition : l'en-tête occupe les HEADER_BITS premiers canaux de la
+première image et le corps suit, comme dans une image fixe, puis continue au
+début de chaque image suivante. Chaque image porte un nombre entier d'octets
+du corps (un multiple de ppcm(8, profondeur) bits) : l'extraction relit les
+images une à une. En mode dispersé, chaque image a sa permutation, dérivée
+de l'en-tête et du numéro de l'image.
+
+Un TIFF multipage reste un TIFF (mode et compression sans perte de chaque
+page conservés). Les animations sont écrites en PNG animé (voir
+png.AnimationWriter) : un GIF ne conserve pas les bits de poids faible de
+couleurs modifiées.
+"""
+
+import io
+import math
+import os
+import struct
+from itertools import chain
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+from PIL import Image, ImageSequence, TiffImagePlugin
+
+from .bitbuffer import ByteFeed, unpack_bits
+from .lsb import check_depth, embed_lsb, embed_lsb_chunks, iter_lsb_bytes
+from .payload import (HEADER_BITS, HEADER_SIZE, KDF_SLOT_SIZE, MAGIC, HiddenFile, payload_depth,
+                      payload_scattered, recover_data, stream_payload)
+from .pixels import NATIVE_MODES, decode_pixels, encode_pixels, mode_bands
+from .png import AnimationWriter
+from .scatter import embed_scattered, iter_scattered_bytes, read_scatter_prefix, scatter_permutation
+
+
+# Compressions TIFF sans perte, conservées pour les pages produites
+LOSSLESS_TIFF = {'raw', 'tiff_lzw', 'tiff_adobe_deflate', 'packbits'}
+
+
+def is_multi_frame(image: Image.Image) -> bool:
+    """Indique si une image compte plusieurs vues (animation, pages)."""
+    return getattr(image, 'n_frames', 1) > 1
+
+
+def frame_mode(image: Image.Image) -> str:
+    """
+    Mode dans lequel une vue est traitée.
+
+    Les pages d'un TIFF gardent chacune leur mode natif. Les images d'une
+    animation partagent le mode de la première (un PNG animé n'a qu'un
+    mode) ; les images à palette sont converties en RGB, ou en RGBA si elles
+    ont une couleur transparente.
+    """
+    if image.mode in NATIVE_MODES:
+        return image.mode
+    if image.format != 'TIFF' and ('A' in image.getbands() or 'transparency' in image.info):
+        return 'RGBA'
+    return 'RGB'
+
+
+def frame_bytes(channels: int, start: int, depth: int) -> int:
+    """
+    Nombre d'octets du corps portés par une vue.
+
+    Args:
+        channels: Nombre de canaux de la vue
+        start: Premier canal du corps (HEADER_BITS pour la première vue)
+        depth: Nombre de bits écrits par canal
+
+    Returns:
+        Nombre d'octets, tel que les bits écrits occupent un nombre entier
+        de canaux
+    """
+    unit = math.lcm(8, depth)
+    return max(0, channels - start) * depth // unit * unit // 8
+
+
+def frame_key(prefix: bytes, index: int) -> bytes:
+    """Données de dérivation de la permutation d'une vue (voir scatter_key)."""
+    # La première vue est dispersée comme une image fixe
+    return prefix if not index else prefix + struct.pack('>I', index)
+
+
+def _limit(chunks: Iterable[bytes], count: int) -> Iterator[bytes]:
+    # Tronque un flux d'octets après count octets
+    for chunk in chunks:
+        if len(chunk) >= count:
+            yield chunk[:count]
+            return
+        count -= len(chunk)
+        yield chunk
+
+
+def frames_capacity(channels: Iterable[int], depth: int = 1) -> int:
+    """
+    Capacité en bits hors en-tête d'une suite de vues.
+
+    Args:
+        channels: Nombre de canaux de chaque vue
+        depth: Nombre de bits écrits par canal (1 à 4)
+    """
+    check_depth(depth)
+    capacity = 0
+    for index, count in enumerate(channels):
+        if index == 0 and count < HEADER_BITS:
+            return 0
+        capacity += frame_bytes(count, HEADER_BITS if index == 0 else 0, depth) * 8
+    return capacity
+
+
+def embed_frames(frames: Iterable[np.ndarray], chunks: Iterable[bytes], size: int, password: Optional[str] = None,
+                 depth: int = 1, scatter: bool = False, workers: int = 1) -> None:
+    """
+    Répartit un conteneur sur une suite de vues, en place.
+
+    Toutes les vues sont parcourues, même après la fin du message : un
+    générateur qui écrit chaque vue quand la suivante est demandée produit
+    ainsi le fichier complet.
+
+    Args:
+        frames: Vues à plat (tableaux modifiables), dans l'ordre
+        chunks: Blocs du conteneur (voir stream_payload)
+        size: Taille du conteneur en octets
+        password: Mot de passe (dispersion)
+        depth: Nombre de bits écrits par canal, hors en-tête (1 à 4)
+        scatter: Disperser le corps de chaque vue selon le mot de passe
+        workers: Nombre de threads pour l'insertion dans chaque vue
+    """
+    for _ in iter_embed_frames(frames, chunks, size, password, depth, scatter, workers):
+        pass
+
+
+def iter_embed_frames(frames: Iterable[np.ndarray], chunks: Iterable[bytes], size: int,
+                      password: Optional[str] = None, depth: int = 1, scatter: bool = False,
+                      workers: int = 1) -> Iterator[int]:
+    """
+    Comme embed_frames, en rendant la main après chaque vue : l'appelant
+    peut envoyer ce qui a été écrit avant de demander la vue suivante.
+
+    Yields:
+        Index de chaque vue traitée
+    """
+    feed = ByteFeed(chunks)
+    header = b''.join(feed.take(HEADER_SIZE))
+    # Paramètres de clé d'un corps dispersé : au début de la première vue
+    slot = b''.join(feed.take(KDF_SLOT_SIZE)) if scatter else b''
+    remaining = size - HEADER_SIZE
+    for index, flat in enumerate(frames):
+        if not remaining:
+            yield index
+            continue
+        start = HEADER_BITS
+        if index == 0:
+            embed_lsb(flat, unpack_bits(header))
+        else:
+            start = 0
+        count = min(remaining, frame_bytes(flat.size, start, depth))
+        if scatter:
+            permutation = scatter_permutation(frame_key(header + slot, index), password, flat.size - start, depth,
+                                              slot=index == 0)
+            pieces = chain([slot], feed.take(count - len(slot))) if index == 0 else feed.take(count)
+            embed_scattered(flat, pieces, permutation, start, depth)
+        else:
+            embed_lsb_chunks(flat, feed.take(count), start, depth=depth, workers=workers)
+        remaining -= count
+        yield index
+
+
+def recover_frames(frames: Iterator[np.ndarray], password: Optional[str] = None,
+                   workers: int = 1) -> Union[str, HiddenFile, None]:
+    """
+    Extrait un conteneur réparti sur une suite de vues (voir embed_frames).
+
+    Les vues sont demandées une à une, jusqu'à la fin du message.
+
+    Args:
+        frames: Vues à plat, dans l'ordre
+        password: Mot de passe optionnel pour déchiffrer les données
+        workers: Nombre de threads pour la lecture de chaque vue
+
+    Returns:
+        Texte ou fichier extrait, ou None si aucune donnée n'est trouvée
+    """
+    first = next(frames, None)
+    if first is None or first.size < HEADER_BITS:
+        return None
+    header = np.packbits(first[:HEADER_BITS] & 1).tobytes()
+    if header[:len(MAGIC)] != MAGIC:
+        return None
+    depth = payload_depth(header)
+    prefix = read_scatter_prefix(first, header, depth) if payload_scattered(header) else None
+
+    def chunks() -> Iterator[bytes]:
+        for index, flat in enumerate(chain([first], frames)):
+            start = HEADER_BITS if index == 0 else 0
+            count = frame_bytes(flat.size, start, depth)
+            if prefix is not None:
+                permutation = scatter_permutation(frame_key(prefix, index), password, flat.size - start, depth,
+                                                  slot=index == 0)
+                yield from _limit(iter_scattered_bytes(flat, permutation, start, depth), count)
+            else:
+                yield from iter_lsb_bytes(flat[:start + count * 8 // depth], start, depth=depth, workers=workers)
+
+    return recover_data(chain([header], chunks()), password)
+
+
+class _TiffWriter:
+    """Écriture d'un TIFF multipage, page par page."""
+
+    def __init__(self, stream: BinaryIO):
+        self._writer = TiffImagePlugin.AppendingTiffWriter(stream, new=True)
+
+    def add_frame(self, image: Image.Image, compression: Optional[str] = None) -> None:
+        image.save(self._writer, format='TIFF', compression=compression if compression in LOSSLESS_TIFF else None)
+        self._writer.newFrame()
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+class MultiFrameSteganography:
+    """Stéganographie LSB répartie sur les vues d'une image animée ou multipage."""
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Nombre de threads pour l'insertion et l'extraction
+                dans chaque vue
+        """
+        self.header_bits = HEADER_BITS
+        self.workers = workers or os.cpu_count() or 1
+
+    def hide_data(self, image_path: Union[str, bytes], data: Union[str, bytes], password: Optional[str] = None,
+                  filename: Optional[str] = None, compression: Optional[str] = None,
+                  cipher: Optional[str] = None, bits_per_channel: int = 1, scatter: bool = False) -> bytes:
+        """
+        Cache des données dans les vues d'une image animée ou multipage.
+
+        Args:
+            image_path: Chemin vers l'image ou données d'image
+            data: Texte ou contenu binaire d'un fichier à cacher
+            password: Mot de passe optionnel pour chiffrer les données
+            filename: Nom du fichier d'origine (données binaires)
+            compression: 'zlib', 'lzma', 'bz2', 'auto' ou None
+            cipher: 'fernet' (par défaut), 'aesgcm', 'chacha20' ou 'aesgcm-stream'
+            bits_per_channel: Nombre de bits modifiés par canal (1 à 4)
+            scatter: Disperser les données de chaque vue selon le mot de passe
+
+        Returns:
+            Données de l'image produite : TIFF multipage, ou PNG animé
+        """
+        buffer = io.BytesIO()
+        self._hide(self._open(image_path), buffer, data, password, filename, compression, cipher,
+                   bits_per_channel, scatter)
+        return buffer.getvalue()
+
+    def hide_file(self, image_path: str, output_path: str, data: Union[str, bytes],
+                  password: Optional[str] = None, filename: Optional[str] = None,
+                  compression: Optional[str] = None, cipher: Optional[str] = None,
+                  bits_per_channel: int = 1, scatter: bool = False) -> None:
+        """
+        Cache des données dans une image animée ou multipage, écrite
+        directement dans un fichier.
+
+        Args:
+            image_path: Chemin vers l'image d'origine
+            output_path: Chemin de l'image produite
+            (autres arguments : voir hide_data)
+        """
+        with self._open(image_path) as image, open(output_path, 'w+b') as output:
+            self._hide(image, output, data, password, filename, compression, cipher, bits_per_channel, scatter)
+
+    def extract_data(self, image_path: Union[str, bytes], password: Optional[str] = None) -> Union[str, HiddenFile]:
+        """
+        Extrait des données cachées d'une image animée ou multipage.
+
+        Args:
+            image_path: Chemin vers l'image ou données d'image
+            password: Mot de passe optionnel pour déchiffrer les données
+
+        Returns:
+            Texte extrait, ou HiddenFile (bytes) pour un fichier binaire
+        """
+        data = self.recover(self._open(image_path), password)
+        if data is None:
+            raise ValueError("Aucune donnée cachée trouvée dans l'image")
+        return data
+
+    def recover(self, image: Image.Image, password: Optional[str] = None) -> Union[str, HiddenFile, None]:
+        """
+        Extrait un conteneur des vues d'une image ouverte par Pillow.
+
+        Les vues sont décodées une à une, jusqu'à la fin du message.
+
+        Returns:
+            Texte ou fichier extrait, ou None si aucune donnée n'est trouvée
+        """
+        return recover_frames(self._iter_pixels(image), password, self.workers)
+
+    def get_capacity(self, image_path: Union[str, bytes], bits_per_channel: int = 1) -> int:
+        """
+        Retourne la capacité maximale en bits, sur l'ensemble des vues.
+
+        Args:
+            image_path: Chemin vers l'image ou données d'image
+            bits_per_channel: Nombre de bits modifiés par canal (1 à 4)
+
+        Returns:
+            Capacité en bits
+        """
+        return self.image_capacity(self._open(image_path), bits_per_channel)
+
+    def image_capacity(self, image: Image.Image, bits_per_channel: int = 1) -> int:
+        """
+        Retourne la capacité maximale en bits d'une image déjà ouverte, sans
+        décoder les pixels.
+
+        Args:
+            image: Image animée ou multipage ouverte par Pillow
+            bits_per_channel: Nombre de bits modifiés par canal (1 à 4)
+
+        Returns:
+            Capacité en bits
+        """
+        return frames_capacity(self._frame_channels(image), bits_per_channel)
+
+    def _frame_channels(self, image: Image.Image) -> List[int]:
+        """Nombre de canaux de chaque vue, sans décoder les pixels."""
+        if image.format != 'TIFF':
+            # Les images d'une animation ont toutes la taille du canevas
+            return [image.width * image.height * mode_bands(frame_mode(image))] * image.n_frames
+        channels = []
+        for page in ImageSequence.Iterator(image):
+            channels.append(page.width * page.height * mode_bands(frame_mode(page)))
+        image.seek(0)
+        return channels
+
+    def _iter_pixels(self, image: Image.Image,
+                     write: Optional[Callable[[Image.Image, Image.Image], None]] = None) -> Iterator[np.ndarray]:
+        """
+        Décode les vues une à une, à plat (ordre ligne, pixel, canal).
+
+        Avec write(vue produite, vue d'origine), chaque vue est écrite quand
+        la suivante est demandée : les modifications faites entre-temps sur
+        le tableau produit y sont incluses.
+        """
+        animation_mode = frame_mode(image)
+        for frame in ImageSequence.Iterator(image):
+            mode = frame_mode(frame) if image.format == 'TIFF' else animation_mode
+            pixels = decode_pixels(frame if frame.mode == mode else frame.convert(mode))
+            yield pixels.reshape(-1)
+            if write is not None:
+                write(encode_pixels(pixels, mode), frame)
+
+    def _hide(self, image: Image.Image, stream: BinaryIO, data: Union[str, bytes], password: Optional[str],
+              filename: Optional[str], compression: Optional[str], cipher: Optional[str],
+              bits_per_channel: int, scatter: bool) -> None:
+        capacity = self.image_capacity(image, bits_per_channel)
+        size, chunks = stream_payload(data, password, filename, compression, cipher,
+                                      depth=bits_per_channel, scatter=scatter)
+        if size * 8 - HEADER_BITS > capacity:
+            raise ValueError("Les données sont trop volumineuses pour cette image")
+
+        if image.format == 'TIFF':
+            writer = _TiffWriter(stream)
+
+            def write(output: Image.Image, frame: Image.Image) -> None:
+                writer.add_frame(output, frame.info.get('compression'))
+        else:
+            # Sans bloc NETSCAPE, un GIF n'est lu qu'une fois (0 : en boucle)
+            writer = AnimationWriter(stream, image.n_frames, image.info.get('loop', 1))
+
+            def write(output: Image.Image, frame: Image.Image) -> None:
+                writer.add_frame(output, frame.info.get('duration', 0))
+        embed_frames(self._iter_pixels(image, write), chunks, size, password, bits_per_channel, scatter,
+                     self.workers)
+        writer.close()
+
+    def _open(self, image_path: Union[str, bytes]) -> Image.Image:
+        if isinstance(image_path, str):
+            image = Image.open(image_path)
+        else:
+            image = Image.open(io.BytesIO(image_path))
+        if not is_multi_frame(image):
+            raise ValueError("Image animée ou multipage attendue")
+        return image
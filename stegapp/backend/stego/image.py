@@ -4,79 +4,431 @@ Module de stéganographie pour les images (LSB).
 
 import numpy as np
 from PIL import Image
-from typing import Union, Optional
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple, Union
 import io
-from .utils import text_to_binary, binary_to_text, add_padding, remove_padding, encrypt_data, decrypt_data
+import os
+import re
+from collections import Counter
+from functools import partial
+from itertools import chain
+from .bitbuffer import unpack_bits
+from . import png
+from .bitmap import BitmapSteganography, recover_rows
+from .frames import LOSSLESS_TIFF, MultiFrameSteganography, is_multi_frame
+from .jpeg import JPEGImage
+from .palette import PaletteImage
+from .pixels import NATIVE_MODES, decode_pixels, encode_pixels, mode_bands
+from .lsb import MAX_DEPTH, embed_lsb, embed_lsb_chunks, embed_lsb_stack, iter_lsb_bytes, thread_map
+from .payload import (HEADER_BITS, HEADER_SIZE, SCATTER_PREFIX_SIZE, HiddenFile, payload_depth, payload_scattered,
+                      recover_data, stream_payload)
+from .scatter import embed_scattered, iter_scattered_bytes, read_scatter_prefix, scatter_permutation
+
+
+# Profils de sortie : format Pillow, options d'enregistrement et modes
+# conservés sans perte (None : tous les modes natifs)
+OUTPUT_PROFILES = {
+    'png': ('PNG', {}, None),
+    'fast': ('PNG', {'compress_level': 1}, None),
+    'bmp': ('BMP', {}, {'RGB', 'L'}),
+    'tiff': ('TIFF', {'compression': None}, None),
+    'webp': ('WEBP', {'lossless': True, 'exact': True}, {'RGB', 'RGBA'}),
+    'gif': ('GIF', {'optimize': False}, {'P'}),
+}
+DEFAULT_PROFILE = 'png'
+SAME_AS_INPUT = 'same'
+
+# Type MIME et extension des fichiers produits, par format
+OUTPUT_TYPES = {
+    'PNG': ('image/png', 'png'),
+    'BMP': ('image/bmp', 'bmp'),
+    'TIFF': ('image/tiff', 'tiff'),
+    'WEBP': ('image/webp', 'webp'),
+    'GIF': ('image/gif', 'gif'),
+    'JPEG': ('image/jpeg', 'jpg'),
+}
+
+_PNG_LEVEL = re.compile(r'png:([0-9])')
+
+BATCH_BYTES = 1 << 28  # Taille maximale d'une pile de copies (voir hide_batch)
+
+
+def output_options(profile: Optional[str], mode: str, source: Optional[Image.Image] = None) -> Tuple[str, dict]:
+    """
+    Résout un profil de sortie en format et options d'enregistrement Pillow.
+
+    Args:
+        profile: 'png' (par défaut), 'png:0' à 'png:9' (niveau de compression),
+            'fast', 'bmp', 'tiff' (non compressé), 'webp' (sans perte), 'gif'
+            (images à palette) ou 'same' (format de l'image d'origine s'il
+            peut être écrit sans perte, PNG sinon)
+        mode: Mode de l'image produite
+        source: Image d'origine (profil 'same')
+
+    Returns:
+        (format, options)
+    """
+    profile = profile or DEFAULT_PROFILE
+    if profile == SAME_AS_INPUT:
+        name = (source.format or '').lower() if source is not None else ''
+        modes = OUTPUT_PROFILES.get(name, (None, None, ()))[2]
+        if name not in OUTPUT_PROFILES or (modes is not None and mode not in modes):
+            return output_options(DEFAULT_PROFILE, mode)
+        format, options = output_options(name, mode)
+        # Garder la compression d'un TIFF d'origine si elle est sans perte
+        if format == 'TIFF' and source.info.get('compression') in LOSSLESS_TIFF:
+            options['compression'] = source.info['compression']
+        return format, options
+
+    match = _PNG_LEVEL.fullmatch(profile)
+    if match:
+        return 'PNG', {'compress_level': int(match.group(1))}
+    if profile not in OUTPUT_PROFILES:
+        raise ValueError(f"Profil de sortie non supporté : {profile}")
+    format, options, modes = OUTPUT_PROFILES[profile]
+    if modes is not None and mode not in modes:
+        raise ValueError(f"Le profil {profile} ne conserve pas les images en mode {mode}")
+    return format, dict(options)
+
+
+def output_type(data: Union[bytes, BinaryIO]) -> Tuple[str, str]:
+    """
+    Retourne le type MIME et l'extension d'une image produite par hide_data
+    (données, ou fichier ouvert : seul l'en-tête est lu, puis le fichier est
+    rembobiné).
+    """
+    if hasattr(data, 'read'):
+        format = Image.open(data).format
+        data.seek(0)
+        return OUTPUT_TYPES[format]
+    return OUTPUT_TYPES[Image.open(io.BytesIO(data)).format]
 
 
 class ImageSteganography:
     """Classe pour la stéganographie d'images utilisant LSB."""
     
-    def __init__(self):
-        self.delimiter = "1111111111111110"  # Marqueur de fin
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Nombre de threads pour l'insertion et l'extraction, par
+                bandes de lignes (par défaut : nombre de cœurs)
+        """
+        self.header_bits = HEADER_BITS  # Surcoût de l'en-tête du conteneur
+        self.workers = workers or os.cpu_count() or 1
+        self.bitmap = BitmapSteganography(self.workers)
+        self.frames = MultiFrameSteganography(self.workers)
+    
+    def supports_in_place(self, image_path: Union[str, bytes]) -> bool:
+        """
+        Indique si hide_data modifie l'image en place avec le profil 'same'
+        (BMP ou TIFF non compressé d'une seule vue) : BitmapSteganography.hide_file
+        produit alors le même fichier, sans le charger en mémoire.
+        """
+        if isinstance(image_path, str):
+            image = Image.open(image_path)
+        else:
+            image = Image.open(io.BytesIO(image_path))
+        with image:
+            if is_multi_frame(image):
+                return False
+        return self.bitmap.supports(image_path)
     
-    def hide_data(self, image_path: Union[str, bytes], data: str, password: Optional[str] = None) -> bytes:
+    def hide_data(self, image_path: Union[str, bytes], data: Union[str, bytes], password: Optional[str] = None,
+                  filename: Optional[str] = None, compression: Optional[str] = None,
+                  cipher: Optional[str] = None, bits_per_channel: int = 1,
+                  output: Optional[str] = None, scatter: bool = False) -> bytes:
         """
         Cache des données dans une image en utilisant LSB.
         
+        Avec bits_per_channel > 1, plusieurs bits de poids faible de chaque
+        canal sont modifiés : moins de pixels sont touchés pour un même
+        message. La profondeur est enregistrée dans l'en-tête.
+        
+        Les images à palette (mode P) gardent leur palette : les données sont
+        écrites dans les index (1 bit par pixel, voir palette.py), et
+        ValueError est levée si le message n'y tient pas. Elles ne sont
+        converties en RGB qu'avec bits_per_channel > 1 ou si le profil de
+        sortie ne conserve pas la palette.
+        
+        Les images JPEG séquentielles restent au format JPEG avec le profil
+        par défaut ou 'same' : les données sont écrites dans les coefficients
+        DCT quantifiés (voir jpeg.py), et ValueError est levée si le message
+        n'y tient pas. L'image n'est décodée et convertie qu'avec un autre
+        profil ou avec bits_per_channel > 1.
+        
+        Les images animées (GIF, APNG) et les TIFF multipages sont traités
+        vue par vue avec le profil par défaut ou 'same' (voir
+        MultiFrameSteganography) ; un autre profil n'utilise que la première.
+        
         Args:
             image_path: Chemin vers l'image ou données d'image
-            data: Données à cacher
+            data: Texte ou contenu binaire d'un fichier à cacher
             password: Mot de passe optionnel pour chiffrer les données
+            filename: Nom du fichier d'origine (données binaires)
+            compression: 'zlib', 'lzma', 'bz2', 'auto' ou None
+            cipher: 'fernet' (par défaut), 'aesgcm', 'chacha20' ou 'aesgcm-stream'
+            bits_per_channel: Nombre de bits modifiés par canal (1 à 4)
+            output: Profil de sortie (voir output_options), PNG par défaut ;
+                avec 'same', une image BMP ou TIFF non compressée est modifiée
+                en place (voir BitmapSteganography)
+            scatter: Disperser les données sur l'image selon le mot de passe
+                (voir scatter.py) au lieu de les écrire à partir du premier pixel
         
         Returns:
             Données de l'image modifiée
         """
-        # Charger l'image
+        # Charger l'image (en-tête seulement)
         if isinstance(image_path, str):
             image = Image.open(image_path)
         else:
             image = Image.open(io.BytesIO(image_path))
         
-        # Convertir en RGB si nécessaire
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        # Animations et TIFF multipages : données réparties sur toutes les vues
+        if output in (None, SAME_AS_INPUT) and is_multi_frame(image):
+            return self.frames.hide_data(image_path, data, password, filename, compression, cipher,
+                                         bits_per_channel, scatter)
+        
+        # BMP et TIFF non compressés : pixels modifiés dans le fichier, sans
+        # décodage ni réencodage
+        if output == SAME_AS_INPUT and self.bitmap.supports(image_path):
+            return self.bitmap.hide_data(image_path, data, password, filename, compression, cipher,
+                                         bits_per_channel, scatter)
         
-        # Préparer les données
-        if password:
-            data = encrypt_data(data.encode(), password).decode('latin-1')
+        # Préparer le conteneur (produit par blocs, chiffrés à la demande)
+        size, chunks = stream_payload(data, password, filename, compression, cipher,
+                                      depth=bits_per_channel, scatter=scatter)
         
-        # Convertir en binaire
-        binary_data = text_to_binary(data)
-        binary_data += self.delimiter
+        # Images à palette : insertion dans les index, fichier à palette conservé
+        if image.mode == 'P' and bits_per_channel == 1:
+            result = self._hide_palette(image, size, chunks, password, output, scatter)
+            if result is not None:
+                return result
+        
+        # JPEG : insertion dans les coefficients DCT, fichier JPEG conservé
+        if image.format == 'JPEG' and output in (None, SAME_AS_INPUT) and bits_per_channel == 1:
+            result = self._hide_jpeg(self._open_jpeg(image_path), size, chunks, password, scatter)
+            if result is not None:
+                return result
         
         # Vérifier la capacité
         width, height = image.size
-        capacity = width * height * 3
-        if len(binary_data) > capacity:
+        capacity = self._capacity(width * height * mode_bands(image.mode), bits_per_channel)
+        if size * 8 - HEADER_BITS > capacity:
             raise ValueError("Les données sont trop volumineuses pour cette image")
         
-        # Convertir l'image en tableau numpy
-        img_array = np.array(image)
-        
-        # Masquer les données
-        data_index = 0
-        for row in img_array:
-            for pixel in row:
-                for channel in range(3):  # R, G, B
-                    if data_index < len(binary_data):
-                        # Modifier le LSB
-                        pixel[channel] = (pixel[channel] & 0xFE) | int(binary_data[data_index])
-                        data_index += 1
+        # Résoudre le profil de sortie avant de libérer l'image d'origine
+        output_mode = image.mode if image.mode in NATIVE_MODES else 'RGB'
+        output_format, save_options = output_options(output, output_mode, image)
+        
+        # Décoder les pixels dans leur mode natif et travailler sur une vue à
+        # plat (ordre ligne, pixel, canal)
+        img_array, mode = self._load_pixels(image)
+        flat = img_array.reshape(-1)
+        
+        # L'en-tête est écrit à 1 bit par canal, la suite à la profondeur choisie
+        chunks = iter(chunks)
+        first = next(chunks)
+        embed_lsb(flat, unpack_bits(first[:HEADER_SIZE]))
+        body = chain([first[HEADER_SIZE:]], chunks)
+        if scatter:
+            permutation = scatter_permutation(first[:SCATTER_PREFIX_SIZE], password, flat.size - HEADER_BITS,
+                                              bits_per_channel)
+            embed_scattered(flat, body, permutation, HEADER_BITS, bits_per_channel)
+        else:
+            embed_lsb_chunks(flat, body, HEADER_BITS, depth=bits_per_channel,
+                             workers=self.workers, align=img_array.shape[1] * img_array.shape[2])
+        
+        # Sauvegarder l'image modifiée (dans le mode d'origine)
+        return self._encode(img_array, mode, output_format, save_options)
+    
+    def hide_many(self, image_path: Union[str, bytes], payloads: Sequence[Union[str, bytes]],
+                  password: Optional[str] = None, filename: Optional[str] = None,
+                  compression: Optional[str] = None, cipher: Optional[str] = None, bits_per_channel: int = 1,
+                  output: Optional[str] = None, scatter: bool = False) -> List[bytes]:
+        """
+        Cache chaque message dans une copie de la même image (un message par
+        destinataire, par exemple). L'image modèle n'est décodée qu'une fois
+        (voir hide_batch).
+        
+        Args:
+            image_path: Chemin vers l'image modèle ou données d'image
+            payloads: Textes ou contenus binaires à cacher, un par image produite
+            password, filename, compression, cipher, bits_per_channel, output,
+            scatter: Voir hide_data (communs à tous les messages)
+        
+        Returns:
+            Données des images modifiées, dans l'ordre des messages
+        """
+        return self.hide_batch([image_path] * len(payloads), payloads, password, filename, compression, cipher,
+                               bits_per_channel, output, scatter)
+    
+    def hide_batch(self, images: Sequence[Union[str, bytes]], payloads: Sequence[Union[str, bytes]],
+                   password: Optional[str] = None, filename: Optional[str] = None,
+                   compression: Optional[str] = None, cipher: Optional[str] = None, bits_per_channel: int = 1,
+                   output: Optional[str] = None, scatter: bool = False) -> List[bytes]:
+        """
+        Cache un message dans chacune d'une série d'images de même taille.
+        
+        Chaque image distincte n'est décodée qu'une fois. Les copies à
+        modifier sont empilées dans un tableau (N, hauteur, largeur, canaux),
+        par lots d'au plus BATCH_BYTES octets : les en-têtes, puis les corps
+        de tout un lot sont insérés en une passe vectorisée (voir
+        embed_lsb_stack), et les images du lot sont encodées en parallèle.
+        
+        Chaque image produite est celle que donnerait hide_data. Les images
+        prises en charge par un moteur dédié (animations, BMP et TIFF en
+        place, palettes) passent par hide_data une à une ; un modèle JPEG
+        n'est décodé qu'une fois jusqu'à ses coefficients DCT.
+        
+        Args:
+            images: Chemins vers les images ou données d'image
+            payloads: Textes ou contenus binaires à cacher, un par image
+            password, filename, compression, cipher, bits_per_channel, output,
+            scatter: Voir hide_data (communs à tous les messages)
+        
+        Returns:
+            Données des images modifiées, dans l'ordre des messages
+        """
+        if len(images) != len(payloads):
+            raise ValueError("Le nombre d'images et le nombre de messages diffèrent")
+        results: List[Optional[bytes]] = [None] * len(payloads)
+        opened = {}
+        jpegs = {}
+        # Insertions dans les pixels, regroupées par taille, mode et encodage
+        groups = {}
+        for index, (image_path, data) in enumerate(zip(images, payloads)):
+            image = opened.get(image_path)
+            if image is None:
+                if isinstance(image_path, str):
+                    image = Image.open(image_path)
+                else:
+                    image = Image.open(io.BytesIO(image_path))
+                opened[image_path] = image
+            
+            if ((output in (None, SAME_AS_INPUT) and is_multi_frame(image))
+                    or (output == SAME_AS_INPUT and self.bitmap.supports(image_path))
+                    or (image.mode == 'P' and bits_per_channel == 1)):
+                results[index] = self.hide_data(image_path, data, password, filename, compression, cipher,
+                                                bits_per_channel, output, scatter)
+                continue
+            
+            size, chunks = stream_payload(data, password, filename, compression, cipher,
+                                          depth=bits_per_channel, scatter=scatter)
+            if image.format == 'JPEG' and output in (None, SAME_AS_INPUT) and bits_per_channel == 1:
+                if image_path not in jpegs:
+                    jpegs[image_path] = self._open_jpeg(image_path)
+                template = jpegs[image_path]
+                results[index] = self._hide_jpeg(template and template.copy(), size, chunks, password, scatter)
+                if results[index] is not None:
+                    continue
+            
+            width, height = image.size
+            if size * 8 - HEADER_BITS > self._capacity(width * height * mode_bands(image.mode), bits_per_channel):
+                raise ValueError("Les données sont trop volumineuses pour cette image")
+            output_mode = image.mode if image.mode in NATIVE_MODES else 'RGB'
+            output_format, save_options = output_options(output, output_mode, image)
+            key = (image.size, output_mode, output_format, tuple(sorted(save_options.items())))
+            groups.setdefault(key, []).append((index, image_path, b''.join(chunks)))
+        
+        # Pixels de chaque image décodés une fois, libérés après leur dernière copie
+        pixels = {}
+        uses = Counter(image_path for items in groups.values() for _, image_path, _ in items)
+        
+        def template(image_path: Union[str, bytes]) -> np.ndarray:
+            if image_path not in pixels:
+                pixels[image_path], _ = self._load_pixels(opened[image_path])
+            array = pixels[image_path]
+            uses[image_path] -= 1
+            if not uses[image_path]:
+                del pixels[image_path]
+            return array
+        
+        for ((width, height), mode, output_format, save_options), items in groups.items():
+            save_options = dict(save_options)
+            dtype, bands = NATIVE_MODES[mode]
+            count = max(1, BATCH_BYTES // max(1, width * height * bands * np.dtype(dtype).itemsize))
+            for offset in range(0, len(items), count):
+                batch = items[offset:offset + count]
+                stack = np.stack([template(image_path) for _, image_path, _ in batch])
+                flat = stack.reshape(len(batch), -1)
+                
+                # En-têtes (1 bit par canal), puis corps à la profondeur choisie
+                embed_lsb_stack(flat, [unpack_bits(container[:HEADER_SIZE]) for _, _, container in batch])
+                bodies = []
+                for row, (_, _, container) in enumerate(batch):
+                    if scatter:
+                        permutation = scatter_permutation(container[:SCATTER_PREFIX_SIZE], password,
+                                                          flat.shape[1] - HEADER_BITS, bits_per_channel)
+                        embed_scattered(flat[row], [container[HEADER_SIZE:]], permutation, HEADER_BITS,
+                                        bits_per_channel)
+                        bodies.append(np.zeros(0, dtype=np.uint8))
                     else:
-                        break
-                if data_index >= len(binary_data):
-                    break
-            if data_index >= len(binary_data):
-                break
-        
-        # Sauvegarder l'image modifiée
-        result_image = Image.fromarray(img_array)
-        output = io.BytesIO()
-        result_image.save(output, format='PNG')
-        return output.getvalue()
+                        bodies.append(unpack_bits(container[HEADER_SIZE:]))
+                embed_lsb_stack(flat, bodies, HEADER_BITS, bits_per_channel)
+                
+                encode = partial(self._encode, mode=mode, output_format=output_format, save_options=save_options)
+                encoded = thread_map(encode, stack, self.workers)
+                for (index, _, _), data in zip(batch, encoded):
+                    results[index] = data
+        return results
+    
+    def _encode(self, pixels: np.ndarray, mode: str, output_format: str, save_options: dict) -> bytes:
+        """Encode un tableau de pixels dans le format de sortie."""
+        buffer = io.BytesIO()
+        encode_pixels(pixels, mode).save(buffer, format=output_format, **save_options)
+        return buffer.getvalue()
+    
+    def _hide_palette(self, image: Image.Image, size: int, chunks: Iterable[bytes], password: Optional[str],
+                      output: Optional[str], scatter: bool) -> Optional[bytes]:
+        """
+        Insère un conteneur dans les index d'une image à palette (voir palette.py).
+        
+        Returns:
+            Données de l'image produite, ou None si le profil de sortie ne
+            conserve pas la palette (l'image est alors convertie en RGB)
+        
+        Raises:
+            ValueError: Si les données ne tiennent pas dans les index
+        """
+        try:
+            output_format, save_options = output_options(output, 'P', image)
+        except ValueError:
+            return None
+        carrier = PaletteImage(image)
+        if size * 8 - HEADER_BITS > carrier.capacity:
+            raise ValueError("Les données sont trop volumineuses pour cette image")
+        carrier.embed(chunks, password, scatter)
+        return carrier.save(output_format, save_options)
+    
+    def _open_jpeg(self, image_path: Union[str, bytes]) -> Optional[JPEGImage]:
+        """Lit le flux entropique d'une image JPEG (None si elle n'est pas séquentielle)."""
+        if isinstance(image_path, str):
+            with open(image_path, 'rb') as file:
+                image_path = file.read()
+        try:
+            return JPEGImage(image_path)
+        except ValueError:
+            return None
+    
+    def _hide_jpeg(self, carrier: Optional[JPEGImage], size: int, chunks: Iterable[bytes],
+                   password: Optional[str], scatter: bool) -> Optional[bytes]:
+        """
+        Insère un conteneur dans les coefficients DCT d'une image JPEG (voir jpeg.py).
+        
+        Returns:
+            Données de l'image JPEG produite, ou None si l'image n'est pas un
+            JPEG séquentiel (elle est alors décodée et enregistrée sans perte)
+        
+        Raises:
+            ValueError: Si les données ne tiennent pas dans les coefficients
+        """
+        if carrier is None:
+            return None
+        if size * 8 - HEADER_BITS > carrier.capacity:
+            raise ValueError("Les données sont trop volumineuses pour cette image")
+        carrier.embed(chunks, password, scatter)
+        return carrier.save()
     
-    def extract_data(self, image_path: Union[str, bytes], password: Optional[str] = None) -> str:
+    def extract_data(self, image_path: Union[str, bytes], password: Optional[str] = None) -> Union[str, HiddenFile]:
         """
         Extrait des données cachées d'une image.
         
@@ -85,49 +437,71 @@ class ImageSteganography:
             password: Mot de passe optionnel pour déchiffrer les données
         
         Returns:
-            Données extraites
+            Texte extrait, ou HiddenFile (bytes) pour un fichier binaire
         """
-        # Charger l'image
         if isinstance(image_path, str):
-            image = Image.open(image_path)
+            source = open(image_path, 'rb')
         else:
-            image = Image.open(io.BytesIO(image_path))
+            source = io.BytesIO(image_path)
         
-        # Convertir en RGB si nécessaire
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
+        with source:
+            image = Image.open(source)
+            multi_frame = is_multi_frame(image)
+            source.seek(0)
+            # PNG : décoder les lignes à la demande, jusqu'à la fin du message
+            info = None if multi_frame else png.read_info(source)
+            if multi_frame:
+                # Animations et TIFF multipages : vues décodées une à une
+                data = self.frames.recover(image, password)
+            elif info is not None:
+                # Corps dispersé : image entière décodée par Pillow
+                data = recover_rows(png.iter_rows(source, info), password, lambda: png.read_pixels(source, info))
+            elif image.format == 'JPEG':
+                # JPEG : coefficients DCT lus dans le flux entropique
+                source.seek(0)
+                data = JPEGImage(source.read()).recover(password)
+            elif self.bitmap.supports(image_path):
+                # BMP et TIFF non compressés : lecture directe des pixels
+                return self.bitmap.extract_data(image_path, password)
+            else:
+                data = self._extract_pixels(image, password)
         
-        # Convertir l'image en tableau numpy
-        img_array = np.array(image)
-        
-        # Extraire les bits LSB
-        binary_data = ""
-        for row in img_array:
-            for pixel in row:
-                for channel in range(3):  # R, G, B
-                    binary_data += str(pixel[channel] & 1)
-        
-        # Trouver la fin des données
-        delimiter_index = binary_data.find(self.delimiter)
-        if delimiter_index == -1:
+        if data is None:
             raise ValueError("Aucune donnée cachée trouvée dans l'image")
         
-        # Extraire les données
-        data_binary = binary_data[:delimiter_index]
-        data = binary_to_text(data_binary)
+        return data
+    
+    def _extract_pixels(self, image: Image.Image, password: Optional[str]) -> Union[str, HiddenFile, None]:
+        """Extrait les données d'une image entièrement décodée par Pillow."""
+        if image.mode == 'P':
+            return PaletteImage(image, sort=False).recover(password)
         
-        # Déchiffrer si nécessaire
-        if password:
-            data = decrypt_data(data.encode('latin-1'), password).decode()
+        img_array, _ = self._load_pixels(image)
         
-        return data
+        # Extraire les LSB par blocs : seuls l'en-tête et le corps annoncé sont
+        # lus, le corps à la profondeur annoncée par l'en-tête
+        flat = img_array.reshape(-1)
+        header = np.packbits(flat[:HEADER_BITS] & 1).tobytes()
+        depth = payload_depth(header)
+        if payload_scattered(header):
+            prefix = read_scatter_prefix(flat, header, depth)
+            permutation = scatter_permutation(prefix, password, flat.size - HEADER_BITS, depth)
+            chunks = iter_scattered_bytes(flat, permutation, HEADER_BITS, depth)
+        else:
+            chunks = iter_lsb_bytes(flat, HEADER_BITS, depth=depth, workers=self.workers,
+                                    align=img_array.shape[1] * img_array.shape[2])
+        return recover_data(chain([header], chunks), password)
     
-    def get_capacity(self, image_path: Union[str, bytes]) -> int:
+    def get_capacity(self, image_path: Union[str, bytes], bits_per_channel: int = 1) -> int:
         """
-        Retourne la capacité maximale en bits pour une image.
+        Retourne la capacité maximale en bits pour une image (sur l'ensemble
+        des vues d'une image animée ou multipage, dans les index d'une image
+        à palette et dans les coefficients DCT d'un JPEG séquentiel, gardés
+        dans leur format).
         
         Args:
             image_path: Chemin vers l'image ou données d'image
+            bits_per_channel: Nombre de bits modifiés par canal (1 à 4)
         
         Returns:
             Capacité en bits
@@ -137,5 +511,39 @@ class ImageSteganography:
         else:
             image = Image.open(io.BytesIO(image_path))
         
+        if is_multi_frame(image):
+            return self.frames.image_capacity(image, bits_per_channel)
+        
+        # Image à palette : un bit par index utilisable (voir hide_data)
+        if image.mode == 'P' and bits_per_channel == 1:
+            return PaletteImage(image).capacity
+        
+        # JPEG séquentiel : capacité des coefficients DCT (voir hide_data)
+        if image.format == 'JPEG' and bits_per_channel == 1:
+            carrier = self._open_jpeg(image_path)
+            if carrier is not None:
+                return carrier.capacity
+        
         width, height = image.size
-        return width * height * 3 - len(self.delimiter)  # Moins la taille du délimiteur
+        return self._capacity(width * height * mode_bands(image.mode), bits_per_channel)
+    
+    def _load_pixels(self, image: Image.Image) -> Tuple[np.ndarray, str]:
+        """
+        Décode les pixels d'une image dans son mode natif (voir NATIVE_MODES).
+        
+        Returns:
+            (tableau des pixels, mode)
+        """
+        # Les modes non pris en charge sont convertis en RGB
+        if image.mode not in NATIVE_MODES:
+            image = image.convert('RGB')
+        pixels = decode_pixels(image)
+        # Libérer le tampon de Pillow : seul le tableau est utilisé ensuite
+        image.close()
+        return pixels, image.mode
+    
+    def _capacity(self, channels: int, bits_per_channel: int) -> int:
+        """Capacité en bits hors en-tête (l'en-tête occupe 1 bit par canal)."""
+        if not 1 <= bits_per_channel <= MAX_DEPTH:
+            raise ValueError(f"Le nombre de bits par canal doit être compris entre 1 et {MAX_DEPTH}")
+        return max(0, channels - self.header_bits) * bits_per_channel
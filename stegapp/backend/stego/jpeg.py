@@ -0,0 +1,361 @@
+"""
+Stéganographie dans les coefficients DCT quantifiés des images JPEG.
+
+Cacher des données dans les pixels d'une photo JPEG oblige à l'enregistrer
+sans perte : un fichier de 2 Mo devient un PNG de 15 à 20 Mo. Ici, les
+données sont écrites dans les coefficients AC quantifiés (à la manière de
+JSteg), sans décodage des pixels ni transformée DCT.
+
+Le flux entropique (Huffman, JPEG séquentiel) est décodé en Python : chaque
+coefficient AC non nul y est codé par un symbole (zéros précédents,
+catégorie) suivi de « catégorie » bits de magnitude. Seuls les coefficients
+de valeur absolue au moins 2 portent des données, dans le dernier de ces
+bits : changer ce bit fait passer |v| de 2k à 2k + 1 sans changer de
+catégorie. Les symboles, donc les codes de Huffman, restent identiques ; le
+flux est réécrit tel quel, bits de magnitude modifiés compris, et le fichier
+produit a la taille de l'original (à l'échappement des octets 0xFF près).
+
+Les coefficients de valeur ±1 (qui deviendraient nuls) et les coefficients
+DC ne sont pas utilisés. Les JPEG progressifs ou à codage arithmétique ne
+sont pas pris en charge.
+"""
+
+import copy
+import io
+import struct
+from array import array
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .bitbuffer import unpack_bits
+from .bitmap import recover_rows
+from .lsb import embed_lsb, embed_lsb_chunks
+from .payload import HEADER_BITS, HEADER_SIZE, SCATTER_PREFIX_SIZE, HiddenFile
+from .scatter import embed_scattered, scatter_permutation
+
+
+BATCH_SIZE = 1 << 16  # Coefficients décodés avant de rendre la main (extraction)
+
+_SOI, _EOI, _SOS, _DHT, _DRI = 0xD8, 0xD9, 0xDA, 0xC4, 0xDD
+_SEQUENTIAL = {0xC0, 0xC1}  # SOF0 (baseline), SOF1 (séquentiel étendu, Huffman)
+_OTHER_SOF = {0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_RST = range(0xD0, 0xD8)
+_STANDALONE = set(_RST) | {0x01}  # Marqueurs sans longueur
+
+
+def huffman_lookup(counts: bytes, symbols: bytes, ac: bool) -> List[int]:
+    """
+    Construit la table de décodage d'une table de Huffman (segment DHT).
+
+    La table est indexée par les 16 prochains bits du flux. Chaque entrée
+    code, pour le symbole qui commence le flux, le nombre de bits à avancer
+    (code et bits de magnitude) << 16, le pas dans le bloc (coefficients
+    parcourus, 0 pour une fin de bloc) << 8 et la catégorie. Une entrée
+    nulle désigne un code absent de la table.
+
+    Args:
+        counts: Nombre de codes de chaque longueur (16 octets)
+        symbols: Symboles, dans l'ordre des codes
+        ac: Table AC (symboles zéros/catégorie) ou DC (catégorie)
+
+    Returns:
+        Table de 65536 entrées
+    """
+    lookup = [0] * 65536
+    code = 0
+    index = 0
+    for length in range(1, 17):
+        for _ in range(counts[length - 1]):
+            symbol = symbols[index]
+            index += 1
+            size = symbol & 15 if ac else symbol
+            if not ac:
+                step = 1
+            elif size:
+                step = (symbol >> 4) + 1
+            else:
+                step = 16 if symbol == 0xF0 else 0
+            first = code << (16 - length)
+            last = (code + 1) << (16 - length)
+            if last > 65536:
+                raise ValueError("Table de Huffman invalide")
+            lookup[first:last] = [(length + size) << 16 | step << 8 | size] * (last - first)
+            code += 1
+        code <<= 1
+    return lookup
+
+
+def _ceil_div(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def _destuff(data: np.ndarray) -> np.ndarray:
+    """Retire les octets nuls insérés après chaque 0xFF du flux entropique."""
+    return np.delete(data, np.flatnonzero((data[:-1] == 0xFF) & (data[1:] == 0)) + 1)
+
+
+def _stuff(data: np.ndarray) -> bytes:
+    """Insère un octet nul après chaque 0xFF du flux entropique."""
+    return np.insert(data, np.flatnonzero(data == 0xFF) + 1, 0).tobytes()
+
+
+class _Scan:
+    """Balayage séquentiel : blocs d'une MCU et segments entre marqueurs RST."""
+
+    def __init__(self, units: List[Tuple[List[int], List[int]]], count: int, restart: int):
+        self.units = units      # Tables (DC, AC) de chaque bloc d'une MCU
+        self.count = count      # Nombre de MCU
+        self.restart = restart  # MCU entre deux marqueurs RST (0 : aucun)
+        self.segments: List[Tuple[int, int, bytes]] = []  # (début, fin, marqueur suivant)
+
+
+class JPEGImage:
+    """Flux entropique d'une image JPEG séquentielle, prêt pour l'insertion."""
+
+    def __init__(self, data: bytes):
+        """
+        Args:
+            data: Fichier JPEG (séquentiel, codage de Huffman)
+        """
+        if data[:2] != b'\xff\xd8':
+            raise ValueError("Fichier JPEG invalide")
+        self.parts: List[Union[bytes, _Scan]] = []  # Segments recopiés ou balayages
+        entropy = []
+        offset = 0  # Taille du flux entropique déjà lu (octets)
+        tables = {}
+        components = {}
+        mcus = None
+        restart = 0
+        position = 2
+        start = 0
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        while True:
+            if position + 2 > len(data) or data[position] != 0xFF:
+                raise ValueError("Fichier JPEG tronqué ou corrompu")
+            marker = data[position + 1]
+            if marker == 0xFF:  # Octet de remplissage
+                position += 1
+                continue
+            if marker == _EOI:
+                break
+            if marker == _SOI or marker in _STANDALONE:
+                position += 2
+                continue
+            if position + 4 > len(data):
+                raise ValueError("Fichier JPEG tronqué ou corrompu")
+            (length,) = struct.unpack_from('>H', data, position + 2)
+            segment = data[position + 4:position + 2 + length]
+            position += 2 + length
+            if marker == _DHT:
+                self._read_tables(segment, tables)
+            elif marker == _DRI:
+                (restart,) = struct.unpack_from('>H', segment)
+            elif marker in _OTHER_SOF:
+                raise ValueError("Seuls les JPEG séquentiels à codage de Huffman sont pris en charge")
+            elif marker in _SEQUENTIAL:
+                components, mcus = self._read_frame(segment)
+            elif marker == _SOS:
+                if mcus is None:
+                    raise ValueError("Fichier JPEG invalide : balayage avant l'en-tête d'image")
+                scan = self._read_scan(segment, tables, components, mcus, restart)
+                self.parts.append(data[start:position])
+                # Flux entropique : segments séparés par les marqueurs RST
+                candidates = np.flatnonzero((buffer[position:-1] == 0xFF) & (buffer[position + 1:] != 0) &
+                                            (buffer[position + 1:] != 0xFF)) + position
+                segment_start = position
+                for candidate in candidates:
+                    end = int(candidate)
+                    while end > segment_start and data[end - 1] == 0xFF:  # Remplissage
+                        end -= 1
+                    chunk = _destuff(buffer[segment_start:end])
+                    entropy.append(chunk)
+                    is_restart = data[candidate + 1] in _RST
+                    marker_bytes = data[end:candidate + 2] if is_restart else b''
+                    scan.segments.append((offset, offset + chunk.size, marker_bytes))
+                    offset += chunk.size
+                    if not is_restart:
+                        position = end
+                        break
+                    segment_start = int(candidate) + 2
+                else:
+                    raise ValueError("Fichier JPEG tronqué ou corrompu")
+                self.parts.append(scan)
+                start = position
+        self.parts.append(data[start:])
+        self.data = np.concatenate(entropy) if entropy else np.zeros(0, dtype=np.uint8)
+        self._positions: Optional[np.ndarray] = None
+
+    @staticmethod
+    def _read_tables(segment: bytes, tables: dict) -> None:
+        offset = 0
+        while offset < len(segment):
+            kind, index = segment[offset] >> 4, segment[offset] & 15
+            counts = segment[offset + 1:offset + 17]
+            total = sum(counts)
+            symbols = segment[offset + 17:offset + 17 + total]
+            tables[kind, index] = huffman_lookup(counts, symbols, bool(kind))
+            offset += 17 + total
+
+    @staticmethod
+    def _read_frame(segment: bytes) -> Tuple[dict, Tuple[int, int]]:
+        # Composantes : facteurs d'échantillonnage ; nombre de MCU en largeur
+        # et en hauteur pour un balayage entrelacé
+        _, height, width, count = struct.unpack_from('>BHHB', segment)
+        components = {}
+        for index in range(count):
+            identifier, sampling = segment[6 + 3 * index], segment[7 + 3 * index]
+            components[identifier] = (sampling >> 4, sampling & 15)
+        h_max = max(h for h, _ in components.values())
+        v_max = max(v for _, v in components.values())
+        for identifier, (h, v) in components.items():
+            # Blocs de la composante dans un balayage non entrelacé
+            components[identifier] = (h, v, _ceil_div(_ceil_div(width * h, h_max), 8),
+                                      _ceil_div(_ceil_div(height * v, v_max), 8))
+        return components, (_ceil_div(width, 8 * h_max), _ceil_div(height, 8 * v_max))
+
+    @staticmethod
+    def _read_scan(segment: bytes, tables: dict, components: dict, mcus: Tuple[int, int],
+                   restart: int) -> _Scan:
+        count = segment[0]
+        selectors = [(segment[1 + 2 * index], segment[2 + 2 * index]) for index in range(count)]
+        spectral = segment[1 + 2 * count:4 + 2 * count]
+        if tuple(spectral) != (0, 63, 0):
+            raise ValueError("Seuls les JPEG séquentiels à codage de Huffman sont pris en charge")
+        units = []
+        try:
+            for identifier, selector in selectors:
+                h, v, blocks_x, blocks_y = components[identifier]
+                pair = (tables[0, selector >> 4], tables[1, selector & 15])
+                units.extend([pair] * (h * v if count > 1 else 1))
+        except KeyError:
+            raise ValueError("Fichier JPEG invalide : composante ou table de Huffman absente")
+        # Balayage non entrelacé : une MCU par bloc de la composante
+        total = mcus[0] * mcus[1] if count > 1 else blocks_x * blocks_y
+        return _Scan(units, total, restart)
+
+    def iter_positions(self) -> Iterator[np.ndarray]:
+        """
+        Décode le flux entropique et produit, par lots, la position (en bits
+        dans self.data) du dernier bit de magnitude de chaque coefficient AC
+        de valeur absolue au moins 2.
+
+        Le décodage est paresseux : un lecteur qui s'arrête tôt ne fait pas
+        décoder la suite de l'image.
+        """
+        padded = np.zeros(self.data.size + 3, dtype=np.uint32)
+        padded[:self.data.size] = self.data
+        # Fenêtre de 24 bits à chaque octet : les 16 bits suivant une position
+        # s'en extraient par un décalage
+        windows = memoryview(padded[:-2] << 16 | padded[1:-1] << 8 | padded[2:])
+        found = array('q')
+        append = found.append
+        for part in self.parts:
+            if not isinstance(part, _Scan):
+                continue
+            segment = 0
+            start, end, _ = part.segments[0]
+            position = start * 8
+            units = part.units
+            for mcu in range(part.count):
+                if part.restart and mcu and mcu % part.restart == 0:
+                    segment += 1
+                    if position > end * 8 or segment == len(part.segments):
+                        raise ValueError("Flux JPEG tronqué ou corrompu")
+                    start, end, _ = part.segments[segment]
+                    position = start * 8
+                for dc, ac in units:
+                    entry = dc[(windows[position >> 3] >> (8 - (position & 7))) & 0xFFFF]
+                    if not entry:
+                        raise ValueError("Flux JPEG corrompu")
+                    position += entry >> 16
+                    index = 1
+                    while index < 64:
+                        entry = ac[(windows[position >> 3] >> (8 - (position & 7))) & 0xFFFF]
+                        if not entry:
+                            raise ValueError("Flux JPEG corrompu")
+                        position += entry >> 16
+                        if entry & 14:  # Catégorie au moins 2
+                            append(position - 1)
+                        step = (entry >> 8) & 0xFF
+                        if not step:
+                            break
+                        index += step
+                if len(found) >= BATCH_SIZE:
+                    yield np.frombuffer(found, dtype=np.int64).copy()
+                    found = array('q')
+                    append = found.append
+            if position > end * 8:
+                raise ValueError("Flux JPEG tronqué ou corrompu")
+        if found:
+            yield np.frombuffer(found, dtype=np.int64).copy()
+
+    def copy(self) -> 'JPEGImage':
+        """Copie à modifier : seul le flux entropique est dupliqué, le décodage est partagé."""
+        # Décoder la table des positions avant la copie : sinon chaque copie
+        # décoderait le flux de Huffman pour son propre compte
+        self._decode_positions()
+        clone = copy.copy(self)
+        clone.data = self.data.copy()
+        return clone
+
+    @property
+    def positions(self) -> np.ndarray:
+        """Positions de tous les bits porteurs (voir iter_positions)."""
+        return self._decode_positions()
+
+    def _decode_positions(self) -> np.ndarray:
+        # Table décodée une fois, partagée par les copies
+        if self._positions is None:
+            self._positions = np.concatenate(list(self.iter_positions()) or [np.zeros(0, dtype=np.int64)])
+        return self._positions
+
+    def _bits(self, positions: np.ndarray) -> np.ndarray:
+        return (self.data[positions >> 3] >> (7 - (positions & 7)).astype(np.uint8)) & 1
+
+    @property
+    def capacity(self) -> int:
+        """Capacité en bits hors en-tête."""
+        return max(0, self.positions.size - HEADER_BITS)
+
+    def embed(self, chunks: Iterable[bytes], password: Optional[str] = None, scatter: bool = False) -> None:
+        """
+        Insère un conteneur dans les bits porteurs du flux entropique, en place.
+
+        Args:
+            chunks: Blocs du conteneur (voir stream_payload, profondeur 1)
+            password: Mot de passe (dispersion)
+            scatter: Disperser le corps selon le mot de passe
+        """
+        positions = self.positions
+        original = self._bits(positions)
+        carrier = original.copy()
+        chunks = iter(chunks)
+        first = next(chunks)
+        embed_lsb(carrier, unpack_bits(first[:HEADER_SIZE]))
+        body = chain([first[HEADER_SIZE:]], chunks)
+        if scatter:
+            permutation = scatter_permutation(first[:SCATTER_PREFIX_SIZE], password, carrier.size - HEADER_BITS)
+            embed_scattered(carrier, body, permutation, HEADER_BITS)
+        else:
+            embed_lsb_chunks(carrier, body, HEADER_BITS)
+        changed = positions[carrier != original]
+        np.bitwise_xor.at(self.data, changed >> 3, (0x80 >> (changed & 7)).astype(np.uint8))
+
+    def recover(self, password: Optional[str] = None) -> Union[str, HiddenFile, None]:
+        """Extrait un conteneur du flux entropique (None si aucun n'est trouvé)."""
+        return recover_rows((self._bits(positions) for positions in self.iter_positions()), password)
+
+    def save(self) -> bytes:
+        """Réécrit le fichier JPEG, flux entropique modifié compris."""
+        output = io.BytesIO()
+        for part in self.parts:
+            if isinstance(part, _Scan):
+                for start, end, marker in part.segments:
+                    output.write(_stuff(self.data[start:end]))
+                    output.write(marker)
+            else:
+                output.write(part)
+        return output.getvalue()
+
@@ -0,0 +1,191 @@
+"""
+Dérivation de clés à partir d'un mot de passe (scrypt ou PBKDF2), avec
+cache LRU borné des clés dérivées.
+
+Un sel aléatoire, tiré pour chaque conteneur, est enregistré avec lui. La
+dérivation coûte volontairement plusieurs dizaines de millisecondes : à
+l'extraction, le cache évite de la refaire lorsqu'un même client relit
+plusieurs fois un support dans un worker.
+"""
+
+import hashlib
+import hmac
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+KDF_SCRYPT = 1
+KDF_PBKDF2 = 2
+
+KEY_SIZE = 32
+SALT_SIZE = 16
+KEY_CHECK_SIZE = 4
+CACHE_SIZE = 128
+
+# Coûts maximaux acceptés à la lecture d'un en-tête : un support forgé ne
+# doit pas pouvoir imposer des minutes de calcul à l'extraction
+MAX_LOG_N = 20
+MAX_R = 16
+MAX_P = 4
+MAX_ITERATIONS = 1_000_000
+
+_SCRYPT = struct.Struct('>BBBB')  # algorithme, log2(n), r, p
+_PBKDF2 = struct.Struct('>BI')    # algorithme, itérations
+
+
+class KDFParams:
+    """Algorithme et paramètres de coût d'une dérivation de clé."""
+
+    __slots__ = ('algorithm', 'n', 'r', 'p', 'iterations')
+
+    def __init__(self, algorithm: int = KDF_SCRYPT, n: int = 1 << 14, r: int = 8, p: int = 1,
+                 iterations: int = 200_000):
+        if algorithm == KDF_SCRYPT and (n < 2 or n & (n - 1)):
+            raise ValueError("Le paramètre n de scrypt doit être une puissance de 2")
+        if algorithm not in (KDF_SCRYPT, KDF_PBKDF2):
+            raise ValueError(f"Algorithme de dérivation inconnu : {algorithm}")
+        self.algorithm = algorithm
+        self.n = n
+        self.r = r
+        self.p = p
+        self.iterations = iterations
+
+    @classmethod
+    def scrypt(cls, n: int = 1 << 14, r: int = 8, p: int = 1) -> 'KDFParams':
+        return cls(KDF_SCRYPT, n=n, r=r, p=p)
+
+    @classmethod
+    def pbkdf2(cls, iterations: int = 200_000) -> 'KDFParams':
+        return cls(KDF_PBKDF2, iterations=iterations)
+
+    def encode(self) -> bytes:
+        """Sérialise les paramètres pour l'en-tête du conteneur."""
+        if self.algorithm == KDF_SCRYPT:
+            return _SCRYPT.pack(KDF_SCRYPT, self.n.bit_length() - 1, self.r, self.p)
+        return _PBKDF2.pack(KDF_PBKDF2, self.iterations)
+
+    @classmethod
+    def decode(cls, data: bytes) -> Tuple['KDFParams', bytes]:
+        """
+        Relit des paramètres sérialisés.
+
+        Returns:
+            Les paramètres et les octets restants (le sel)
+
+        Raises:
+            ValueError: Paramètres inconnus ou coût hors des bornes MAX_*
+        """
+        if data[:1] == bytes([KDF_SCRYPT]) and len(data) >= _SCRYPT.size:
+            _, log_n, r, p = _SCRYPT.unpack_from(data)
+            if 1 <= log_n <= MAX_LOG_N and 1 <= r <= MAX_R and 1 <= p <= MAX_P:
+                return cls.scrypt(1 << log_n, r, p), data[_SCRYPT.size:]
+        if data[:1] == bytes([KDF_PBKDF2]) and len(data) >= _PBKDF2.size:
+            _, iterations = _PBKDF2.unpack_from(data)
+            if 1 <= iterations <= MAX_ITERATIONS:
+                return cls.pbkdf2(iterations), data[_PBKDF2.size:]
+        raise ValueError("Paramètres de dérivation de clé invalides")
+
+
+DEFAULT_PARAMS = KDFParams.scrypt()
+
+_lock = threading.Lock()
+_keys: 'OrderedDict[Tuple[bytes, bytes, bytes], bytes]' = OrderedDict()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _derive(password: str, salt: bytes, params: KDFParams) -> bytes:
+    if params.algorithm == KDF_SCRYPT:
+        maxmem = 128 * params.r * (params.n + params.p + 2) + (1 << 20)
+        return hashlib.scrypt(password.encode(), salt=salt, n=params.n, r=params.r, p=params.p,
+                              maxmem=maxmem, dklen=KEY_SIZE)
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, params.iterations, KEY_SIZE)
+
+
+def _remember(cache: OrderedDict, key, value) -> None:
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _cache_key(password: str, salt: bytes, params: KDFParams) -> Tuple[bytes, bytes, bytes]:
+    # Le cache ne conserve jamais le mot de passe en clair
+    return hashlib.sha256(password.encode()).digest(), salt, params.encode()
+
+
+def derive_key(password: str, salt: bytes, params: KDFParams = DEFAULT_PARAMS) -> bytes:
+    """
+    Dérive une clé de KEY_SIZE octets, en passant par le cache.
+
+    Args:
+        password: Mot de passe
+        salt: Sel enregistré avec le conteneur
+        params: Algorithme et paramètres de coût
+
+    Returns:
+        Clé dérivée
+    """
+    cache_key = _cache_key(password, salt, params)
+    with _lock:
+        key = _keys.get(cache_key)
+        if key is not None:
+            _keys.move_to_end(cache_key)
+            _stats['hits'] += 1
+            return key
+        _stats['misses'] += 1
+
+    key = _derive(password, salt, params)
+    with _lock:
+        _remember(_keys, cache_key, key)
+    return key
+
+
+def new_key(password: str, params: KDFParams = DEFAULT_PARAMS) -> Tuple[bytes, bytes]:
+    """
+    Retourne un sel et la clé correspondante pour chiffrer un nouveau conteneur.
+
+    Le sel est tiré pour chaque conteneur : deux supports chiffrés avec le
+    même mot de passe n'ont ni la même clé ni la même valeur de contrôle, et
+    ne peuvent pas être rapprochés. La clé entre dans le cache : la clé de
+    dispersion, tirée du même sel (voir scatter_key), ne coûte pas une
+    seconde dérivation.
+
+    Returns:
+        (sel, clé)
+    """
+    salt = os.urandom(SALT_SIZE)
+    key = _derive(password, salt, params)
+    with _lock:
+        _remember(_keys, _cache_key(password, salt, params), key)
+    return salt, key
+
+
+def key_check_value(key: bytes) -> bytes:
+    """
+    Valeur de contrôle d'une clé, enregistrée en clair dans l'en-tête.
+
+    Calculée par HMAC : elle ne révèle rien de la clé mais permet de rejeter
+    un mauvais mot de passe sans lire ni déchiffrer le corps du conteneur.
+    """
+    return hmac.new(key, b'stegapp key check', hashlib.sha256).digest()[:KEY_CHECK_SIZE]
+
+
+def legacy_key(password: str) -> bytes:
+    """Clé des conteneurs sans paramètres de dérivation (SHA-256 du mot de passe)."""
+    return hashlib.sha256(password.encode()).digest()
+
+
+def cache_info() -> Dict[str, int]:
+    """Retourne les compteurs du cache de clés dérivées."""
+    with _lock:
+        return {'hits': _stats['hits'], 'misses': _stats['misses'], 'size': len(_keys), 'maxsize': CACHE_SIZE}
+
+
+def clear_cache() -> None:
+    """Vide le cache et remet les compteurs à zéro."""
+    with _lock:
+        _keys.clear()
+        _stats['hits'] = 0
+        _stats['misses'] = 0
@@ -0,0 +1,317 @@
+"""
+Primitives LSB vectorisées communes aux moteurs de stéganographie.
+
+Les opérations sur de grands supports peuvent être réparties en bandes
+(lignes entières) sur un pool de threads : les opérations bit à bit de
+NumPy libèrent le GIL.
+"""
+
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .bitbuffer import unpack_bits
+
+
+MAX_DEPTH = 4  # Nombre maximal de bits modifiés par élément
+MIN_BAND = 1 << 18  # Taille minimale d'une bande (éléments) avant de paralléliser
+
+_pools: Dict[int, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def _executor(workers: int) -> ThreadPoolExecutor:
+    # Un pool par nombre de threads, partagé par toutes les requêtes du processus
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='lsb')
+        return pool
+
+
+def band_edges(start: int, stop: int, align: int = 1, workers: int = 1) -> List[Tuple[int, int]]:
+    """
+    Découpe l'intervalle d'éléments [start, stop) en bandes pour workers threads.
+
+    Les limites intérieures tombent à un multiple de align éléments après
+    start (une ligne de l'image, par exemple) ; les bandes comptent environ
+    MIN_BAND éléments au moins, à l'alignement près.
+
+    Returns:
+        Liste de couples (début, fin)
+    """
+    count = stop - start
+    workers = min(workers, count // MIN_BAND)
+    if workers <= 1:
+        return [(start, stop)]
+
+    size = -(-count // workers)
+    edges = [start]
+    for index in range(1, workers):
+        edge = start + index * size // align * align
+        if edges[-1] < edge < stop:
+            edges.append(edge)
+    edges.append(stop)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _run_bands(func: Callable[[int, int], object], start: int, stop: int, align: int,
+               workers: int) -> List:
+    bands = band_edges(start, stop, align, workers)
+    if len(bands) == 1:
+        return [func(*bands[0])]
+    return list(_executor(workers).map(lambda band: func(*band), bands))
+
+
+def thread_map(func: Callable, items: Iterable, workers: int = 1) -> List:
+    """Applique func à chaque élément sur le pool partagé de workers threads (résultats dans l'ordre)."""
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    return list(_executor(workers).map(func, items))
+
+
+def check_depth(depth: int) -> None:
+    """Vérifie un nombre de bits par élément (1 à MAX_DEPTH), ValueError sinon."""
+    if not 1 <= depth <= MAX_DEPTH:
+        raise ValueError(f"Le nombre de bits par élément doit être compris entre 1 et {MAX_DEPTH}")
+
+
+def bits_to_values(bits: np.ndarray, depth: int) -> np.ndarray:
+    """
+    Regroupe un tableau de bits en valeurs de depth bits (bit de poids fort
+    en premier), la dernière complétée par des zéros.
+    """
+    count = -(-bits.size // depth)
+    padded = np.zeros(-(-bits.size // (8 * depth)) * 8 * depth, dtype=np.uint8)
+    padded[:bits.size] = bits
+    data = np.packbits(padded)
+    mask = (1 << depth) - 1
+    if 8 % depth == 0:
+        # Chaque octet contient 8/k valeurs de k bits
+        shifts = np.arange(8 - depth, -1, -depth, dtype=np.uint8)
+        return ((data[:, None] >> shifts) & np.uint8(mask)).reshape(-1)[:count]
+
+    # Sinon, k octets forment 8 valeurs de k bits : passer par un entier de 8k bits
+    groups = data.reshape(-1, depth).astype(np.uint32)
+    accumulator = np.zeros(groups.shape[0], dtype=np.uint32)
+    for index in range(depth):
+        accumulator |= groups[:, index] << np.uint32(8 * (depth - 1 - index))
+    shifts = np.arange(7, -1, -1, dtype=np.uint32) * np.uint32(depth)
+    values = (accumulator[:, None] >> shifts) & np.uint32(mask)
+    return values.reshape(-1)[:count].astype(np.uint8)
+
+
+def _values_to_bytes(values: np.ndarray, depth: int) -> bytes:
+    # Opération inverse de bits_to_values (values : multiple de 8 éléments)
+    values = values.astype(np.uint8, copy=False)
+    if 8 % depth == 0:
+        groups = values.reshape(-1, 8 // depth)
+        data = np.zeros(groups.shape[0], dtype=np.uint8)
+        for index in range(8 // depth):
+            data |= groups[:, index] << np.uint8(8 - depth * (index + 1))
+        return data.tobytes()
+
+    groups = values.reshape(-1, 8).astype(np.uint32)
+    accumulator = np.zeros(groups.shape[0], dtype=np.uint32)
+    for index in range(8):
+        accumulator |= groups[:, index] << np.uint32(depth * (7 - index))
+    shifts = np.arange(depth - 1, -1, -1, dtype=np.uint32) * np.uint32(8)
+    return ((accumulator[:, None] >> shifts) & np.uint32(0xFF)).astype(np.uint8).tobytes()
+
+
+def embed_lsb(flat: np.ndarray, bits: np.ndarray, start: int = 0, depth: int = 1,
+              workers: int = 1, align: int = 1) -> None:
+    """
+    Écrit une suite de bits dans les bits de poids faible d'un tableau plat, en place.
+
+    Args:
+        flat: Tableau 1D modifiable (échantillons ou canaux de pixels)
+        bits: Tableau de bits (0 ou 1)
+        start: Index du premier élément à modifier
+        depth: Nombre de bits de poids faible écrits par élément (1 à 4) ; le
+            dernier élément est complété par des zéros
+        workers: Nombre de threads (bandes traitées en parallèle)
+        align: Alignement des limites de bandes, en éléments (voir band_edges)
+    """
+    check_depth(depth)
+    end = start + -(-bits.size // depth)
+    if end > flat.size:
+        raise ValueError("Les données sont trop volumineuses pour ce support")
+
+    def embed_band(first: int, last: int) -> None:
+        band = bits[(first - start) * depth:(last - start) * depth]
+        if depth > 1:
+            # Regrouper les bits par élément, bit de poids fort en premier
+            band = bits_to_values(band, depth)
+        # Masque ~(2^depth - 1) exprimé dans le type du support (0xFE, 0xFFFC, ...)
+        clear_mask = np.array(-(1 << depth)).astype(flat.dtype)
+        target = flat[first:last]
+        np.bitwise_and(target, clear_mask, out=target)
+        np.bitwise_or(target, band.astype(flat.dtype, copy=False), out=target)
+
+    _run_bands(embed_band, start, end, align, workers)
+
+
+def embed_lsb_stack(stack: np.ndarray, bits: Sequence[np.ndarray], start: int = 0, depth: int = 1) -> None:
+    """
+    Écrit une suite de bits différente dans chaque ligne d'un tableau 2D, en
+    place et en une seule passe vectorisée.
+
+    Chaque ligne est un support à plat (copies d'une même image, par
+    exemple) ; les lignes plus courtes que la plus longue suite ne sont pas
+    modifiées au-delà de leurs propres bits.
+
+    Args:
+        stack: Tableau 2D modifiable (supports, éléments)
+        bits: Tableau de bits (0 ou 1) de chaque ligne, éventuellement vide
+        start: Index du premier élément à modifier dans chaque ligne
+        depth: Nombre de bits de poids faible écrits par élément (1 à 4)
+    """
+    check_depth(depth)
+    values = [bits_to_values(row, depth) if depth > 1 else row for row in bits]
+    width = max((row.size for row in values), default=0)
+    if start + width > stack.shape[1]:
+        raise ValueError("Les données sont trop volumineuses pour ce support")
+    if not width:
+        return
+
+    block = np.zeros((len(values), width), dtype=stack.dtype)
+    # Masque ~(2^depth - 1) sur les éléments écrits, tous les bits ailleurs
+    clear = np.full((len(values), width), np.array(-1).astype(stack.dtype))
+    clear_mask = np.array(-(1 << depth)).astype(stack.dtype)
+    for index, row in enumerate(values):
+        block[index, :row.size] = row
+        clear[index, :row.size] = clear_mask
+    target = stack[:, start:start + width]
+    np.bitwise_and(target, clear, out=target)
+    np.bitwise_or(target, block, out=target)
+
+
+def lsb_bytes(values: np.ndarray, depth: int) -> bytes:
+    """Regroupe en octets les depth bits de poids faible d'éléments (multiple de 8 éléments)."""
+    values = values & ((1 << depth) - 1)
+    if depth == 1:
+        return np.packbits(values).tobytes()
+    return _values_to_bytes(values, depth)
+
+
+def iter_lsb_bytes(flat: np.ndarray, start: int = 0, first_chunk: int = 4096,
+                   max_chunk: int = 1 << 22, depth: int = 1, workers: int = 1,
+                   align: int = 1) -> Iterator[bytes]:
+    """
+    Lit les bits de poids faible d'un tableau plat par blocs, regroupés en octets.
+
+    La taille des blocs double à chaque itération (jusqu'à max_chunk éléments) :
+    un petit message n'est lu que sur quelques milliers d'éléments, un gros
+    message ne multiplie pas les itérations Python.
+
+    Args:
+        flat: Tableau 1D (échantillons ou canaux de pixels)
+        start: Index du premier élément à lire
+        first_chunk: Taille du premier bloc en éléments (multiple de 8)
+        max_chunk: Taille maximale d'un bloc en éléments (multiple de 8)
+        depth: Nombre de bits de poids faible lus par élément (1 à 4)
+        workers: Nombre de threads (bandes d'un même bloc lues en parallèle)
+        align: Alignement des limites de bandes, en éléments (voir band_edges)
+
+    Yields:
+        Octets reconstruits à partir des bits de poids faible
+    """
+    check_depth(depth)
+    # Chaque bande doit produire des octets entiers : 8 éléments au moins
+    align = math.lcm(align, 8)
+
+    def read_band(first: int, last: int) -> bytes:
+        return lsb_bytes(flat[first:last], depth)
+
+    end = start + (flat.size - start) // 8 * 8
+    chunk = first_chunk
+    position = start
+    while position < end:
+        stop = min(position + chunk, end)
+        yield b''.join(_run_bands(read_band, position, stop, align, workers))
+        position = stop
+        chunk = min(chunk * 2, max_chunk)
+
+
+def iter_lsb_stream(arrays: Iterable[np.ndarray], depth: int = 1) -> Iterator[bytes]:
+    """
+    Lit les bits de poids faible d'une suite de tableaux (lignes d'une image
+    décodées à la demande, par exemple), regroupés en octets.
+
+    Les tableaux ne sont demandés qu'au fur et à mesure de la lecture : un
+    lecteur qui s'arrête tôt ne fait pas décoder la suite du support.
+
+    Args:
+        arrays: Tableaux 1D d'éléments, dans l'ordre du support
+        depth: Nombre de bits de poids faible lus par élément (1 à 4)
+
+    Yields:
+        Octets reconstruits à partir des bits de poids faible
+    """
+    check_depth(depth)
+    pending = None  # Éléments restants (moins de 8) du tableau précédent
+    for array in arrays:
+        if pending is not None and pending.size:
+            array = np.concatenate([pending, array])
+        usable = array.size // 8 * 8
+        if usable:
+            yield lsb_bytes(array[:usable], depth)
+        pending = array[usable:]
+
+
+def read_until(chunks: Iterable[bytes], marker: bytes) -> Optional[bytes]:
+    """
+    Consomme des blocs d'octets jusqu'à trouver un marqueur de fin.
+
+    La lecture s'arrête dès que le marqueur apparaît : les blocs suivants ne
+    sont jamais demandés au générateur.
+
+    Returns:
+        Les octets précédant le marqueur, ou None s'il est absent
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        # Le marqueur peut chevaucher deux blocs
+        search_from = max(0, len(buffer) - len(marker) + 1)
+        buffer += chunk
+        index = buffer.find(marker, search_from)
+        if index != -1:
+            return bytes(buffer[:index])
+    return None
+
+
+def embed_lsb_chunks(flat: np.ndarray, chunks: Iterable[bytes], start: int = 0,
+                     max_chunk: int = 1 << 20, depth: int = 1, workers: int = 1,
+                     align: int = 1) -> int:
+    """
+    Écrit une suite de blocs d'octets dans les LSB d'un tableau plat, en place.
+
+    Les blocs sont consommés au fur et à mesure et découpés en tranches de
+    max_chunk octets : le tableau de bits intermédiaire reste borné, quelle
+    que soit la taille des données. Avec depth > 1, les bits d'un élément
+    peuvent provenir de deux blocs successifs.
+
+    Returns:
+        Index du premier élément non modifié
+    """
+    position = start
+    pending = np.zeros(0, dtype=np.uint8)  # Bits restants d'un élément incomplet
+    for chunk in chunks:
+        view = memoryview(chunk)
+        for offset in range(0, len(view), max_chunk):
+            bits = unpack_bits(view[offset:offset + max_chunk])
+            if pending.size:
+                bits = np.concatenate([pending, bits])
+            usable = bits.size - bits.size % depth
+            embed_lsb(flat, bits[:usable], position, depth, workers, align)
+            position += usable // depth
+            pending = bits[usable:]
+    if pending.size:
+        embed_lsb(flat, pending, position, depth)
+        position += 1
+    return position
@@ -0,0 +1,187 @@
+"""
+Stéganographie dans les index des images à palette (mode P : PNG, GIF).
+
+Convertir une image à palette en RGB multiplie la taille du fichier produit
+par 3 ou 4. Ici, les données sont écrites dans le bit de poids faible des
+index : l'image reste en 8 bits (ou moins) avec sa palette, et le fichier
+produit a sensiblement la taille de l'original.
+
+Changer le bit de poids faible d'un index fait passer un pixel de la
+couleur 2k à la couleur 2k + 1. La palette est donc d'abord réordonnée en
+chaîne de plus proches voisins : les couleurs de chaque paire sont proches
+et la modification reste peu visible. Les pixels dont la paire associe deux
+opacités différentes (couleur transparente de GIF, tRNS de PNG) ne sont pas
+utilisés ; ils se déduisent de la palette et de index // 2, que l'insertion
+ne modifie pas. Les couleurs inutilisées sont retirées de la palette.
+"""
+
+import io
+from itertools import chain
+from typing import Iterable, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from .bitbuffer import unpack_bits
+from .lsb import embed_lsb, embed_lsb_chunks, iter_lsb_bytes
+from .payload import HEADER_BITS, HEADER_SIZE, SCATTER_PREFIX_SIZE, HiddenFile, payload_scattered, recover_data
+from .scatter import embed_scattered, iter_scattered_bytes, read_scatter_prefix, scatter_permutation
+
+
+# Poids des écarts de couleur (approximation de la sensibilité de l'œil :
+# vert, puis bleu, puis rouge) et de l'opacité
+_WEIGHTS = np.array([2.0, 4.0, 3.0, 8.0])
+
+
+def sort_palette(colors: np.ndarray, alpha: np.ndarray) -> np.ndarray:
+    """
+    Ordonne une palette en chaîne de plus proches voisins.
+
+    La chaîne part de la couleur la plus sombre et rejoint à chaque étape la
+    couleur restante la plus proche : deux index voisins désignent des
+    couleurs proches.
+
+    Args:
+        colors: Couleurs (n, 3)
+        alpha: Opacité de chaque couleur (n,)
+
+    Returns:
+        Anciens index, dans le nouvel ordre
+    """
+    points = np.column_stack([colors, alpha]).astype(np.float64) * np.sqrt(_WEIGHTS)
+    remaining = np.ones(len(points), dtype=bool)
+    order = np.empty(len(points), dtype=np.intp)
+    current = int(np.argmin(points[:, :3].sum(axis=1) - points[:, 3]))
+    for step in range(len(points)):
+        order[step] = current
+        remaining[current] = False
+        if step + 1 < len(points):
+            distances = ((points - points[current]) ** 2).sum(axis=1)
+            distances[~remaining] = np.inf
+            current = int(np.argmin(distances))
+    return order
+
+
+class PaletteImage:
+    """Index et palette d'une image en mode P, prêts pour l'insertion."""
+
+    def __init__(self, image: Image.Image, sort: bool = True):
+        """
+        Args:
+            image: Image en mode P (seule la première image d'un GIF animé
+                est utilisée)
+            sort: Réordonner la palette (insertion) ; à l'extraction, la
+                palette de l'image est utilisée telle quelle
+        """
+        self.format = image.format
+        self.indices = np.array(image)
+        colors = np.frombuffer(bytes(image.getpalette('RGB') or b''), dtype=np.uint8).reshape(-1, 3)
+        alpha = np.full(len(colors), 255, dtype=np.uint8)
+        if image.palette is not None and image.palette.mode == 'RGBA':
+            alpha = np.frombuffer(bytes(image.getpalette('RGBA')), dtype=np.uint8)[3::4].copy()
+        transparency = image.info.get('transparency')
+        if isinstance(transparency, int) and transparency < len(alpha):
+            alpha[transparency] = 0
+        elif isinstance(transparency, bytes):
+            count = min(len(transparency), len(alpha))
+            alpha[:count] = np.frombuffer(transparency[:count], dtype=np.uint8)
+
+        if sort and self.indices.size:
+            # Seules les couleurs utilisées sont gardées (une couleur de
+            # remplissage, noire dans un GIF, pourrait former une paire avec
+            # une couleur utilisée)
+            used = np.flatnonzero(np.bincount(self.indices.reshape(-1), minlength=len(colors))[:len(colors)])
+            order = used[sort_palette(colors[used], alpha[used])]
+            lookup = np.zeros(len(colors), dtype=np.uint8)
+            lookup[order] = np.arange(len(order))
+            if len(order) % 2:
+                # Nombre pair de couleurs : la dernière paire associe deux copies
+                order = np.append(order, order[-1])
+            self.indices = lookup[self.indices]
+            colors, alpha = colors[order], alpha[order]
+        self.colors = colors
+        self.alpha = alpha
+
+    @property
+    def usable(self) -> np.ndarray:
+        """Masque (à plat) des pixels dont l'index peut changer de parité."""
+        count = len(self.alpha)
+        partner = np.arange(count) ^ 1
+        paired = np.zeros(count, dtype=bool)
+        valid = partner < count
+        paired[valid] = self.alpha[valid] == self.alpha[partner[valid]]
+        return paired[np.minimum(self.indices.reshape(-1), count - 1)] if count else np.zeros(0, dtype=bool)
+
+    @property
+    def capacity(self) -> int:
+        """Capacité en bits hors en-tête."""
+        return max(0, int(np.count_nonzero(self.usable)) - HEADER_BITS)
+
+    def _carrier(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        # Index utilisables, à plat ; copie seulement si certains sont exclus
+        usable = self.usable
+        flat = self.indices.reshape(-1)
+        if usable.all():
+            return flat, None
+        return flat[usable], usable
+
+    def embed(self, chunks: Iterable[bytes], password: Optional[str] = None, scatter: bool = False) -> None:
+        """
+        Insère un conteneur dans le bit de poids faible des index, en place.
+
+        Args:
+            chunks: Blocs du conteneur (voir stream_payload, profondeur 1)
+            password: Mot de passe (dispersion)
+            scatter: Disperser le corps selon le mot de passe
+        """
+        carrier, usable = self._carrier()
+        chunks = iter(chunks)
+        first = next(chunks)
+        embed_lsb(carrier, unpack_bits(first[:HEADER_SIZE]))
+        body = chain([first[HEADER_SIZE:]], chunks)
+        if scatter:
+            permutation = scatter_permutation(first[:SCATTER_PREFIX_SIZE], password, carrier.size - HEADER_BITS)
+            embed_scattered(carrier, body, permutation, HEADER_BITS)
+        else:
+            embed_lsb_chunks(carrier, body, HEADER_BITS)
+        if usable is not None:
+            self.indices.reshape(-1)[usable] = carrier
+
+    def recover(self, password: Optional[str] = None) -> Union[str, HiddenFile, None]:
+        """Extrait un conteneur des index (None si aucun n'est trouvé)."""
+        carrier, _ = self._carrier()
+        header = np.packbits(carrier[:HEADER_BITS] & 1).tobytes()
+        if payload_scattered(header):
+            prefix = read_scatter_prefix(carrier, header)
+            permutation = scatter_permutation(prefix, password, carrier.size - HEADER_BITS)
+            chunks = chain([header], iter_scattered_bytes(carrier, permutation, HEADER_BITS))
+        else:
+            chunks = iter_lsb_bytes(carrier)
+        return recover_data(chunks, password)
+
+    def save(self, format: str, options: Optional[dict] = None) -> bytes:
+        """
+        Enregistre l'image à palette.
+
+        Args:
+            format: Format Pillow (PNG, GIF, TIFF...)
+            options: Options d'enregistrement
+
+        Returns:
+            Données de l'image
+        """
+        height, width = self.indices.shape
+        image = Image.frombuffer('P', (width, height), np.ascontiguousarray(self.indices), 'raw', 'P', 0, 1)
+        image.putpalette(self.colors.tobytes(), 'RGB')
+        options = dict(options or {})
+        transparent = np.flatnonzero(self.alpha != 255)
+        if transparent.size == 1 and self.alpha[transparent[0]] == 0:
+            options['transparency'] = int(transparent[0])
+        elif transparent.size:
+            if format == 'GIF':
+                raise ValueError("Le format GIF ne conserve pas la transparence partielle de cette palette")
+            options['transparency'] = self.alpha[:transparent[-1] + 1].tobytes()
+        buffer = io.BytesIO()
+        image.save(buffer, format=format, **options)
+        return buffer.getvalue()
+
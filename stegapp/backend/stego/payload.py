@@ -0,0 +1,481 @@
+"""
+Format de conteneur des données cachées, commun aux moteurs LSB.
+
+Structure (octets, gros-boutiste) :
+
+    magic       3   b'STG'
+    version     1   version du format
+    flags       1   options (FLAG_*) ; bits 4-5 : profondeur d'insertion - 1
+    ext_len     2   taille des champs d'extension
+    length      4   taille du corps
+    crc32       4   CRC32 des extensions et du corps (des extensions seules
+                    en chiffrement segmenté, authentifié segment par segment)
+    kdf        24   corps dispersé seulement : paramètres de dérivation de
+                    clé et sel (voir KDFParams.encode), complétés par des zéros
+    extensions      champs TLV (type 1 octet, taille 2 octets, valeur)
+    corps           données (éventuellement chiffrées)
+
+L'en-tête est toujours inséré à 1 bit par élément au début du support ; la
+suite l'est à la profondeur qu'il annonce (voir payload_depth), à la suite
+de l'en-tête ou dispersée selon le mot de passe (FLAG_SCATTERED). Dans un
+conteneur dispersé, les paramètres de clé restent à la suite de l'en-tête :
+la clé de dispersion est tirée de la clé dérivée (voir scatter.scatter_key).
+
+L'extraction lit l'en-tête de taille fixe, puis exactement le nombre
+d'octets annoncés : le reste du support n'est jamais parcouru. Les supports
+de l'ancien format (texte terminé par le marqueur 0xFFFE) restent lisibles.
+"""
+
+import hmac
+import io
+import os
+import re
+import struct
+import zlib
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .bitbuffer import BitReader, BitWriter
+from .compression import compress_data, decompress_data
+from .crypto import (
+    CIPHER_AES_GCM_STREAM,
+    CIPHER_FERNET,
+    STREAM_SEGMENT_SIZE,
+    PasswordError,
+    cipher_id,
+    decrypt_payload,
+    encrypt_payload,
+    stream_decrypt,
+    stream_encrypt,
+    stream_encrypted_size,
+)
+from .kdf import DEFAULT_PARAMS, SALT_SIZE, KDFParams, derive_key, key_check_value, legacy_key, new_key
+from .lsb import MAX_DEPTH, read_until
+from .utils import decode_text
+
+MAGIC = b'STG'
+FORMAT_VERSION = 1
+
+FLAG_COMPRESSED = 0x01
+FLAG_ENCRYPTED = 0x02
+FLAG_FILE = 0x04  # Fichier binaire (sinon texte UTF-8)
+FLAG_SCATTERED = 0x08  # Corps dispersé sur le support (voir scatter.py)
+DEPTH_SHIFT = 4   # Profondeur d'insertion (1 à 4 bits par élément), bits 4-5
+DEPTH_MASK = 0x30
+
+# Champs d'extension
+FIELD_FILENAME = 0x01  # Nom du fichier d'origine (UTF-8)
+FIELD_SIZE = 0x02      # Taille des données d'origine (8 octets)
+FIELD_COMPRESSION = 0x03  # Algorithme de compression (COMPRESSION_*)
+FIELD_CIPHER = 0x04       # Algorithme de chiffrement (CIPHER_*, Fernet si absent)
+FIELD_KDF = 0x05          # Paramètres de dérivation de clé et sel (SHA-256 si absent)
+FIELD_KEY_CHECK = 0x06    # Valeur de contrôle de la clé (voir kdf.key_check_value)
+FIELD_SEGMENT_SIZE = 0x07  # Taille des segments du chiffrement segmenté (4 octets)
+
+# Threads de (dé)chiffrement des segments
+STREAM_WORKERS = min(4, os.cpu_count() or 1)
+
+# Marqueur de fin de l'ancien format ("1111111111111110")
+LEGACY_DELIMITER = b'\xff\xfe'
+_LEGACY_CONTROL_CHARS = re.compile(rb'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+
+_HEADER = struct.Struct('>3sBBHII')
+_FIELD = struct.Struct('>BH')
+
+HEADER_SIZE = _HEADER.size
+HEADER_BITS = HEADER_SIZE * 8
+
+# Paramètres de clé et sel d'un conteneur dispersé, non dispersés
+KDF_SLOT_SIZE = 24
+SCATTER_PREFIX_SIZE = HEADER_SIZE + KDF_SLOT_SIZE
+
+
+class HiddenFile(bytes):
+    """Fichier binaire extrait d'un support, avec ses métadonnées."""
+
+    filename: Optional[str]
+
+    def __new__(cls, data: bytes, filename: Optional[str] = None):
+        instance = super().__new__(cls, data)
+        instance.filename = filename
+        return instance
+
+    @property
+    def size(self) -> int:
+        return len(self)
+
+
+class Payload:
+    """Contenu d'un conteneur extrait d'un support."""
+
+    def __init__(self, body: bytes, flags: int = 0, fields: Optional[Dict[int, bytes]] = None,
+                 legacy: bool = False, decrypted: bool = False):
+        self.body = body
+        self.flags = flags
+        self.fields = fields or {}
+        self.legacy = legacy
+        self.decrypted = decrypted  # Corps déjà déchiffré pendant la lecture
+
+    @property
+    def streamed(self) -> bool:
+        """Corps chiffré par segments (voir crypto.stream_encrypt)."""
+        return bool(self.flags & FLAG_ENCRYPTED) and _cipher(self.fields) == CIPHER_AES_GCM_STREAM
+
+
+def _cipher(fields: Dict[int, bytes]) -> int:
+    return fields.get(FIELD_CIPHER, bytes([CIPHER_FERNET]))[0]
+
+
+def _segment_size(fields: Dict[int, bytes]) -> int:
+    (size,) = struct.unpack('>I', fields[FIELD_SEGMENT_SIZE])
+    return size
+
+
+def _pack_fields(fields: Dict[int, bytes]) -> bytes:
+    return b''.join(_FIELD.pack(tag, len(value)) + value for tag, value in sorted(fields.items()))
+
+
+def _unpack_fields(data: bytes) -> Dict[int, bytes]:
+    fields = {}
+    offset = 0
+    while offset < len(data):
+        tag, size = _FIELD.unpack_from(data, offset)
+        offset += _FIELD.size
+        fields[tag] = data[offset:offset + size]
+        offset += size
+    return fields
+
+
+def pack_payload(body: bytes, flags: int = 0, fields: Optional[Dict[int, bytes]] = None) -> bytes:
+    """
+    Construit un conteneur (en-tête + extensions + corps).
+
+    Args:
+        body: Corps du conteneur
+        flags: Options FLAG_*
+        fields: Champs d'extension {type: valeur} ; avec FLAG_SCATTERED,
+            FIELD_KDF est placé à la suite de l'en-tête
+
+    Returns:
+        Octets du conteneur
+    """
+    extensions = _pack_extensions(flags, fields or {})
+    writer = _write_header(flags, extensions, len(body), zlib.crc32(body, zlib.crc32(extensions)))
+    writer.write_bytes(body)
+    return writer.getvalue()
+
+
+def _write_header(flags: int, extensions: bytes, length: int, crc: int) -> BitWriter:
+    # En-tête (champs de _HEADER, relus par read_payload) suivi des extensions
+    writer = BitWriter(MAGIC)
+    writer.write_uint(FORMAT_VERSION, 8)
+    writer.write_uint(flags, 8)
+    writer.write_uint(len(extensions) - _slot_size(flags), 16)
+    writer.write_uint(length, 32)
+    writer.write_uint(crc, 32)
+    writer.write_bytes(extensions)
+    return writer
+
+
+def _slot_size(flags: int) -> int:
+    return KDF_SLOT_SIZE if flags & FLAG_SCATTERED else 0
+
+
+def _pack_extensions(flags: int, fields: Dict[int, bytes]) -> bytes:
+    # Conteneur dispersé : paramètres de clé et sel avant les champs TLV
+    if not flags & FLAG_SCATTERED:
+        return _pack_fields(fields)
+    fields = dict(fields)
+    return fields.pop(FIELD_KDF).ljust(KDF_SLOT_SIZE, b'\0') + _pack_fields(fields)
+
+
+def payload_depth(header: bytes) -> int:
+    """
+    Retourne la profondeur d'insertion annoncée par un en-tête.
+
+    Args:
+        header: Les HEADER_SIZE premiers octets extraits (à 1 bit par élément)
+
+    Returns:
+        Nombre de bits par élément du support (1 pour l'ancien format)
+    """
+    if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        return 1
+    return ((header[4] & DEPTH_MASK) >> DEPTH_SHIFT) + 1
+
+
+def payload_scattered(header: bytes) -> bool:
+    """Indique si un en-tête annonce un corps dispersé sur le support."""
+    return len(header) >= HEADER_SIZE and header[:len(MAGIC)] == MAGIC and bool(header[4] & FLAG_SCATTERED)
+
+
+def payload_size(header: bytes) -> int:
+    """
+    Retourne la taille du conteneur annoncée par un en-tête.
+
+    Args:
+        header: Les HEADER_SIZE premiers octets extraits
+
+    Returns:
+        Taille en octets, en-tête compris (0 sans en-tête valide)
+    """
+    if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        return 0
+    _, _, flags, ext_len, length, _ = _HEADER.unpack(header[:HEADER_SIZE])
+    return HEADER_SIZE + _slot_size(flags) + ext_len + length
+
+
+def read_payload(chunks: Iterable[bytes], password: Optional[str] = None) -> Optional[Payload]:
+    """
+    Lit un conteneur depuis un flux d'octets extraits d'un support.
+
+    Seuls l'en-tête et le nombre d'octets annoncés sont consommés. Si l'en-tête
+    est absent, le flux est relu selon l'ancien format à marqueur de fin.
+
+    Pour un conteneur chiffré, le mot de passe est vérifié dès la lecture des
+    extensions : un mauvais mot de passe lève PasswordError avant que le corps
+    ne soit lu.
+
+    Args:
+        chunks: Blocs d'octets extraits (LSB regroupés en octets)
+        password: Mot de passe à vérifier (optionnel)
+
+    Returns:
+        Le contenu extrait, ou None si aucune donnée n'est trouvée
+    """
+    reader = BitReader(chunks)
+    header = reader.read_bytes(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or header[:len(MAGIC)] != MAGIC:
+        return _read_legacy(chain([header], reader.remaining()))
+
+    _, version, flags, ext_len, length, crc = _HEADER.unpack(header)
+    if version > FORMAT_VERSION:
+        raise ValueError(f"Version de format non supportée : {version}")
+
+    extensions = reader.read_bytes(_slot_size(flags) + ext_len)
+    if len(extensions) < _slot_size(flags) + ext_len:
+        return None
+    if flags & FLAG_SCATTERED:
+        fields = _scattered_fields(extensions)
+    else:
+        fields = _unpack_fields(extensions)
+    if password is not None:
+        _check_password(flags, fields, password)
+
+    payload = Payload(b'', flags, fields)
+    if payload.streamed:
+        if zlib.crc32(extensions) != crc:
+            raise ValueError("Données cachées corrompues (CRC invalide)")
+        if password:
+            # Déchiffrer les segments au fil de leur extraction du support
+            key = _payload_key(fields, password)
+            segments = stream_decrypt(reader.read_bytes, key, length, _segment_size(fields), STREAM_WORKERS)
+            payload.body = b''.join(segments)
+            payload.decrypted = True
+            return payload
+
+    body = reader.read_bytes(length)
+    if len(body) < length:
+        return None
+    if not payload.streamed and zlib.crc32(body, zlib.crc32(extensions)) != crc:
+        raise ValueError("Données cachées corrompues (CRC invalide)")
+
+    payload.body = body
+    return payload
+
+
+def _scattered_fields(extensions: bytes) -> Dict[int, bytes]:
+    """
+    Relit les paramètres de clé et les extensions d'un conteneur dispersé.
+
+    Un conteneur dispersé est toujours chiffré : des extensions illisibles,
+    ou sans valeur de contrôle, ont été lues aux positions d'un autre mot de
+    passe (chaque essai coûte une dérivation de clé, voir scatter_key).
+    """
+    params, salt = KDFParams.decode(extensions[:KDF_SLOT_SIZE])
+    try:
+        fields = _unpack_fields(extensions[KDF_SLOT_SIZE:])
+    except struct.error:
+        raise PasswordError("Mot de passe incorrect")
+    if FIELD_KEY_CHECK not in fields:
+        raise PasswordError("Mot de passe incorrect")
+    fields[FIELD_KDF] = params.encode() + salt[:SALT_SIZE]
+    return fields
+
+
+def _check_password(flags: int, fields: Dict[int, bytes], password: Optional[str]) -> None:
+    """Vérifie le mot de passe d'un conteneur à l'aide de sa valeur de contrôle."""
+    if not flags & FLAG_ENCRYPTED:
+        return
+    if not password:
+        raise PasswordError("Les données sont chiffrées : mot de passe requis", 'password_required')
+    if FIELD_KEY_CHECK in fields:
+        expected = key_check_value(_payload_key(fields, password))
+        if not hmac.compare_digest(expected, fields[FIELD_KEY_CHECK]):
+            raise PasswordError("Mot de passe incorrect")
+
+
+def _read_legacy(chunks: Iterable[bytes]) -> Optional[Payload]:
+    """Lit un support de l'ancien format (données suivies de LEGACY_DELIMITER)."""
+    body = read_until(chunks, LEGACY_DELIMITER)
+    # L'ancien format ne contenait que du texte (ou un jeton Fernet) : des
+    # caractères de contrôle signalent un marqueur trouvé par hasard
+    if body is None or _LEGACY_CONTROL_CHARS.search(body):
+        return None
+    return Payload(body, legacy=True)
+
+
+def stream_payload(data: Union[str, bytes], password: Optional[str] = None,
+                   filename: Optional[str] = None, compression: Optional[str] = None,
+                   cipher: Optional[str] = None, kdf: KDFParams = DEFAULT_PARAMS,
+                   segment_size: int = STREAM_SEGMENT_SIZE, depth: int = 1,
+                   scatter: bool = False) -> Tuple[int, Iterator[bytes]]:
+    """
+    Prépare les données à cacher sous forme de conteneur, produit par blocs.
+
+    Les étapes sont appliquées dans l'ordre : compression, puis chiffrement.
+    En chiffrement segmenté ('aesgcm-stream'), les segments sont chiffrés à
+    mesure que le moteur consomme les blocs.
+
+    Args:
+        data: Texte ou contenu binaire d'un fichier à cacher
+        password: Mot de passe optionnel pour chiffrer les données
+        filename: Nom du fichier d'origine (données binaires)
+        compression: 'zlib', 'lzma', 'bz2', 'auto' ou None (voir compress_data)
+        cipher: 'fernet' (par défaut), 'aesgcm', 'chacha20' ou 'aesgcm-stream'
+        kdf: Paramètres de dérivation de la clé
+        segment_size: Taille des segments en chiffrement segmenté
+        depth: Profondeur d'insertion annoncée dans l'en-tête (1 à 4)
+        scatter: Annoncer un corps dispersé sur le support (mot de passe requis)
+
+    Returns:
+        Taille totale du conteneur et itérateur sur ses blocs d'octets (le
+        premier contient au moins l'en-tête)
+    """
+    if not 1 <= depth <= MAX_DEPTH:
+        raise ValueError(f"Profondeur d'insertion non supportée : {depth}")
+    if scatter and not password:
+        raise ValueError("La dispersion des données nécessite un mot de passe")
+    flags = (depth - 1) << DEPTH_SHIFT
+    if scatter:
+        flags |= FLAG_SCATTERED
+    fields = {}
+    if isinstance(data, str):
+        body = data.encode('utf-8')
+    else:
+        body = data
+        flags |= FLAG_FILE
+        if filename:
+            fields[FIELD_FILENAME] = filename.encode('utf-8')
+
+    algorithm, compressed = compress_data(body, compression)
+    if algorithm:
+        flags |= FLAG_COMPRESSED
+        fields[FIELD_COMPRESSION] = bytes([algorithm])
+    if algorithm or flags & FLAG_FILE:
+        fields[FIELD_SIZE] = struct.pack('>Q', len(body))
+    body = compressed
+
+    if not password:
+        container = pack_payload(body, flags, fields)
+        return len(container), iter([container])
+
+    algorithm = cipher_id(cipher)
+    salt, key = new_key(password, kdf)
+    flags |= FLAG_ENCRYPTED
+    fields[FIELD_KDF] = kdf.encode() + salt
+    fields[FIELD_KEY_CHECK] = key_check_value(key)
+    if algorithm != CIPHER_FERNET:
+        fields[FIELD_CIPHER] = bytes([algorithm])
+
+    if algorithm != CIPHER_AES_GCM_STREAM:
+        container = pack_payload(encrypt_payload(body, key, algorithm), flags, fields)
+        return len(container), iter([container])
+
+    # Chiffrement segmenté : la taille du chiffré est connue d'avance et
+    # l'authenticité du corps est assurée par les tags des segments
+    fields[FIELD_SEGMENT_SIZE] = struct.pack('>I', segment_size)
+    extensions = _pack_extensions(flags, fields)
+    length = stream_encrypted_size(len(body), segment_size)
+    header = _write_header(flags, extensions, length, zlib.crc32(extensions)).getvalue()
+    segments = stream_encrypt(body, key, segment_size, STREAM_WORKERS)
+    return len(header) + length, chain([header], segments)
+
+
+def prepare_payload(data: Union[str, bytes], password: Optional[str] = None,
+                    filename: Optional[str] = None, compression: Optional[str] = None,
+                    cipher: Optional[str] = None, kdf: KDFParams = DEFAULT_PARAMS, depth: int = 1,
+                    scatter: bool = False) -> bytes:
+    """
+    Prépare les données à cacher sous forme de conteneur (voir stream_payload).
+
+    Returns:
+        Octets du conteneur
+    """
+    _, chunks = stream_payload(data, password, filename, compression, cipher, kdf, depth=depth, scatter=scatter)
+    return b''.join(chunks)
+
+
+def _payload_key(fields: Dict[int, bytes], password: str) -> bytes:
+    """Retrouve la clé d'un conteneur chiffré à partir du mot de passe."""
+    if FIELD_KDF not in fields:
+        return legacy_key(password)
+    params, salt = KDFParams.decode(fields[FIELD_KDF])
+    return derive_key(password, salt, params)
+
+
+def open_payload(payload: Payload, password: Optional[str] = None) -> Union[str, HiddenFile]:
+    """
+    Retrouve les données d'origine à partir d'un conteneur extrait.
+
+    Args:
+        payload: Contenu extrait
+        password: Mot de passe optionnel pour déchiffrer les données
+
+    Returns:
+        Texte extrait, ou HiddenFile pour un fichier binaire
+    """
+    body = payload.body
+    if payload.legacy:
+        # L'ancien format ne signale pas le chiffrement
+        if password:
+            body = decrypt_payload(body, legacy_key(password), CIPHER_FERNET)
+        return decode_text(body)
+
+    if payload.flags & FLAG_ENCRYPTED and not payload.decrypted:
+        _check_password(payload.flags, payload.fields, password)
+        key = _payload_key(payload.fields, password)
+        if payload.streamed:
+            reader = io.BytesIO(body)
+            body = b''.join(stream_decrypt(reader.read, key, len(body), _segment_size(payload.fields)))
+        else:
+            body = decrypt_payload(body, key, _cipher(payload.fields))
+
+    size = None
+    if FIELD_SIZE in payload.fields:
+        (size,) = struct.unpack('>Q', payload.fields[FIELD_SIZE])
+    if payload.flags & FLAG_COMPRESSED:
+        if size is None:
+            raise ValueError("Taille d'origine absente d'un conteneur compressé")
+        body = decompress_data(body, payload.fields[FIELD_COMPRESSION][0], size)
+
+    if not payload.flags & FLAG_FILE:
+        return decode_text(body)
+
+    if size is not None and size != len(body):
+        raise ValueError("Taille du fichier extrait incohérente")
+    filename = payload.fields.get(FIELD_FILENAME)
+    return HiddenFile(body, filename.decode('utf-8') if filename else None)
+
+
+def recover_data(chunks: Iterable[bytes], password: Optional[str] = None) -> Optional[Union[str, HiddenFile]]:
+    """
+    Extrait et décode les données cachées d'un flux d'octets.
+
+    Returns:
+        Texte ou fichier extrait, ou None si aucune donnée n'est trouvée
+    """
+    payload = read_payload(chunks, password)
+    if payload is None:
+        return None
+    return open_payload(payload, password)
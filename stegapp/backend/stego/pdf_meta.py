@@ -5,6 +5,8 @@ Module de stéganographie pour les PDF via métadonnées.
 import PyPDF2
 from typing import Union, Optional
 import io
+from cryptography.fernet import InvalidToken
+from .crypto import PasswordError
 from .utils import encrypt_data, decrypt_data
 
 
@@ -102,7 +104,10 @@ class PDFSteganography:
         
         # Déchiffrer si nécessaire
         if password:
-            data = decrypt_data(data.encode('latin-1'), password).decode()
+            try:
+                data = decrypt_data(data.encode('latin-1'), password).decode()
+            except InvalidToken:
+                raise PasswordError("Mot de passe incorrect ou données altérées") from None
         
         return data
     
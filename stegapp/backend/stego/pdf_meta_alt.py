@@ -12,6 +12,8 @@ except ImportError:
 from typing import Union, Optional
 import io
 import json
+from cryptography.fernet import InvalidToken
+from .crypto import PasswordError
 from .utils import encrypt_data, decrypt_data
 
 
@@ -151,6 +153,8 @@ class PDFSteganography:
         if password:
             try:
                 data = decrypt_data(data.encode('latin-1'), password).decode()
+            except InvalidToken:
+                raise PasswordError("Mot de passe incorrect ou données altérées") from None
             except Exception as e:
                 raise ValueError(f"Erreur lors du déchiffrement: {str(e)}")
         
@@ -12,8 +12,13 @@ except ImportError:
 from typing import Union, Optional
 import io
 import json
+from cryptography.fernet import InvalidToken
+from .crypto import PasswordError
 from .utils import encrypt_data, decrypt_data
 
+# Préfixe base64 de tout jeton Fernet (octet de version 0x80)
+FERNET_TOKEN_PREFIX = 'gAAAAA'
+
 
 class PDFSteganographySimple:
     """Classe simplifiée pour la stéganographie PDF."""
@@ -149,14 +154,12 @@ class PDFSteganographySimple:
                     if isinstance(value, str) and len(value) > 10:  # Ignorer les champs courts
                         # Vérifier si c'est potentiellement nos données
                         try:
-                            # Essayer de déchiffrer pour voir si c'est nos données
+                            # Avec mot de passe, seul un jeton Fernet peut être nos
+                            # données : il est déchiffré une seule fois, plus bas
                             if password:
-                                try:
-                                    test_decrypt = decrypt_data(value.encode('latin-1'), password)
-                                    data = test_decrypt.decode()
+                                if value.startswith(FERNET_TOKEN_PREFIX):
+                                    data = value
                                     break
-                                except:
-                                    pass
                             else:
                                 # Si pas de mot de passe, prendre la première chaîne longue
                                 if not value.startswith('StegApp') and not value.startswith('Document'):
@@ -174,6 +177,8 @@ class PDFSteganographySimple:
         if password:
             try:
                 data = decrypt_data(data.encode('latin-1'), password).decode()
+            except InvalidToken:
+                raise PasswordError("Mot de passe incorrect ou données altérées") from None
             except Exception as e:
                 raise ValueError(f"Erreur lors du déchiffrement: {str(e)}")
         
@@ -0,0 +1,62 @@
+"""
+Décodage et encodage des pixels dans leur mode natif.
+"""
+
+import numpy as np
+from PIL import Image
+
+
+# Modes traités sans conversion : type des canaux et nombre de canaux.
+# Les autres modes (P, CMYK, 1, ...) sont convertis en RGB.
+NATIVE_MODES = {
+    'RGB': (np.uint8, 3),
+    'RGBA': (np.uint8, 4),
+    'L': (np.uint8, 1),
+    'LA': (np.uint8, 2),
+    'I;16': (np.dtype('<u2'), 1),
+}
+
+BAND_SIZE = 4 * 1024 * 1024   # Taille des bandes de lignes recopiées par decode_pixels
+
+
+def mode_bands(mode: str) -> int:
+    """Nombre de canaux utilisés pour une image de ce mode."""
+    return NATIVE_MODES.get(mode, NATIVE_MODES['RGB'])[1]
+
+
+def decode_pixels(image: Image.Image) -> np.ndarray:
+    """
+    Décode une image dans un tableau modifiable (hauteur, largeur, canaux).
+
+    Les pixels sont recopiés par bandes de lignes (crop + tobytes) dans le
+    tableau préalloué : seule une bande de BAND_SIZE octets s'ajoute au
+    tableau, au lieu d'une copie complète (convert, tobytes, np.array).
+
+    Args:
+        image: Image dans l'un des NATIVE_MODES
+
+    Returns:
+        Tableau des pixels, dans le mode natif de l'image
+    """
+    dtype, bands = NATIVE_MODES[image.mode]
+    width, height = image.size
+    pixels = np.empty((height, width, bands), dtype=dtype)
+    if not pixels.size:
+        return pixels
+
+    image.load()
+    rows = max(1, BAND_SIZE // pixels[0].nbytes)
+    for top in range(0, height, rows):
+        bottom = min(top + rows, height)
+        band = image if rows >= height else image.crop((0, top, width, bottom))
+        pixels[top:bottom] = np.frombuffer(band.tobytes(), dtype=dtype).reshape(bottom - top, width, bands)
+    return pixels
+
+
+def encode_pixels(pixels: np.ndarray, mode: str) -> Image.Image:
+    """
+    Crée une image à partir d'un tableau de pixels, en partageant sa mémoire
+    lorsque Pillow le permet (L, RGBA, I;16).
+    """
+    height, width = pixels.shape[:2]
+    return Image.frombuffer(mode, (width, height), pixels, 'raw', mode, 0, 1)
@@ -0,0 +1,330 @@
+"""
+Lecture incrémentale des images PNG, ligne par ligne.
+
+Les données IDAT sont décompressées à la demande (zlib.decompressobj) et les
+lignes défiltrées une à une : extraire un petit message ne décode que les
+premières lignes de l'image, quelle que soit sa taille. Les filtres Average
+et Paeth, séquentiels octet par octet, ne se vectorisent pas : ils sont
+défaits ligne par ligne en Python (quelques ms pour 5000 pixels). Un corps
+dispersé demande l'image entière : read_pixels la décode par Pillow.
+
+Seules les images non entrelacées dont les échantillons correspondent à un
+mode natif du moteur image sont prises en charge (L, LA, RGB, RGBA en 8 bits,
+niveaux de gris 16 bits) ; les autres passent par Pillow.
+
+AnimationWriter écrit un PNG animé (APNG) image par image, sans garder les
+images précédentes en mémoire.
+"""
+
+import io
+import struct
+import zlib
+from fractions import Fraction
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# (type de couleur, bits par échantillon) -> nombre de canaux
+_COLOR_TYPES = {
+    (0, 8): 1,   # L
+    (0, 16): 1,  # I;16
+    (2, 8): 3,   # RGB
+    (4, 8): 2,   # LA
+    (6, 8): 4,   # RGBA
+}
+
+_CHUNK = struct.Struct('>I4s')
+_IHDR = struct.Struct('>IIBBBBB')
+_FCTL = struct.Struct('>IIIIIHHBB')
+
+READ_SIZE = 64 * 1024       # Taille des lectures de données IDAT
+MAX_INFLATE = 1024 * 1024   # Taille maximale d'une décompression
+
+
+class PNGInfo:
+    """Caractéristiques d'une image PNG lues dans son en-tête IHDR."""
+
+    __slots__ = ('width', 'height', 'bit_depth', 'color_type', 'channels')
+
+    def __init__(self, width: int, height: int, bit_depth: int, color_type: int):
+        self.width = width
+        self.height = height
+        self.bit_depth = bit_depth
+        self.color_type = color_type
+        self.channels = _COLOR_TYPES[(color_type, bit_depth)]
+
+    @property
+    def pixel_size(self) -> int:
+        """Taille d'un pixel en octets."""
+        return self.channels * self.bit_depth // 8
+
+    @property
+    def stride(self) -> int:
+        """Taille d'une ligne défiltrée en octets."""
+        return self.width * self.pixel_size
+
+
+def read_info(stream: BinaryIO) -> Optional[PNGInfo]:
+    """
+    Lit la signature et l'en-tête IHDR d'un flux PNG.
+
+    Returns:
+        Les caractéristiques de l'image, ou None si le flux n'est pas un PNG
+        pris en charge (le flux est alors à une position quelconque)
+    """
+    if stream.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+        return None
+    length, chunk_type = _CHUNK.unpack(stream.read(_CHUNK.size))
+    if chunk_type != b'IHDR' or length != _IHDR.size:
+        return None
+    width, height, bit_depth, color_type, compression, filtering, interlace = _IHDR.unpack(stream.read(length))
+    stream.read(4)  # CRC
+    if (color_type, bit_depth) not in _COLOR_TYPES or compression or filtering or interlace:
+        return None
+    return PNGInfo(width, height, bit_depth, color_type)
+
+
+def _idat_pieces(stream: BinaryIO) -> Iterator[bytes]:
+    """Produit les données IDAT par morceaux, en vérifiant les CRC."""
+    while True:
+        header = stream.read(_CHUNK.size)
+        if len(header) < _CHUNK.size:
+            raise ValueError("Fichier PNG tronqué")
+        length, chunk_type = _CHUNK.unpack(header)
+        if chunk_type == b'IEND':
+            return
+        if chunk_type != b'IDAT':
+            stream.seek(length + 4, 1)
+            continue
+
+        crc = zlib.crc32(chunk_type)
+        remaining = length
+        while remaining:
+            piece = stream.read(min(READ_SIZE, remaining))
+            if not piece:
+                raise ValueError("Fichier PNG tronqué")
+            crc = zlib.crc32(piece, crc)
+            remaining -= len(piece)
+            yield piece
+        if struct.unpack('>I', stream.read(4))[0] != crc:
+            raise ValueError("Fichier PNG corrompu (CRC invalide)")
+
+
+def _inflate(stream: BinaryIO) -> Iterator[bytes]:
+    decompressor = zlib.decompressobj()
+    for piece in _idat_pieces(stream):
+        data = decompressor.decompress(piece, MAX_INFLATE)
+        while data:
+            yield data
+            data = decompressor.decompress(decompressor.unconsumed_tail, MAX_INFLATE)
+    yield decompressor.flush()
+
+
+def _average(row: bytes, prior: bytes, pixel_size: int) -> bytes:
+    # Prédiction (gauche + haut) // 2 : chaque octet dépend de l'octet
+    # reconstruit à sa gauche, parcours séquentiel sur des listes d'entiers
+    out = list(row)
+    up = list(prior)
+    for i in range(pixel_size):
+        out[i] = (out[i] + (up[i] >> 1)) & 0xFF
+    for i in range(pixel_size, len(out)):
+        out[i] = (out[i] + ((out[i - pixel_size] + up[i]) >> 1)) & 0xFF
+    return bytes(out)
+
+
+def _paeth(row: bytes, prior: bytes, pixel_size: int) -> bytes:
+    # Les termes qui ne dépendent que de la ligne précédente (b, c, b - c,
+    # |b - c|) sont calculés d'un bloc ; seul le choix du prédicteur, qui
+    # dépend de l'octet reconstruit à gauche, reste séquentiel
+    up = np.frombuffer(prior, dtype=np.uint8).astype(np.int16)
+    diagonal = np.zeros_like(up)
+    diagonal[pixel_size:] = up[:-pixel_size]
+    slope = up - diagonal
+    distance_a = np.abs(slope).tolist()
+    slope = slope.tolist()
+    up = up.tolist()
+    diagonal = diagonal.tolist()
+    out = list(row)
+    for i in range(pixel_size):
+        out[i] = (out[i] + up[i]) & 0xFF
+    for i in range(pixel_size, len(out)):
+        left = out[i - pixel_size]
+        c = diagonal[i]
+        d = left - c
+        pb = d if d >= 0 else -d
+        d += slope[i]
+        pc = d if d >= 0 else -d
+        pa = distance_a[i]
+        if pa <= pb and pa <= pc:
+            predictor = left
+        elif pb <= pc:
+            predictor = up[i]
+        else:
+            predictor = c
+        out[i] = (out[i] + predictor) & 0xFF
+    return bytes(out)
+
+
+def _unfilter(filter_type: int, row: bytearray, prior: bytes, pixel_size: int) -> bytes:
+    """Annule le filtre d'une ligne (voir la spécification PNG, section 9)."""
+    if filter_type == 0:
+        return bytes(row)
+    if filter_type == 1:
+        # Sub : somme cumulée par canal, modulo 256
+        pixels = np.frombuffer(row, dtype=np.uint8).reshape(-1, pixel_size)
+        return np.cumsum(pixels, axis=0, dtype=np.uint8).tobytes()
+    if filter_type == 2:
+        # Up : addition octet à octet, modulo 256
+        return (np.frombuffer(row, dtype=np.uint8) + np.frombuffer(prior, dtype=np.uint8)).tobytes()
+    if filter_type == 3:
+        return _average(row, prior, pixel_size)
+    if filter_type == 4:
+        return _paeth(row, prior, pixel_size)
+    raise ValueError(f"Filtre PNG inconnu : {filter_type}")
+
+
+def read_pixels(stream: BinaryIO, info: PNGInfo) -> np.ndarray:
+    """
+    Décode l'image entière par Pillow (en C), à plat, quand toutes les lignes
+    sont nécessaires (corps dispersé).
+
+    Args:
+        stream: Flux déplaçable commençant par la signature PNG
+        info: Caractéristiques de l'image
+
+    Returns:
+        Les échantillons de l'image, dans l'ordre de iter_rows
+    """
+    stream.seek(0)
+    with Image.open(stream) as image:
+        pixels = np.asarray(image)
+    dtype = np.uint16 if info.bit_depth == 16 else np.uint8
+    return pixels.reshape(-1).astype(dtype, copy=False)
+
+
+def iter_rows(stream: BinaryIO, info: PNGInfo) -> Iterator[np.ndarray]:
+    """
+    Décode les lignes d'une image PNG à la demande : seules les lignes
+    demandées sont décompressées et défiltrées.
+
+    Args:
+        stream: Flux positionné après l'en-tête IHDR (voir read_info)
+        info: Caractéristiques de l'image
+
+    Yields:
+        Les échantillons de chaque ligne (uint8, ou uint16 en 16 bits), dans
+        l'ordre pixel, canal
+    """
+    stride = info.stride
+    dtype = np.dtype('>u2') if info.bit_depth == 16 else np.dtype(np.uint8)
+    prior = bytes(stride)
+    buffer = bytearray()
+    rows = 0
+    for data in _inflate(stream):
+        buffer += data
+        offset = 0
+        while len(buffer) - offset > stride and rows < info.height:
+            filter_type = buffer[offset]
+            row = _unfilter(filter_type, buffer[offset + 1:offset + 1 + stride], prior, info.pixel_size)
+            offset += stride + 1
+            rows += 1
+            prior = row
+            yield np.frombuffer(row, dtype=dtype).astype(dtype.newbyteorder('='), copy=False)
+        del buffer[:offset]
+        if rows == info.height:
+            return
+    if rows < info.height:
+        raise ValueError("Données PNG tronquées")
+
+
+def _write_chunk(stream: BinaryIO, chunk_type: bytes, data: bytes) -> None:
+    stream.write(_CHUNK.pack(len(data), chunk_type))
+    stream.write(data)
+    stream.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def _iter_chunks(data: bytes) -> Iterator[Tuple[bytes, memoryview]]:
+    """Parcourt les blocs d'un PNG en mémoire (type, contenu)."""
+    view = memoryview(data)
+    offset = len(PNG_SIGNATURE)
+    while offset < len(view):
+        length, chunk_type = _CHUNK.unpack_from(view, offset)
+        offset += _CHUNK.size
+        yield chunk_type, view[offset:offset + length]
+        offset += length + 4
+
+
+class AnimationWriter:
+    """
+    Écriture d'un PNG animé (APNG), image par image.
+
+    Chaque image est compressée par Pillow comme un PNG isolé, puis ses
+    données IDAT sont recopiées dans le flux (IDAT pour la première image,
+    fdAT pour les suivantes). Les images couvrent toute la surface, sans
+    effacement ni fusion (dispose_op et blend_op à 0) : chaque image du
+    fichier est exactement celle qui a été ajoutée.
+    """
+
+    def __init__(self, stream: BinaryIO, frames: int, loop: int = 0, compress_level: int = 6):
+        """
+        Args:
+            stream: Flux de sortie
+            frames: Nombre d'images (annoncé dans le bloc acTL)
+            loop: Nombre de lectures (0 : en boucle)
+            compress_level: Niveau de compression zlib des images
+        """
+        self.stream = stream
+        self.frames = frames
+        self.loop = loop
+        self.compress_level = compress_level
+        self._header = None
+        self._sequence = 0
+        self._written = 0
+
+    def add_frame(self, image: Image.Image, duration: float = 0) -> None:
+        """
+        Ajoute une image à l'animation.
+
+        Args:
+            image: Image (même taille et même mode que la première)
+            duration: Durée d'affichage en millisecondes
+        """
+        if self._written == self.frames:
+            raise ValueError("Toutes les images de l'animation ont déjà été écrites")
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=self.compress_level)
+        chunks = _iter_chunks(buffer.getvalue())
+        _, header = next(chunks)  # IHDR
+        if self._header is None:
+            self._header = bytes(header)
+            self.stream.write(PNG_SIGNATURE)
+            _write_chunk(self.stream, b'IHDR', self._header)
+            _write_chunk(self.stream, b'acTL', struct.pack('>II', self.frames, self.loop))
+        elif header != self._header:
+            raise ValueError("Les images d'une animation doivent avoir la même taille et le même mode")
+
+        delay = Fraction(duration / 1000).limit_denominator(65535)
+        if delay.numerator > 65535:
+            raise ValueError("Durée d'image trop longue pour un PNG animé")
+        width, height = image.size
+        _write_chunk(self.stream, b'fcTL', _FCTL.pack(self._sequence, width, height, 0, 0,
+                                                      delay.numerator, delay.denominator, 0, 0))
+        self._sequence += 1
+        for chunk_type, data in chunks:
+            if chunk_type != b'IDAT':
+                continue
+            if self._written == 0:
+                _write_chunk(self.stream, b'IDAT', data)
+            else:
+                _write_chunk(self.stream, b'fdAT', struct.pack('>I', self._sequence) + data)
+                self._sequence += 1
+        self._written += 1
+
+    def close(self) -> None:
+        """Termine le fichier (toutes les images annoncées doivent être écrites)."""
+        if self._written != self.frames:
+            raise ValueError(f"Animation incomplète : {self._written} images sur {self.frames}")
+        _write_chunk(self.stream, b'IEND', b'')
@@ -0,0 +1,388 @@
+"""
+Dispersion des données sur le support, selon une permutation à clé.
+
+Sans dispersion, les bits sont écrits à partir du premier élément du
+support (pixel ou échantillon) : la zone modifiée est facile à repérer.
+En mode dispersé, l'élément i du corps est écrit à la position
+HEADER_BITS + P(i), où P est une permutation pseudo-aléatoire de
+[0, taille) dérivée du mot de passe.
+
+P est un chiffrement de Feistel sur le plus petit domaine de 2^n éléments
+qui contient [0, taille), ramené à l'intervalle par cycle-walking (on
+rechiffre tant que le résultat en sort). Les positions sont calculées à la
+demande, par lots vectorisés : aucune table d'index n'est construite,
+quelle que soit la taille du support.
+
+L'en-tête du conteneur reste écrit au début du support : il annonce la
+dispersion (FLAG_SCATTERED). Les paramètres de clé et le sel qui le suivent
+occupent les premiers éléments du corps, sans permutation : la clé de la
+permutation est tirée de la clé dérivée du mot de passe, et non du mot de
+passe lui-même.
+"""
+
+import hashlib
+import hmac
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from .bitbuffer import unpack_bits
+from .crypto import PasswordError
+from .kdf import SALT_SIZE, KDFParams, derive_key
+from .lsb import bits_to_values, check_depth, lsb_bytes
+from .payload import HEADER_BITS, HEADER_SIZE, KDF_SLOT_SIZE, SCATTER_PREFIX_SIZE
+
+
+ROUNDS = 4  # Tours de Feistel
+
+_SCATTER_CONTEXT = b'stegapp-scatter-v2'
+
+
+def scatter_key(password: str, prefix: bytes) -> bytes:
+    """
+    Dérive la clé de dispersion d'un conteneur.
+
+    La clé est tirée de la clé du conteneur (scrypt ou PBKDF2, avec les
+    paramètres et le sel lus à la suite de l'en-tête) : chaque essai de mot
+    de passe coûte une dérivation complète. L'en-tête (taille, CRC) entre
+    aussi dans la dérivation : deux messages cachés avec le même mot de passe
+    n'utilisent pas les mêmes positions.
+
+    Args:
+        password: Mot de passe du conteneur
+        prefix: En-tête et paramètres de clé (SCATTER_PREFIX_SIZE octets),
+            éventuellement suivis d'un numéro de vue
+    """
+    params, salt = KDFParams.decode(prefix[HEADER_SIZE:SCATTER_PREFIX_SIZE])
+    key = derive_key(password, salt[:SALT_SIZE], params)
+    return hmac.new(key, _SCATTER_CONTEXT + prefix, hashlib.sha256).digest()
+
+
+class Permutation:
+    """Permutation pseudo-aléatoire à clé de [0, size), calculée sans table."""
+
+    __slots__ = ('size', '_bits', '_dtype', '_keys', '_multipliers')
+
+    def __init__(self, size: int, key: bytes):
+        self.size = size
+        self._bits = (size - 1).bit_length() if size > 1 else 0
+        # Entiers de 32 bits jusqu'à 2^32 éléments : deux fois moins de mémoire
+        # parcourue et des multiplications plus rapides qu'en 64 bits
+        self._dtype = np.dtype(np.uint32 if self._bits <= 32 else np.uint64)
+        words = np.frombuffer(hashlib.sha512(key).digest(), dtype='<u8').astype(self._dtype)
+        self._keys = words[:ROUNDS]
+        self._multipliers = words[ROUNDS:2 * ROUNDS] | self._dtype.type(1)
+
+    def _round(self, values: np.ndarray, index: int, bits: int) -> np.ndarray:
+        # Fonction de tour : hachage multiplicatif, bits de poids fort
+        if not bits:
+            return np.zeros_like(values)
+        mixed = values ^ self._keys[index]
+        mixed *= self._multipliers[index]
+        mixed >>= self._dtype.type(self._dtype.itemsize * 8 - bits)
+        return mixed
+
+    def _encrypt(self, values: np.ndarray) -> np.ndarray:
+        # Feistel déséquilibré : moitiés de n - n//2 et n//2 bits, dont les
+        # tailles s'échangent à chaque tour (nombre de tours pair)
+        left_bits, right_bits = self._bits - self._bits // 2, self._bits // 2
+        left = values >> self._dtype.type(right_bits)
+        right = values & self._dtype.type((1 << right_bits) - 1)
+        for index in range(ROUNDS):
+            left, right = right, left ^ self._round(right, index, left_bits)
+            left_bits, right_bits = right_bits, left_bits
+        left <<= self._dtype.type(right_bits)
+        left |= right
+        return left
+
+    def __call__(self, indices: np.ndarray) -> np.ndarray:
+        """
+        Calcule les images d'un lot d'index.
+
+        Args:
+            indices: Index dans [0, size)
+
+        Returns:
+            Positions permutées, dans [0, size)
+        """
+        values = self._encrypt(np.asarray(indices, dtype=self._dtype))
+        # Cycle-walking : le domaine compte moins de 2 * size éléments, la
+        # plupart des valeurs sont dans l'intervalle dès le premier passage
+        limit = self._dtype.type(self.size)
+        pending = np.flatnonzero(values >= limit)
+        while pending.size:
+            walked = self._encrypt(values[pending])
+            values[pending] = walked
+            pending = pending[walked >= limit]
+        return values
+
+    def positions(self, start: int, stop: int) -> np.ndarray:
+        """Calcule les images des index start à stop - 1."""
+        return self(np.arange(start, stop, dtype=self._dtype))
+
+
+class ScatterLayout:
+    """
+    Positions du corps d'un conteneur dispersé : les fixed premiers éléments
+    (paramètres de clé et sel) dans l'ordre, les suivants permutés.
+    """
+
+    __slots__ = ('size', 'fixed', '_permutation')
+
+    def __init__(self, size: int, fixed: int, permutation: Optional[Permutation] = None):
+        self.size = size
+        self.fixed = fixed
+        self._permutation = permutation
+
+    def positions(self, start: int, stop: int) -> np.ndarray:
+        """Calcule les positions des éléments start à stop - 1 du corps."""
+        fixed = self.fixed
+        head = np.arange(min(start, fixed), min(stop, fixed), dtype=np.uint64)
+        if stop <= fixed:
+            return head
+        tail = self._permutation.positions(max(start, fixed) - fixed, stop - fixed)
+        tail += tail.dtype.type(fixed)
+        return np.concatenate([head.astype(tail.dtype), tail]) if head.size else tail
+
+
+def _slot_elements(depth: int) -> int:
+    # Éléments occupés par les paramètres de clé à la profondeur du corps
+    return KDF_SLOT_SIZE * 8 // depth
+
+
+def read_scatter_prefix(carrier: np.ndarray, header: bytes, depth: int = 1, start: int = HEADER_BITS) -> bytes:
+    """
+    Relit les paramètres de clé d'un conteneur dispersé, écrits sans
+    permutation à la suite de l'en-tête.
+
+    Args:
+        carrier: Tableau (échantillons, ou vue de pixels)
+        header: En-tête du conteneur (HEADER_SIZE octets)
+        depth: Profondeur annoncée par l'en-tête
+        start: Index (à plat) du premier élément du corps
+
+    Returns:
+        En-tête et paramètres de clé (SCATTER_PREFIX_SIZE octets, moins si le
+        support est trop petit)
+    """
+    fixed = min(_slot_elements(depth), max(0, carrier.size - start))
+    layout = ScatterLayout(fixed // 8 * 8, fixed)
+    return header + b''.join(iter_scattered_bytes(carrier, layout, start, depth))
+
+
+def scatter_permutation(prefix: bytes, password: Optional[str], size: int, depth: int = 1,
+                        slot: bool = True) -> ScatterLayout:
+    """
+    Construit la disposition d'un conteneur dispersé.
+
+    Args:
+        prefix: En-tête et paramètres de clé du conteneur (SCATTER_PREFIX_SIZE
+            octets, voir read_scatter_prefix), éventuellement suivis d'un
+            numéro de vue
+        password: Mot de passe du conteneur
+        size: Nombre d'éléments du support après l'en-tête
+        depth: Nombre de bits écrits par élément du corps
+        slot: Les paramètres de clé occupent le début du domaine (faux pour
+            les vues suivantes d'une image animée)
+
+    Raises:
+        PasswordError: Si le mot de passe est absent
+        ValueError: Si le support ne peut pas contenir les paramètres de clé
+    """
+    if not password:
+        raise PasswordError("Les données sont dispersées : mot de passe requis", 'password_required')
+    if len(prefix) < SCATTER_PREFIX_SIZE:
+        raise ValueError("Les données sont trop volumineuses pour ce support")
+    fixed = _slot_elements(depth) if slot else 0
+    if size < fixed:
+        raise ValueError("Les données sont trop volumineuses pour ce support")
+    return ScatterLayout(size, fixed, Permutation(size - fixed, scatter_key(password, prefix)))
+
+
+def _indexer(carrier: np.ndarray, start: int):
+    # Index à plat sur un tableau contigu ; sur une vue à plusieurs
+    # dimensions (lignes complétées, ordre BGR...), index par dimension pour
+    # ne pas copier le support
+    if carrier.flags.c_contiguous:
+        flat = carrier.reshape(-1)
+        return flat, lambda positions: positions.astype(np.intp) + start
+    return carrier, lambda positions: np.unravel_index(positions.astype(np.intp) + start, carrier.shape)
+
+
+def embed_scattered(carrier: np.ndarray, chunks: Iterable[bytes], permutation: Permutation,
+                    start: int = 0, depth: int = 1, max_chunk: int = 1 << 16) -> int:
+    """
+    Écrit une suite de blocs d'octets dans les LSB d'éléments dispersés, en place.
+
+    Args:
+        carrier: Tableau modifiable (échantillons, ou vue de pixels)
+        chunks: Blocs d'octets à écrire
+        permutation: Positions des éléments du corps (Permutation ou
+            ScatterLayout, voir scatter_permutation)
+        start: Index (à plat) du premier élément du domaine permuté
+        depth: Nombre de bits de poids faible écrits par élément (1 à 4)
+        max_chunk: Taille maximale des tranches traitées, en octets (la
+            mémoire de travail, une vingtaine d'octets par élément, en dépend)
+
+    Returns:
+        Nombre d'éléments modifiés
+    """
+    check_depth(depth)
+    clear_mask = np.array(-(1 << depth)).astype(carrier.dtype)
+    target, index_of = _indexer(carrier, start)
+    position = 0
+    pending = np.zeros(0, dtype=np.uint8)  # Bits restants d'un élément incomplet
+
+    def write(bits: np.ndarray) -> None:
+        nonlocal position
+        values = bits_to_values(bits, depth) if depth > 1 else bits
+        if position + values.size > permutation.size:
+            raise ValueError("Les données sont trop volumineuses pour ce support")
+        index = index_of(permutation.positions(position, position + values.size))
+        current = target[index]
+        current &= clear_mask
+        current |= values.astype(carrier.dtype, copy=False)
+        target[index] = current
+        position += values.size
+
+    for chunk in chunks:
+        view = memoryview(chunk)
+        for offset in range(0, len(view), max_chunk):
+            bits = unpack_bits(view[offset:offset + max_chunk])
+            if pending.size:
+                bits = np.concatenate([pending, bits])
+            usable = bits.size - bits.size % depth
+            write(bits[:usable])
+            pending = bits[usable:]
+    if pending.size:
+        write(pending)
+    return position
+
+
+def iter_scattered_bytes(carrier: np.ndarray, permutation: Permutation, start: int = 0,
+                         depth: int = 1, first_chunk: int = 4096, max_chunk: int = 1 << 19) -> Iterator[bytes]:
+    """
+    Lit les LSB d'éléments dispersés par blocs, regroupés en octets.
+
+    Comme iter_lsb_bytes, la taille des blocs double à chaque itération :
+    seuls les éléments qui portent le message sont lus.
+
+    Args:
+        carrier: Tableau (échantillons, ou vue de pixels)
+        permutation: Positions des éléments du corps (Permutation ou
+            ScatterLayout, voir scatter_permutation)
+        start: Index (à plat) du premier élément du domaine permuté
+        depth: Nombre de bits de poids faible lus par élément (1 à 4)
+        first_chunk: Taille du premier bloc en éléments (multiple de 8)
+        max_chunk: Taille maximale d'un bloc en éléments (multiple de 8)
+
+    Yields:
+        Octets reconstruits à partir des bits de poids faible
+    """
+    check_depth(depth)
+    target, index_of = _indexer(carrier, start)
+    end = permutation.size // 8 * 8
+    chunk = first_chunk
+    position = 0
+    while position < end:
+        stop = min(position + chunk, end)
+        yield lsb_bytes(target[index_of(permutation.positions(position, stop))], depth)
+        position = stop
+        chunk = min(chunk * 2, max_chunk)
+
+
+class ScatteredStream:
+    """
+    Corps d'un conteneur dispersé sur un support lu par blocs successifs,
+    dans l'ordre (fichier audio lu ou écrit en flux, sans accès direct).
+
+    Les positions des count premiers éléments du corps sont calculées par
+    fenêtres, puis triées : chaque bloc est écrit (write) ou lu (read) au
+    passage, par une opération vectorisée sur les positions qu'il contient.
+    La mémoire dépend de la taille du corps (17 octets par élément), pas de
+    celle du support.
+    """
+
+    __slots__ = ('depth', '_positions', '_order', '_values', '_offset', '_done')
+
+    def __init__(self, permutation: Permutation, count: int, start: int = 0, depth: int = 1,
+                 window: int = 1 << 20):
+        """
+        Args:
+            permutation: Positions des éléments du corps (Permutation ou
+                ScatterLayout, voir scatter_permutation)
+            count: Nombre d'éléments du corps écrits ou lus
+            start: Index (à plat) du premier élément du domaine permuté
+            depth: Nombre de bits de poids faible par élément (1 à 4)
+            window: Nombre de positions calculées par lot
+
+        Raises:
+            ValueError: Si le corps dépasse le domaine permuté
+        """
+        check_depth(depth)
+        if count > permutation.size:
+            raise ValueError("Les données sont trop volumineuses pour ce support")
+        positions = np.empty(count, dtype=np.uint64)
+        for offset in range(0, count, window):
+            stop = min(offset + window, count)
+            positions[offset:stop] = permutation.positions(offset, stop)
+        positions += np.uint64(start)
+        self.depth = depth
+        self._order = np.argsort(positions)
+        self._positions = positions[self._order]
+        self._values = np.zeros(count, dtype=np.uint8)  # Valeurs dans l'ordre des positions
+        self._offset = 0  # Index (à plat) du début du prochain bloc
+        self._done = 0    # Éléments du corps déjà passés
+
+    @property
+    def finished(self) -> bool:
+        """Tous les éléments du corps ont été écrits ou lus."""
+        return self._done == self._positions.size
+
+    def load(self, chunks: Iterable[bytes]) -> None:
+        """Prépare les valeurs à écrire, à partir des octets du corps."""
+        bits = unpack_bits(b''.join(chunks))
+        values = bits_to_values(bits, self.depth) if self.depth > 1 else bits
+        if values.size != self._values.size:
+            raise ValueError("Taille du corps inattendue")
+        self._values = values[self._order]
+
+    def _span(self, block: np.ndarray) -> slice:
+        # Éléments du corps situés dans le bloc suivant
+        start = self._done
+        stop = start + int(np.searchsorted(self._positions[start:], self._offset + block.size))
+        return slice(start, stop)
+
+    def _advance(self, block: np.ndarray, span: slice) -> np.ndarray:
+        index = (self._positions[span] - np.uint64(self._offset)).astype(np.intp)
+        self._offset += block.size
+        self._done = span.stop
+        return index
+
+    def write(self, block: np.ndarray) -> None:
+        """Écrit, en place, les éléments du corps situés dans le bloc suivant du support."""
+        span = self._span(block)
+        index = self._advance(block, span)
+        if index.size:
+            current = block[index]
+            current &= np.array(-(1 << self.depth)).astype(block.dtype)
+            current |= self._values[span].astype(block.dtype, copy=False)
+            block[index] = current
+
+    def read(self, block: np.ndarray) -> None:
+        """Lit les éléments du corps situés dans le bloc suivant du support."""
+        span = self._span(block)
+        index = self._advance(block, span)
+        if index.size:
+            self._values[span] = block[index] & ((1 << self.depth) - 1)
+
+    def data(self) -> bytes:
+        """
+        Retourne les octets du corps lus (count multiple de 8), ou une chaîne
+        vide si le support s'est arrêté avant la fin du corps.
+        """
+        if not self.finished:
+            return b''
+        values = np.empty_like(self._values)
+        values[self._order] = self._values
+        return lsb_bytes(values, self.depth)
@@ -6,6 +6,8 @@ import hashlib
 from cryptography.fernet import Fernet
 from typing import Union, Tuple
 import base64
+import numpy as np
+from .bitbuffer import pack_bits, unpack_bits
 
 
 def generate_key_from_password(password: str) -> bytes:
@@ -28,13 +30,26 @@ def decrypt_data(encrypted_data: bytes, password: str) -> bytes:
 
 
 def text_to_binary(text: str) -> str:
-    """Convertit un texte en binaire."""
-    return ''.join(format(ord(char), '08b') for char in text)
+    """
+    Convertit un texte (UTF-8) en chaîne de '0'/'1'.
+
+    Représentation de compatibilité : les moteurs utilisent stego.bitbuffer.
+    """
+    return (unpack_bits(text.encode('utf-8')) + ord('0')).tobytes().decode('ascii')
 
 
 def binary_to_text(binary: str) -> str:
-    """Convertit du binaire en texte."""
-    return ''.join(chr(int(binary[i:i+8], 2)) for i in range(0, len(binary), 8))
+    """Convertit une chaîne de '0'/'1' en texte."""
+    bits = np.frombuffer(binary.encode('ascii'), dtype=np.uint8) - ord('0')
+    return decode_text(pack_bits(bits[:bits.size // 8 * 8]))
+
+
+def decode_text(data: bytes) -> str:
+    """Décode un texte extrait (UTF-8, ou Latin-1 pour les anciens supports)."""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
 
 
 def add_padding(data: str, length: int) -> str:
@@ -47,10 +62,10 @@ def remove_padding(data: str) -> str:
     return data.rstrip('0')
 
 
-def calculate_lsb_capacity(image_size: Tuple[int, int]) -> int:
+def calculate_lsb_capacity(image_size: Tuple[int, int], bits_per_channel: int = 1) -> int:
     """Calcule la capacité maximale pour LSB sur une image."""
     width, height = image_size
-    return width * height * 3  # 3 canaux RGB
+    return width * height * 3 * bits_per_channel  # 3 canaux RGB
 
 
 def validate_file_type(filename: str, allowed_extensions: list) -> bool:
@@ -0,0 +1,449 @@
+"""
+Stéganographie dans les vidéos non compressées : YUV4MPEG2 (.y4m) et AVI.
+
+Les images sont lues une à une dans le flux, modifiées avec NumPy puis
+recopiées telles quelles dans le fichier produit : aucun codec n'est
+nécessaire et la mémoire utilisée est celle d'une image, quelle que soit la
+durée de la vidéo. Les autres octets du fichier (en-têtes, audio, index)
+sont recopiés sans changement ; la taille du fichier ne change pas.
+
+- YUV4MPEG2 : les données sont écrites dans le plan de luminance (Y) de
+  chaque image, en 8 bits ou en 16 bits (C420p10, C444p16...). Les plans
+  de chrominance ne sont pas modifiés.
+- AVI : seules les vidéos RGB non compressées (BI_RGB, 24 ou 32 bits) sont
+  prises en charge ; les données sont écrites dans tous les octets des
+  pixels, hors remplissage des lignes. Les listes AVIX (OpenDML) sont
+  parcourues comme la première.
+
+Le conteneur est réparti sur les images comme dans une image animée (voir
+frames.embed_frames) : en-tête au début de la première image, corps réparti
+sur les suivantes.
+"""
+
+import io
+import os
+import re
+import struct
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .frames import embed_frames, frames_capacity, iter_embed_frames, recover_frames
+from .payload import HEADER_BITS, HiddenFile, stream_payload
+
+
+Y4M_SIGNATURE = b'YUV4MPEG2 '
+COPY_SIZE = 1 << 20  # Taille des morceaux recopiés tels quels
+
+# Sous-échantillonnage de la chrominance YUV4MPEG2 : nombre de plans de
+# chrominance (ou alpha) et diviseurs horizontal et vertical
+_Y4M_CHROMA = {
+    '420': (2, 2, 2),
+    '422': (2, 2, 1),
+    '444': (2, 1, 1),
+    '444alpha': (3, 1, 1),
+    'mono': (0, 1, 1),
+}
+_Y4M_COLORSPACE = re.compile(r'(420|422|444alpha|444|mono)(jpeg|paldv|mpeg2|p(\d+))?')
+
+_RIFF = struct.Struct('<4sI')
+_BITMAPINFO = struct.Struct('<IiiHHI')
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) < size:
+        raise ValueError("Fichier vidéo tronqué")
+    return data
+
+
+def _copy(stream: BinaryIO, output: Optional[BinaryIO], size: int) -> None:
+    # Recopie (ou saute, sans sortie) size octets
+    if output is None:
+        stream.seek(size, 1)
+        return
+    while size:
+        data = _read_exact(stream, min(size, COPY_SIZE))
+        output.write(data)
+        size -= len(data)
+
+
+class Y4MReader:
+    """Lecture image par image d'un flux YUV4MPEG2."""
+
+    def __init__(self, stream: BinaryIO):
+        """
+        Args:
+            stream: Flux positionné au début du fichier
+        """
+        self.stream = stream
+        self.header = stream.readline()
+        if not self.header.startswith(Y4M_SIGNATURE) or not self.header.endswith(b'\n'):
+            raise ValueError("En-tête YUV4MPEG2 invalide")
+        params = {token[:1]: token[1:] for token in self.header[len(Y4M_SIGNATURE):].split()}
+        try:
+            self.width = int(params[b'W'])
+            self.height = int(params[b'H'])
+        except (KeyError, ValueError):
+            raise ValueError("En-tête YUV4MPEG2 invalide : dimensions absentes")
+        colorspace = params.get(b'C', b'420jpeg').decode('ascii', 'replace')
+        match = _Y4M_COLORSPACE.fullmatch(colorspace)
+        if match is None:
+            raise ValueError(f"Espace de couleurs YUV4MPEG2 non supporté : {colorspace}")
+        bit_depth = int(match.group(3) or 8)
+        self.dtype = np.dtype(np.uint8 if bit_depth == 8 else '<u2')
+        planes, horizontal, vertical = _Y4M_CHROMA[match.group(1)]
+        luma = self.width * self.height
+        chroma = -(-self.width // horizontal) * -(-self.height // vertical)
+        self.luma_size = luma
+        self.frame_size = (luma + planes * chroma) * self.dtype.itemsize
+
+    def frame_channels(self) -> List[int]:
+        """Nombre d'échantillons de luminance de chaque image (images sautées)."""
+        channels = []
+        while self._frame_header():
+            _copy(self.stream, None, self.frame_size)
+            channels.append(self.luma_size)
+        return channels
+
+    def frames(self, output: Optional[BinaryIO] = None) -> Iterator[np.ndarray]:
+        """
+        Lit les images une à une.
+
+        Yields:
+            Le plan de luminance de chaque image, à plat et modifiable ; avec
+            output, l'image (modifications comprises) y est écrite quand la
+            suivante est demandée
+        """
+        if output is not None:
+            output.write(self.header)
+        buffer = bytearray(self.frame_size)
+        luma = np.frombuffer(buffer, dtype=self.dtype, count=self.luma_size)
+        while True:
+            line = self._frame_header()
+            if not line:
+                return
+            if self.stream.readinto(buffer) != self.frame_size:
+                raise ValueError("Fichier vidéo tronqué")
+            yield luma
+            if output is not None:
+                output.write(line)
+                output.write(buffer)
+
+    def _frame_header(self) -> bytes:
+        line = self.stream.readline()
+        if line and not (line.startswith(b'FRAME') and line.endswith(b'\n')):
+            raise ValueError("Image YUV4MPEG2 invalide")
+        return line
+
+
+class AVIReader:
+    """Lecture image par image d'un fichier AVI non compressé (RGB)."""
+
+    def __init__(self, stream: BinaryIO):
+        """
+        Args:
+            stream: Flux positionné au début du fichier
+        """
+        self.stream = stream
+        self._streams = 0
+        self._kind = None       # Type du dernier flux déclaré (vids, auds...)
+        self._video = None      # Numéro du flux vidéo
+        self._shape = None      # Lignes, taille d'une ligne (remplissage compris), octets utiles
+        self._chunk_ids = ()
+
+    def frame_channels(self) -> List[int]:
+        """Nombre d'octets de pixels de chaque image (images sautées)."""
+        return list(self._walk(None, False))
+
+    def frames(self, output: Optional[BinaryIO] = None) -> Iterator[np.ndarray]:
+        """
+        Lit les images une à une.
+
+        Yields:
+            Les octets des pixels de chaque image, hors remplissage des lignes,
+            à plat et modifiables ; avec output, l'image est écrite quand la
+            suivante est demandée
+        """
+        return self._walk(output, True)
+
+    def _walk(self, output: Optional[BinaryIO], decode: bool) -> Iterator:
+        stream = self.stream
+        while True:
+            header = stream.read(_RIFF.size)
+            if not header:
+                return
+            if len(header) < _RIFF.size:
+                raise ValueError("Fichier vidéo tronqué")
+            chunk_id, size = _RIFF.unpack(header)
+            if chunk_id != b'RIFF':
+                raise ValueError("Fichier AVI invalide")
+            form = _read_exact(stream, 4)
+            if form not in (b'AVI ', b'AVIX'):
+                raise ValueError("Fichier AVI invalide")
+            if output is not None:
+                output.write(header + form)
+            yield from self._walk_list(size - 4, output, decode)
+            _copy(stream, output, size & 1)
+
+    def _walk_list(self, size: int, output: Optional[BinaryIO], decode: bool) -> Iterator:
+        stream = self.stream
+        end = size
+        position = 0
+        while position + _RIFF.size <= end:
+            header = _read_exact(stream, _RIFF.size)
+            chunk_id, length = _RIFF.unpack(header)
+            padded = length + (length & 1)
+            position += _RIFF.size + padded
+            if chunk_id == b'LIST':
+                form = _read_exact(stream, 4)
+                if output is not None:
+                    output.write(header + form)
+                yield from self._walk_list(length - 4, output, decode)
+                _copy(stream, output, length & 1)
+            elif chunk_id in (b'strh', b'strf'):
+                data = _read_exact(stream, padded)
+                self._stream_header(chunk_id, data[:length])
+                if output is not None:
+                    output.write(header + data)
+            elif chunk_id in self._chunk_ids and length == self._shape[0] * self._shape[1]:
+                if output is not None:
+                    output.write(header)
+                if not decode:
+                    _copy(stream, None, padded)
+                    yield self._shape[0] * self._shape[2]
+                    continue
+                yield from self._frame(length, output)
+                _copy(stream, output, length & 1)
+            else:
+                if output is not None:
+                    output.write(header)
+                _copy(stream, output, padded)
+        _copy(stream, output, end - position if position < end else 0)
+
+    def _stream_header(self, chunk_id: bytes, data: bytes) -> None:
+        if chunk_id == b'strh':
+            self._streams += 1
+            self._kind = data[:4]
+            return
+        if self._kind != b'vids' or self._video is not None:
+            return
+        _, width, height, _, bit_count, compression = _BITMAPINFO.unpack_from(data)
+        if compression != 0 or bit_count not in (24, 32):
+            raise ValueError("Vidéo AVI compressée non prise en charge : RGB non compressé (24 ou 32 bits) attendu")
+        self._video = self._streams - 1
+        pixel_size = bit_count // 8
+        stride = (width * pixel_size + 3) & ~3
+        self._shape = (abs(height), stride, width * pixel_size)
+        number = b'%02d' % self._video
+        self._chunk_ids = (number + b'db', number + b'dc')
+
+    def _frame(self, length: int, output: Optional[BinaryIO]) -> Iterator[np.ndarray]:
+        rows, stride, used = self._shape
+        buffer = bytearray(length)
+        if self.stream.readinto(buffer) != length:
+            raise ValueError("Fichier vidéo tronqué")
+        pixels = np.frombuffer(buffer, dtype=np.uint8).reshape(rows, stride)[:, :used]
+        # Sans remplissage, les pixels sont modifiés dans le tampon lui-même
+        flat = pixels.reshape(-1) if stride == used else np.ascontiguousarray(pixels).reshape(-1)
+        yield flat
+        if output is not None:
+            if stride != used:
+                pixels[:] = flat.reshape(rows, used)
+            output.write(buffer)
+
+
+def open_video(stream: BinaryIO) -> Union[Y4MReader, AVIReader]:
+    """
+    Ouvre un flux vidéo non compressé selon sa signature.
+
+    Raises:
+        ValueError: Si le format n'est pas pris en charge
+    """
+    signature = stream.read(12)
+    stream.seek(-len(signature), 1)
+    if signature.startswith(Y4M_SIGNATURE):
+        return Y4MReader(stream)
+    if signature[:4] == b'RIFF' and signature[8:12] == b'AVI ':
+        return AVIReader(stream)
+    raise ValueError("Format vidéo non pris en charge : YUV4MPEG2 (.y4m) ou AVI non compressé attendu")
+
+
+def output_type(data: Union[str, bytes]) -> Tuple[str, str]:
+    """Retourne le type MIME et l'extension d'une vidéo produite par hide_data."""
+    if isinstance(data, str):
+        with open(data, 'rb') as stream:
+            signature = stream.read(len(Y4M_SIGNATURE))
+    else:
+        signature = bytes(data[:len(Y4M_SIGNATURE)])
+    if signature == Y4M_SIGNATURE:
+        return 'video/x-yuv4mpeg', 'y4m'
+    return 'video/x-msvideo', 'avi'
+
+
+class _Pipe:
+    """Sortie en mémoire, vidée après chaque image (voir hide_stream)."""
+
+    def __init__(self):
+        self._pieces = []
+
+    def write(self, data: bytes) -> None:
+        # Copie : le tampon d'une image est réutilisé pour la suivante
+        self._pieces.append(bytes(data))
+
+    def drain(self) -> List[bytes]:
+        pieces, self._pieces = self._pieces, []
+        return pieces
+
+
+class VideoSteganography:
+    """Stéganographie LSB dans les vidéos non compressées (YUV4MPEG2, AVI)."""
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Nombre de threads pour l'insertion et l'extraction
+                dans chaque image
+        """
+        self.header_bits = HEADER_BITS
+        self.workers = workers or os.cpu_count() or 1
+
+    def hide_data(self, video_path: Union[str, bytes], data: Union[str, bytes], password: Optional[str] = None,
+                  filename: Optional[str] = None, compression: Optional[str] = None,
+                  cipher: Optional[str] = None, bits_per_channel: int = 1, scatter: bool = False) -> bytes:
+        """
+        Cache des données dans une vidéo non compressée.
+
+        Args:
+            video_path: Chemin vers la vidéo ou données de la vidéo
+            data: Texte ou contenu binaire d'un fichier à cacher
+            password: Mot de passe optionnel pour chiffrer les données
+            filename: Nom du fichier d'origine (données binaires)
+            compression: 'zlib', 'lzma', 'bz2', 'auto' ou None
+            cipher: 'fernet' (par défaut), 'aesgcm', 'chacha20' ou 'aesgcm-stream'
+            bits_per_channel: Nombre de bits modifiés par échantillon (1 à 4)
+            scatter: Disperser les données de chaque image selon le mot de passe
+
+        Returns:
+            Données de la vidéo modifiée, dans son format d'origine
+        """
+        output = io.BytesIO()
+        with self._open(video_path) as source:
+            self._hide(source, output, data, password, filename, compression, cipher, bits_per_channel, scatter)
+        return output.getvalue()
+
+    def hide_file(self, video_path: str, output_path: str, data: Union[str, bytes],
+                  password: Optional[str] = None, filename: Optional[str] = None,
+                  compression: Optional[str] = None, cipher: Optional[str] = None,
+                  bits_per_channel: int = 1, scatter: bool = False) -> None:
+        """
+        Cache des données dans une vidéo, écrite directement dans un fichier.
+
+        Args:
+            video_path: Chemin vers la vidéo d'origine
+            output_path: Chemin de la vidéo produite
+            (autres arguments : voir hide_data)
+        """
+        with open(video_path, 'rb') as source, open(output_path, 'wb') as output:
+            self._hide(source, output, data, password, filename, compression, cipher, bits_per_channel, scatter)
+
+    def hide_stream(self, source: BinaryIO, data: Union[str, bytes], password: Optional[str] = None,
+                    filename: Optional[str] = None, compression: Optional[str] = None,
+                    cipher: Optional[str] = None, bits_per_channel: int = 1,
+                    scatter: bool = False) -> Iterator[bytes]:
+        """
+        Cache des données dans une vidéo, produite morceau par morceau.
+
+        Chaque image est rendue dès qu'elle est modifiée : la mémoire reste
+        celle d'une image. Le format et la capacité sont vérifiés avant le
+        retour : les erreurs sont levées ici, pas pendant la lecture des
+        morceaux.
+
+        Args:
+            source: Flux de la vidéo d'origine, déplaçable (lu deux fois)
+            (autres arguments : voir hide_data)
+
+        Returns:
+            Itérateur des morceaux de la vidéo produite
+        """
+        size, chunks = self._prepare(source, data, password, filename, compression, cipher, bits_per_channel, scatter)
+        return self._stream(source, size, chunks, password, bits_per_channel, scatter)
+
+    def extract_data(self, video_path: Union[str, bytes], password: Optional[str] = None) -> Union[str, HiddenFile]:
+        """
+        Extrait des données cachées d'une vidéo non compressée.
+
+        Seules les images qui portent le message sont lues.
+
+        Args:
+            video_path: Chemin vers la vidéo ou données de la vidéo
+            password: Mot de passe optionnel pour déchiffrer les données
+
+        Returns:
+            Texte extrait, ou HiddenFile (bytes) pour un fichier binaire
+        """
+        with self._open(video_path) as source:
+            return self.extract_stream(source, password)
+
+    def extract_stream(self, source: BinaryIO, password: Optional[str] = None) -> Union[str, HiddenFile]:
+        """
+        Extrait des données cachées d'un flux vidéo (voir extract_data).
+
+        Args:
+            source: Flux de la vidéo, positionné au début (il n'est pas fermé)
+            password: Mot de passe optionnel pour déchiffrer les données
+
+        Returns:
+            Texte extrait, ou HiddenFile (bytes) pour un fichier binaire
+        """
+        data = recover_frames(open_video(source).frames(), password, self.workers)
+        if data is None:
+            raise ValueError("Aucune donnée cachée trouvée dans la vidéo")
+        return data
+
+    def get_capacity(self, video_path: Union[str, bytes], bits_per_channel: int = 1) -> int:
+        """
+        Retourne la capacité maximale en bits, sur l'ensemble des images.
+
+        Args:
+            video_path: Chemin vers la vidéo ou données de la vidéo
+            bits_per_channel: Nombre de bits modifiés par échantillon (1 à 4)
+
+        Returns:
+            Capacité en bits
+        """
+        with self._open(video_path) as source:
+            return frames_capacity(open_video(source).frame_channels(), bits_per_channel)
+
+    def _hide(self, source: BinaryIO, output: BinaryIO, data: Union[str, bytes], password: Optional[str],
+              filename: Optional[str], compression: Optional[str], cipher: Optional[str],
+              bits_per_channel: int, scatter: bool) -> None:
+        size, chunks = self._prepare(source, data, password, filename, compression, cipher, bits_per_channel, scatter)
+        embed_frames(open_video(source).frames(output), chunks, size, password, bits_per_channel, scatter,
+                     self.workers)
+
+    def _prepare(self, source: BinaryIO, data: Union[str, bytes], password: Optional[str],
+                 filename: Optional[str], compression: Optional[str], cipher: Optional[str],
+                 bits_per_channel: int, scatter: bool) -> Tuple[int, Iterator[bytes]]:
+        # Premier passage : capacité (images sautées) ; le flux est rembobiné
+        # pour le second, l'insertion
+        capacity = frames_capacity(open_video(source).frame_channels(), bits_per_channel)
+        size, chunks = stream_payload(data, password, filename, compression, cipher,
+                                      depth=bits_per_channel, scatter=scatter)
+        if size * 8 - HEADER_BITS > capacity:
+            raise ValueError("Les données sont trop volumineuses pour cette vidéo")
+        source.seek(0)
+        return size, chunks
+
+    def _stream(self, source: BinaryIO, size: int, chunks: Iterator[bytes], password: Optional[str],
+                bits_per_channel: int, scatter: bool) -> Iterator[bytes]:
+        pipe = _Pipe()
+        frames = open_video(source).frames(pipe)
+        for _ in iter_embed_frames(frames, chunks, size, password, bits_per_channel, scatter, self.workers):
+            yield from pipe.drain()
+        yield from pipe.drain()
+
+    def _open(self, video_path: Union[str, bytes]) -> BinaryIO:
+        if isinstance(video_path, str):
+            return open(video_path, 'rb')
+        return io.BytesIO(video_path)
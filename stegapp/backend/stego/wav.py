@@ -0,0 +1,217 @@
+"""
+Lecture en flux des fichiers WAV : RIFF, RF64 (plus de 4 Go) et Sony Wave64.
+
+Les en-têtes sont analysés sans passer par le module wave, qui ne connaît
+ni RF64 ni Wave64 : les octets qui précèdent les échantillons sont conservés
+tels quels, les échantillons sont lus par blocs de frames et la fin du
+fichier (octet de remplissage, chunks placés après les données) est
+recopiée sans changement. Un fichier produit à partir de ces morceaux a
+exactement la taille et les métadonnées de l'original.
+
+- RIFF (et RIFF/WAVE_FORMAT_EXTENSIBLE) : tailles sur 32 bits.
+- RF64 et BW64 : tailles sur 64 bits dans le chunk ds64, qui suit
+  immédiatement l'en-tête ; le champ de taille du chunk data vaut
+  0xFFFFFFFF.
+- Wave64 : identifiants de chunks sur 16 octets (GUID), tailles sur 64 bits
+  qui incluent l'en-tête du chunk, chunks alignés sur 8 octets.
+
+Seul le PCM 16 bits petit-boutiste est pris en charge.
+"""
+
+import struct
+from typing import BinaryIO, Iterator
+
+import numpy as np
+
+
+FIRST_READ = 1 << 12   # Frames lues au premier bloc (extraction)
+MAX_READ = 1 << 20     # Taille maximale d'un bloc de frames
+COPY_SIZE = 1 << 20    # Taille des morceaux recopiés tels quels
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_RIFF = struct.Struct('<4sI4s')
+_CHUNK = struct.Struct('<4sI')
+_DS64 = struct.Struct('<QQQ')       # Tailles RIFF et data, nombre de frames
+_FMT = struct.Struct('<HHIIHH')     # Format, canaux, fréquence, octets/s, taille d'une frame, bits
+_W64_CHUNK = struct.Struct('<16sQ')
+
+# GUID Wave64 : les quatre premiers octets reprennent l'identifiant RIFF
+_W64_SUFFIX = bytes.fromhex('f3acd3118cd100c04f8edb8a')
+_W64_RIFF = b'riff' + bytes.fromhex('2e91cf11a5d628db04c10000')
+_W64_WAVE = b'wave' + _W64_SUFFIX
+_W64_FMT = b'fmt ' + _W64_SUFFIX
+_W64_DATA = b'data' + _W64_SUFFIX
+
+# Sous-format KSDATAFORMAT_SUBTYPE_PCM, hors code de format (2 premiers octets)
+_PCM_SUBTYPE = bytes.fromhex('000000001000800000aa00389b71')
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) < size:
+        raise ValueError("Fichier audio tronqué")
+    return data
+
+
+def _read_into(stream: BinaryIO, buffer: bytearray) -> int:
+    # Un tube ou une socket peut rendre moins d'octets que demandé avant la fin
+    view = memoryview(buffer)
+    length = 0
+    while length < len(buffer):
+        read = stream.readinto(view[length:])
+        if not read:
+            break
+        length += read
+    return length
+
+
+class WavReader:
+    """Lecture par blocs des échantillons d'un fichier WAV, RF64 ou Wave64."""
+
+    def __init__(self, stream: BinaryIO):
+        """
+        Lit les en-têtes jusqu'au début des échantillons.
+
+        Args:
+            stream: Flux positionné au début du fichier (non nécessairement
+                déplaçable : il n'est lu qu'une fois, dans l'ordre)
+
+        Raises:
+            ValueError: Fichier invalide ou autre format que PCM 16 bits
+        """
+        self.stream = stream
+        self.channels = 0
+        self.framerate = 0
+        self.block_align = 0
+        self.data_size = 0
+        start = _read_exact(stream, _RIFF.size)
+        if start[:4] == _W64_RIFF[:4]:
+            self.kind = 'W64'
+            header = start + _read_exact(stream, 40 - _RIFF.size)
+            if header[:16] != _W64_RIFF or header[24:40] != _W64_WAVE:
+                raise ValueError("Fichier Wave64 invalide")
+            self.header = header + self._w64_chunks()
+        else:
+            riff, _, form = _RIFF.unpack(start)
+            if riff not in (b'RIFF', b'RF64', b'BW64') or form != b'WAVE':
+                raise ValueError("Fichier WAV invalide")
+            self.kind = 'RIFF' if riff == b'RIFF' else 'RF64'
+            self.header = start + self._riff_chunks()
+
+    @property
+    def frames(self) -> int:
+        """Nombre de frames (un échantillon par canal)."""
+        return self.data_size // self.block_align
+
+    @property
+    def samples_count(self) -> int:
+        """Nombre d'échantillons, tous canaux confondus."""
+        return self.frames * self.channels
+
+    def blocks(self, first: int = MAX_READ) -> Iterator[bytearray]:
+        """
+        Lit les données audio par blocs modifiables.
+
+        La taille des blocs double à chaque lecture, de first à MAX_READ
+        frames (first peut dépasser MAX_READ : un seul bloc). Tous les blocs
+        sauf le dernier contiennent un nombre entier de frames.
+
+        Args:
+            first: Nombre de frames du premier bloc
+
+        Yields:
+            Octets de chaque bloc ; la lecture s'arrête à la fin des données
+            ou du fichier
+        """
+        remaining = self.data_size
+        count = first
+        while remaining:
+            buffer = bytearray(min(remaining, count * self.block_align))
+            length = _read_into(self.stream, buffer)
+            if not length:
+                return
+            remaining = remaining - length if length == len(buffer) else 0
+            yield buffer if length == len(buffer) else buffer[:length]
+            count = min(count * 2, MAX_READ)
+
+    def samples(self, first: int = FIRST_READ) -> Iterator[np.ndarray]:
+        """
+        Lit les échantillons par blocs de frames (voir blocks) : un petit
+        message n'est lu que sur quelques Ko, quelle que soit la taille du
+        fichier, et la mémoire reste bornée par un bloc.
+
+        Args:
+            first: Nombre de frames du premier bloc
+
+        Yields:
+            Échantillons (int16, canaux entrelacés)
+        """
+        for block in self.blocks(first):
+            yield np.frombuffer(block, dtype='<i2', count=len(block) // 2)
+
+    def trailer(self) -> Iterator[bytes]:
+        """Octets qui suivent les données audio, jusqu'à la fin du fichier (après blocks)."""
+        while True:
+            data = self.stream.read(COPY_SIZE)
+            if not data:
+                return
+            yield data
+
+    def _riff_chunks(self) -> bytes:
+        stream = self.stream
+        header = bytearray()
+        data_size = None
+        while True:
+            chunk = _read_exact(stream, _CHUNK.size)
+            chunk_id, length = _CHUNK.unpack(chunk)
+            header += chunk
+            if chunk_id == b'data':
+                if self.kind == 'RF64' and length == 0xFFFFFFFF:
+                    if data_size is None:
+                        raise ValueError("Fichier RF64 invalide : chunk ds64 absent")
+                    length = data_size
+                self._set_data(length)
+                return bytes(header)
+            body = _read_exact(stream, length + (length & 1))
+            header += body
+            if chunk_id == b'fmt ':
+                self._set_format(body[:length])
+            elif chunk_id == b'ds64':
+                data_size = _DS64.unpack_from(body)[1]
+
+    def _w64_chunks(self) -> bytes:
+        stream = self.stream
+        header = bytearray()
+        while True:
+            chunk = _read_exact(stream, _W64_CHUNK.size)
+            guid, length = _W64_CHUNK.unpack(chunk)
+            if length < _W64_CHUNK.size:
+                raise ValueError("Fichier Wave64 invalide")
+            header += chunk
+            length -= _W64_CHUNK.size
+            if guid == _W64_DATA:
+                self._set_data(length)
+                return bytes(header)
+            body = _read_exact(stream, length + -length % 8)
+            header += body
+            if guid == _W64_FMT:
+                self._set_format(body[:length])
+
+    def _set_format(self, body: bytes) -> None:
+        if len(body) < _FMT.size:
+            raise ValueError("Fichier WAV invalide : chunk fmt tronqué")
+        tag, channels, framerate, _, block_align, bits = _FMT.unpack_from(body)
+        if tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 40 and body[26:40] == _PCM_SUBTYPE:
+            tag = int.from_bytes(body[24:26], 'little')
+        if tag != WAVE_FORMAT_PCM or bits != 16 or not channels or block_align != channels * 2:
+            raise ValueError("Seuls les fichiers audio PCM 16-bit sont supportés")
+        self.channels = channels
+        self.framerate = framerate
+        self.block_align = block_align
+
+    def _set_data(self, length: int) -> None:
+        if not self.block_align:
+            raise ValueError("Fichier WAV invalide : chunk fmt absent avant les données")
+        self.data_size = length
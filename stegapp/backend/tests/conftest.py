@@ -0,0 +1,24 @@
+"""
+Configuration commune des tests : les benchmarks (marqueur slow) ne sont
+lancés qu'avec l'option --runslow (make benchmark).
+"""
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption('--runslow', action='store_true', default=False,
+                     help="lancer aussi les tests marqués slow (benchmarks)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "slow: marks tests as slow (lancés avec --runslow)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--runslow'):
+        return
+    skip_slow = pytest.mark.skip(reason="test lent : relancer avec --runslow")
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip_slow)
@@ -0,0 +1,379 @@
+"""
+Tests de l'API Flask (client de test, sans serveur).
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from api import app
+from stego.bitmap import BitmapSteganography
+from stego.payload import HEADER_BITS
+
+
+@pytest.fixture
+def client():
+    """Client de test Flask."""
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def test_image():
+    """Crée une image PNG de test."""
+    img_array = np.random.randint(0, 256, (100, 100, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(img_array).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def test_hide_and_extract_text(client, test_image):
+    """Cacher puis extraire un texte."""
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'data': 'Bonjour',
+    })
+    assert response.status_code == 200
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.png'),
+    })
+    assert response.status_code == 200
+    assert response.get_json()['data'] == 'Bonjour'
+
+
+def test_hide_and_extract_binary_file(client, test_image):
+    """Un fichier binaire est restitué en téléchargement application/octet-stream."""
+    file_data = bytes(range(256))
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'payload': (io.BytesIO(file_data), 'cle privee.bin'),
+        'password': 'secret',
+    })
+    assert response.status_code == 200
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.png'),
+        'password': 'secret',
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'application/octet-stream'
+    assert response.data == file_data
+    assert 'cle_privee.bin' in response.headers['Content-Disposition']
+    assert response.headers['X-Payload-Size'] == str(len(file_data))
+
+
+def test_hide_without_data(client, test_image):
+    """Ni texte ni fichier : erreur 400."""
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+    })
+    assert response.status_code == 400
+
+
+def test_capacity_with_sample(client, test_image):
+    """La capacité effective tient compte de la compression d'un échantillon."""
+    response = client.post('/api/capacity/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'sample': '{"level": "INFO", "message": "ok"}\n' * 50,
+    })
+    result = response.get_json()
+    
+    assert response.status_code == 200
+    assert result['compression'] == 'auto'
+    assert result['effective_capacity_bytes'] > result['capacity_bytes'] * 5
+
+
+def test_hide_with_bits_per_channel(client, test_image):
+    """La capacité et l'insertion acceptent plusieurs bits par canal."""
+    response = client.post('/api/capacity/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'bits_per_channel': '4',
+    })
+    result = response.get_json()
+    assert result['bits_per_channel'] == 4
+    
+    text = "x" * (result['capacity_bytes'] - 100)
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'data': text,
+        'bits_per_channel': '4',
+    })
+    assert response.status_code == 200
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.png'),
+    })
+    assert response.get_json()['data'] == text
+    
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'data': text,
+        'bits_per_channel': '8',
+    })
+    assert response.status_code == 400
+
+
+def test_hide_with_output_profile(client, test_image):
+    """Le profil de sortie détermine le type et le nom du fichier renvoyé."""
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'data': 'Bonjour',
+        'output': 'webp',
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'image/webp'
+    assert 'hidden_data.webp' in response.headers['Content-Disposition']
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.webp'),
+    })
+    assert response.get_json()['data'] == 'Bonjour'
+
+
+def test_hide_with_compression(client, test_image):
+    """Un texte trop long pour l'image y tient une fois compressé."""
+    text = "ligne de journal\n" * 300
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'data': text,
+        'compression': 'auto',
+    })
+    assert response.status_code == 200
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.png'),
+    })
+    assert response.get_json()['data'] == text
+
+
+def test_health_reports_kdf_cache(client):
+    """Les compteurs du cache de clés sont exposés."""
+    result = client.get('/api/health').get_json()
+    assert set(result['kdf_cache']) == {'hits', 'misses', 'size', 'maxsize'}
+
+
+def test_extract_wrong_password(client, test_image):
+    """Un mauvais mot de passe est signalé par une réponse 401."""
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'data': 'Secret',
+        'password': 'correct',
+    })
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.png'),
+        'password': 'wrong',
+    })
+    assert response.status_code == 401
+    assert response.get_json()['code'] == 'invalid_password'
+
+
+def _blank_pdf():
+    from PyPDF2 import PdfWriter
+    
+    writer = PdfWriter()
+    writer.add_blank_page(width=612, height=792)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_pdf_simple_wrong_password():
+    """Moteur PDF simplifié : un mauvais mot de passe lève PasswordError, pas InvalidToken."""
+    from stego.crypto import PasswordError
+    from stego.pdf_meta_simple import PDFSteganographySimple
+    
+    stego = PDFSteganographySimple()
+    modified = stego.hide_data(_blank_pdf(), 'Secret', 'correct')
+    
+    assert stego.extract_data(modified, 'correct') == 'Secret'
+    with pytest.raises(PasswordError):
+        stego.extract_data(modified, 'wrong')
+
+
+def test_extract_pdf_wrong_password(client):
+    """PDF : un mauvais mot de passe est lui aussi signalé par une réponse 401."""
+    response = client.post('/api/hide/pdf', data={
+        'file': (io.BytesIO(_blank_pdf()), 'document.pdf'),
+        'data': 'Secret',
+        'password': 'correct',
+    })
+    assert response.status_code == 200
+    
+    response = client.post('/api/extract/pdf', data={
+        'file': (io.BytesIO(response.data), 'hidden.pdf'),
+        'password': 'wrong',
+    })
+    assert response.status_code == 401
+    assert response.get_json()['code'] == 'invalid_password'
+
+
+def test_hide_keeps_bmp_format(client, test_image, monkeypatch):
+    """Une image BMP est renvoyée au format BMP, modifiée en place sur le disque."""
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(test_image)).save(buffer, format='BMP')
+    hide_file = BitmapSteganography.hide_file
+    calls = []
+    
+    def spy(self, *args, **kwargs):
+        calls.append(args[:2])
+        return hide_file(self, *args, **kwargs)
+    
+    monkeypatch.setattr(BitmapSteganography, 'hide_file', spy)
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(buffer.getvalue()), 'image.bmp'),
+        'data': 'Bonjour',
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'image/bmp'
+    assert len(response.data) == len(buffer.getvalue())
+    assert len(calls) == 1
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.bmp'),
+    })
+    assert response.get_json()['data'] == 'Bonjour'
+
+
+def test_hide_keeps_gif_palette(client, test_image):
+    """Une image GIF est renvoyée au format GIF, sans conversion en RGB."""
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(test_image)).quantize(64).save(buffer, format='GIF')
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(buffer.getvalue()), 'image.gif'),
+        'data': 'Bonjour',
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'image/gif'
+    assert Image.open(io.BytesIO(response.data)).mode == 'P'
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.gif'),
+    })
+    assert response.get_json()['data'] == 'Bonjour'
+
+
+def test_hide_keeps_jpeg(client, test_image):
+    """Une image JPEG est renvoyée au format JPEG, de taille proche."""
+    gradient = np.add.outer(np.arange(240), np.arange(320)) % 256
+    pixels = (np.stack([gradient] * 3, axis=-1) + np.random.randint(0, 40, (240, 320, 3))).clip(0, 255)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(buffer, format='JPEG')
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(buffer.getvalue()), 'photo.jpg'),
+        'data': 'Bonjour',
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert 'hidden_data.jpg' in response.headers['Content-Disposition']
+    assert abs(len(response.data) - len(buffer.getvalue())) < 1024
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.jpg'),
+    })
+    assert response.get_json()['data'] == 'Bonjour'
+
+
+def test_hide_animated_gif(client, test_image):
+    """Un GIF animé est renvoyé en PNG animé, avec toutes ses images."""
+    frames = [Image.open(io.BytesIO(test_image)).quantize(64), Image.open(io.BytesIO(test_image)).quantize(32)]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format='GIF', save_all=True, append_images=frames[1:], duration=100)
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(buffer.getvalue()), 'anim.gif'),
+        'data': 'Bonjour',
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert Image.open(io.BytesIO(response.data)).n_frames == 2
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.png'),
+    })
+    assert response.get_json()['data'] == 'Bonjour'
+
+
+def test_hide_and_extract_video(client):
+    """Vidéo YUV4MPEG2 : capacité, insertion et extraction par l'API."""
+    video = b'YUV4MPEG2 W32 H16 F25:1 C420jpeg\n' + (b'FRAME\n' + np.random.bytes(32 * 16 * 3 // 2)) * 3
+    response = client.post('/api/capacity/video', data={
+        'file': (io.BytesIO(video), 'clip.y4m'),
+        'bits_per_channel': '2',
+    })
+    assert response.get_json()['capacity'] == 2 * (3 * 32 * 16 - HEADER_BITS)
+    
+    response = client.post('/api/hide/video', data={
+        'file': (io.BytesIO(video), 'clip.y4m'),
+        'data': 'Bonjour',
+    })
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'video/x-yuv4mpeg'
+    assert len(response.data) == len(video)
+    
+    response = client.post('/api/extract/video', data={
+        'file': (io.BytesIO(response.data), 'hidden.y4m'),
+    })
+    assert response.get_json()['data'] == 'Bonjour'
+
+
+def test_hide_scattered(client, test_image):
+    """Le champ scatter disperse les données ; il exige un mot de passe."""
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'data': 'Bonjour',
+        'scatter': 'true',
+    })
+    assert response.status_code == 400
+    
+    response = client.post('/api/hide/image', data={
+        'file': (io.BytesIO(test_image), 'image.png'),
+        'data': 'Bonjour',
+        'password': 'secret',
+        'scatter': 'true',
+    })
+    assert response.status_code == 200
+    
+    response = client.post('/api/extract/image', data={
+        'file': (io.BytesIO(response.data), 'hidden.png'),
+        'password': 'secret',
+    })
+    assert response.get_json()['data'] == 'Bonjour'
+
+
+def test_hide_audio_streamed(client):
+    """L'audio est renvoyé en flux, avec les en-têtes d'origine ; un message trop grand reste une erreur 500."""
+    import wave
+    
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(np.random.randint(-20000, 20000, 44100 * 2, dtype=np.int16).tobytes())
+    audio = buffer.getvalue()
+    response = client.post('/api/hide/audio', data={
+        'file': (io.BytesIO(audio), 'son.wav'),
+        'data': 'Bonjour',
+    })
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'audio/wav'
+    assert 'hidden_data.wav' in response.headers['Content-Disposition']
+    assert len(response.data) == len(audio) and response.data[:44] == audio[:44]
+    
+    response = client.post('/api/extract/audio', data={
+        'file': (io.BytesIO(response.data), 'hidden.wav'),
+    })
+    assert response.get_json()['data'] == 'Bonjour'
+    
+    response = client.post('/api/hide/audio', data={
+        'file': (io.BytesIO(audio), 'son.wav'),
+        'data': 'x' * 20000,
+    })
+    assert response.status_code == 500
+    assert 'volumineuses' in response.get_json()['error']
@@ -3,10 +3,15 @@ Tests pour le module de stéganographie audio.
 """
 
 import pytest
+import struct
 import wave
 import numpy as np
 import io
-from stego.audio import AudioSteganography
+from stego.audio import FIRST_READ, AudioSteganography
+from stego.audio_alt import AudioSteganographyAlt
+from stego.lsb import embed_lsb_chunks
+from stego.payload import stream_payload
+from stego.wav import MAX_READ, WavReader
 
 
 @pytest.fixture
@@ -82,6 +87,23 @@ def test_hide_with_wrong_password(stego_instance, test_audio):
         stego_instance.extract_data(modified_audio, wrong_password)
 
 
+def test_scattered_embedding(stego_instance, test_audio):
+    """Test de la dispersion des données sur les échantillons."""
+    test_data = "Message dispersé " * 50
+    
+    modified_audio = stego_instance.hide_data(test_audio, test_data, "secret", scatter=True)
+    
+    assert stego_instance.extract_data(modified_audio, "secret") == test_data
+    with pytest.raises(ValueError):
+        stego_instance.extract_data(modified_audio, "wrong")
+    
+    # Les échantillons modifiés ne sont pas regroupés au début du fichier
+    with wave.open(io.BytesIO(test_audio), 'rb') as original, wave.open(io.BytesIO(modified_audio), 'rb') as modified:
+        before = np.frombuffer(original.readframes(original.getnframes()), dtype=np.int16)
+        after = np.frombuffer(modified.readframes(modified.getnframes()), dtype=np.int16)
+    assert np.flatnonzero(before != after).max() > before.size * 0.9
+
+
 def test_data_too_large(stego_instance, test_audio):
     """Test avec des données trop volumineuses."""
     # Créer des données trop grandes
@@ -137,3 +159,180 @@ def test_wrong_audio_format():
     
     with pytest.raises(Exception):
         stego_instance.hide_data(fake_audio, "test data")
+
+
+def _stereo(frames):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(np.random.randint(-20000, 20000, frames * 2, dtype=np.int16).tobytes())
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('engine', [AudioSteganography, AudioSteganographyAlt])
+def test_extract_reads_only_payload(engine, monkeypatch):
+    """Un court message n'entraîne la lecture que des premiers blocs de frames."""
+    carrier = AudioSteganography().hide_data(_stereo(1 << 20), "court message")
+    requested = []
+    samples = WavReader.samples
+    
+    def spy(self, first):
+        for block in samples(self, first):
+            requested.append(block.size // self.channels)
+            yield block
+    
+    monkeypatch.setattr(WavReader, 'samples', spy)
+    assert engine().extract_data(carrier) == "court message"
+    assert sum(requested) <= FIRST_READ * 3
+
+
+def test_extract_across_read_blocks(stego_instance, tmp_path):
+    """Un message réparti sur plusieurs blocs de lecture, depuis un chemin."""
+    message = np.random.bytes(20000)
+    path = tmp_path / 'stereo.wav'
+    path.write_bytes(stego_instance.hide_data(_stereo(200000), message))
+    
+    assert stego_instance.extract_data(str(path)) == message
+    assert AudioSteganographyAlt().extract_data(str(path)) == message
+
+
+_W64_SUFFIX = bytes.fromhex('f3acd3118cd100c04f8edb8a')
+_TRAILER = b'LIST' + struct.pack('<I', 10) + b'INFOICMT\x00\x00'
+
+
+def _rf64(riff):
+    """Convertit un WAV produit par le module wave en RF64, suivi d'un chunk LIST."""
+    fmt, data = riff[12:36], riff[44:]
+    ds64 = b'ds64' + struct.pack('<IQQQI', 28, 0, len(data), len(data) // 4, 0)
+    body = b'WAVE' + ds64 + fmt + b'data' + struct.pack('<I', 0xFFFFFFFF) + data + _TRAILER
+    return b'RF64' + struct.pack('<I', 0xFFFFFFFF) + body
+
+
+def _w64(riff):
+    """Convertit un WAV produit par le module wave en Sony Wave64, suivi d'un chunk LIST."""
+    fmt, data = riff[20:36], riff[44:]
+    chunks = (b'fmt ' + _W64_SUFFIX + struct.pack('<Q', 24 + len(fmt)) + fmt
+              + b'data' + _W64_SUFFIX + struct.pack('<Q', 24 + len(data)) + data + bytes(-len(data) % 8)
+              + b'list' + _W64_SUFFIX + struct.pack('<Q', 24 + len(_TRAILER)) + _TRAILER)
+    return (b'riff' + bytes.fromhex('2e91cf11a5d628db04c10000') + struct.pack('<Q', 40 + len(chunks))
+            + b'wave' + _W64_SUFFIX + chunks)
+
+
+def _extensible(riff):
+    """Remplace le chunk fmt par sa forme WAVE_FORMAT_EXTENSIBLE (sous-format PCM)."""
+    fmt = riff[20:34] + struct.pack('<HHHI', 16, 22, 16, 3) + bytes.fromhex('0100000000001000800000aa00389b71')
+    body = b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + riff[36:]
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+@pytest.mark.parametrize('convert', [_rf64, _w64, _extensible])
+def test_other_containers(stego_instance, convert):
+    """RF64, Wave64, format étendu : mêmes échantillons modifiés, en-têtes et fin de fichier recopiés."""
+    riff = _stereo(30000)
+    carrier = convert(riff)
+    message = np.random.bytes(5000)
+    expected = stego_instance.hide_data(riff, message)
+    
+    modified = stego_instance.hide_data(carrier, message)
+    
+    start = carrier.index(riff[44:44 + 64])
+    assert len(modified) == len(carrier)
+    assert modified[:start] == carrier[:start]
+    assert modified[start:start + len(riff) - 44] == expected[44:]
+    assert modified[start + len(riff) - 44:] == carrier[start + len(riff) - 44:]
+    assert stego_instance.extract_data(modified) == message
+    assert stego_instance.get_capacity(carrier) == stego_instance.get_capacity(riff)
+    assert stego_instance.extract_data(stego_instance.hide_data(carrier, "dispersé", "secret", scatter=True),
+                                       "secret") == "dispersé"
+
+
+def test_hide_across_blocks(stego_instance, tmp_path, monkeypatch):
+    """Message réparti sur plusieurs blocs : identique à l'insertion en une passe, blocs bornés."""
+    riff = _stereo(MAX_READ + MAX_READ // 2)
+    message = np.random.bytes(300000)
+    blocks = WavReader.blocks
+    sizes = []
+    
+    def spy(self, first=MAX_READ):
+        for block in blocks(self, first):
+            sizes.append(len(block))
+            yield block
+    
+    monkeypatch.setattr(WavReader, 'blocks', spy)
+    source, output = tmp_path / 'source.wav', tmp_path / 'output.wav'
+    source.write_bytes(_rf64(riff))
+    stego_instance.hide_file(str(source), str(output), message)
+    
+    size, chunks = stream_payload(message)
+    samples = np.frombuffer(riff[44:], dtype=np.int16).copy()
+    embed_lsb_chunks(samples, chunks)
+    modified = output.read_bytes()
+    assert modified[:-len(_TRAILER)].endswith(samples.tobytes())
+    assert sizes == [MAX_READ * 4, MAX_READ * 2]
+    assert stego_instance.extract_data(str(output)) == message
+
+
+def test_scatter_across_blocks(stego_instance, tmp_path, monkeypatch):
+    """Corps dispersé écrit et relu bloc par bloc : aucun bloc ne couvre tout le fichier."""
+    riff = _stereo(MAX_READ + MAX_READ // 2)
+    message = np.random.bytes(20000)
+    blocks = WavReader.blocks
+    sizes = []
+    
+    def spy(self, first=MAX_READ):
+        for block in blocks(self, first):
+            sizes.append(len(block))
+            yield block
+    
+    monkeypatch.setattr(WavReader, 'blocks', spy)
+    source, output = tmp_path / 'source.wav', tmp_path / 'output.wav'
+    source.write_bytes(riff)
+    stego_instance.hide_file(str(source), str(output), message, "secret", scatter=True)
+    
+    assert sizes == [MAX_READ * 4, MAX_READ * 2]
+    modified = output.read_bytes()
+    assert modified[44 + MAX_READ * 4:] != riff[44 + MAX_READ * 4:]
+    
+    sizes.clear()
+    assert stego_instance.extract_data(str(output), "secret") == message
+    assert max(sizes) <= MAX_READ * 4
+
+
+class ShortReads(io.BytesIO):
+    """Flux qui rend au plus 1000 octets par lecture, comme un tube ou une socket."""
+    
+    def readinto(self, buffer):
+        return super().readinto(memoryview(buffer)[:1000])
+
+
+@pytest.mark.parametrize('scatter', [False, True])
+def test_hide_short_reads(stego_instance, test_audio, scatter):
+    """Lectures partielles : aucune donnée perdue, même avec la dispersion."""
+    password = "secret" if scatter else None
+    message = "lu par morceaux " * 20
+    
+    modified = b''.join(stego_instance.hide_stream(ShortReads(test_audio), message, password, scatter=scatter))
+    
+    assert len(modified) == len(test_audio)
+    assert stego_instance.extract_data(modified, password) == message
+    if not scatter:
+        assert modified == stego_instance.hide_data(test_audio, message)
+
+
+def test_unsupported_containers(stego_instance):
+    """24 bits, RIFX, fichier tronqué : erreurs avant toute écriture."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(3)
+        wav_file.setframerate(44100)
+        wav_file.writeframes(bytes(3000))
+    
+    with pytest.raises(ValueError, match="PCM 16-bit"):
+        stego_instance.hide_stream(io.BytesIO(buffer.getvalue()), "x")
+    with pytest.raises(ValueError, match="invalide"):
+        stego_instance.hide_stream(io.BytesIO(b'RIFX' + _stereo(1000)[4:]), "x")
+    with pytest.raises(ValueError, match="tronqué"):
+        stego_instance.hide_stream(io.BytesIO(_stereo(1000)[:30]), "x")
@@ -0,0 +1,83 @@
+"""
+Tests pour les tampons de bits compacts.
+"""
+
+import numpy as np
+import pytest
+from stego.bitbuffer import BitReader, BitWriter, pack_bits, unpack_bits
+
+
+def test_unpack_pack_roundtrip():
+    """Aller-retour octets -> bits -> octets."""
+    data = b"Hello \x00\xff"
+    bits = unpack_bits(data)
+    
+    assert bits.size == len(data) * 8
+    assert bits[:8].tolist() == [0, 1, 0, 0, 1, 0, 0, 0]  # 'H'
+    assert pack_bits(bits) == data
+
+
+def test_writer_mixed_writes():
+    """Écritures alignées et non alignées."""
+    writer = BitWriter()
+    writer.write_uint(0b101, 3)
+    writer.write_bytes(b"\xff")
+    writer.write_bits(np.array([0, 1], dtype=np.uint8))
+    
+    assert len(writer) == 13
+    assert writer.to_bits().tolist() == [1, 0, 1] + [1] * 8 + [0, 1]
+    assert writer.getvalue() == bytes([0b10111111, 0b11101000])
+
+
+def test_writer_uint_out_of_range():
+    """Un entier trop grand pour la largeur demandée est refusé."""
+    with pytest.raises(ValueError):
+        BitWriter().write_uint(8, 3)
+
+
+def test_reader_roundtrip():
+    """Relecture de ce qui a été écrit, à travers plusieurs blocs."""
+    writer = BitWriter()
+    writer.write_uint(5, 4)
+    writer.write_bytes(b"donnees")
+    writer.write_uint(1234, 16)
+    data = writer.getvalue()
+    
+    reader = BitReader(data[i:i + 3] for i in range(0, len(data), 3))
+    assert reader.read_uint(4) == 5
+    assert reader.read_bytes(7) == b"donnees"
+    assert reader.read_uint(16) == 1234
+
+
+def test_reader_is_lazy():
+    """Seuls les blocs nécessaires sont demandés à la source."""
+    requested = []
+    
+    def chunks():
+        for i in range(100):
+            requested.append(i)
+            yield b"\x00" * 4
+    
+    reader = BitReader(chunks())
+    reader.read_bytes(6)
+    assert len(requested) == 2
+
+
+def test_reader_small_reads():
+    """Petites lectures successives, alignées ou non, puis reste non consommé."""
+    data = np.random.bytes(4096)
+    reader = BitReader([data[:1000], data[1000:]])
+    
+    assert b''.join(reader.read_bytes(1) for _ in range(1500)) == data[:1500]
+    assert reader.read_uint(4) == data[1500] >> 4
+    assert reader.read_uint(4) == data[1500] & 0x0F
+    assert b''.join(reader.read_bytes(3) for _ in range(300)) == data[1501:2401]
+    assert b''.join(reader.remaining()) == data[2401:]
+
+
+def test_reader_exhausted():
+    """Une source épuisée renvoie moins de données."""
+    reader = BitReader([b"ab"])
+    assert reader.read_bytes(5) == b"ab"
+    with pytest.raises(EOFError):
+        reader.read_uint(8)
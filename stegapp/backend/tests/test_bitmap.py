@@ -0,0 +1,156 @@
+"""
+Tests pour l'insertion en place dans les images BMP et TIFF non compressées.
+"""
+
+import io
+import struct
+
+import numpy as np
+import pytest
+from PIL import Image
+from stego import bitmap
+from stego.bitmap import BitmapSteganography, read_layout
+from stego.image import ImageSteganography
+
+
+def _image_bytes(mode, format, width=13, height=7, **options):
+    """Image aléatoire enregistrée dans le format demandé (13 pixels : lignes BMP complétées)."""
+    if mode == 'I;16':
+        array = np.random.randint(0, 65536, (height, width), dtype=np.uint16)
+        image = Image.frombuffer('I;16', (width, height), array.astype('<u2').tobytes(), 'raw', 'I;16', 0, 1)
+    else:
+        bands = len(Image.new(mode, (1, 1)).getbands())
+        array = np.random.randint(0, 256, (height, width, bands), dtype=np.uint8)
+        image = Image.fromarray(array[:, :, 0] if bands == 1 else array, mode)
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+def _top_down(data):
+    """Réécrit un BMP stocké de bas en haut en BMP stocké de haut en bas."""
+    layout = read_layout(np.frombuffer(data, dtype=np.uint8))
+    rows = [data[layout.offset + row * layout.stride:layout.offset + (row + 1) * layout.stride]
+            for row in range(layout.height)]
+    header = bytearray(data[:layout.offset])
+    header[22:26] = struct.pack('<i', -layout.height)
+    return bytes(header) + b''.join(reversed(rows)) + data[layout.end:]
+
+
+@pytest.mark.parametrize('mode,format', [
+    ('RGB', 'BMP'), ('RGBA', 'BMP'), ('L', 'BMP'),
+    ('RGB', 'TIFF'), ('RGBA', 'TIFF'), ('L', 'TIFF'), ('LA', 'TIFF'), ('I;16', 'TIFF'),
+])
+def test_layout_matches_pillow(mode, format):
+    """La vue mappée parcourt les pixels dans l'ordre de Pillow."""
+    data = _image_bytes(mode, format)
+    layout = read_layout(np.frombuffer(data, dtype=np.uint8))
+    expected = np.array(Image.open(io.BytesIO(data)))
+
+    assert layout is not None and layout.format == format
+    assert np.array_equal(layout.pixels(np.frombuffer(data, dtype=np.uint8)).reshape(expected.shape), expected)
+
+
+def test_top_down_bmp():
+    """Un BMP stocké de haut en bas (hauteur négative) est lu dans le bon ordre."""
+    data = _top_down(_image_bytes('RGB', 'BMP'))
+    buffer = np.frombuffer(data, dtype=np.uint8)
+
+    assert not read_layout(buffer).bottom_up
+    assert np.array_equal(read_layout(buffer).pixels(buffer), np.array(Image.open(io.BytesIO(data))))
+
+
+def test_unsupported_images():
+    """Images compressées ou d'un autre format : pas d'insertion en place."""
+    for data in (_image_bytes('RGB', 'TIFF', compression='tiff_lzw'), _image_bytes('RGB', 'PNG'),
+                 _image_bytes('RGB', 'JPEG'), _image_bytes('P', 'BMP'), b'', b'BM'):
+        assert read_layout(np.frombuffer(data, dtype=np.uint8)) is None
+        assert not BitmapSteganography().supports(data)
+
+
+@pytest.mark.parametrize('mode,format', [('RGB', 'BMP'), ('RGBA', 'BMP'), ('L', 'TIFF'), ('I;16', 'TIFF')])
+@pytest.mark.parametrize('bits_per_channel', [1, 3])
+def test_hide_in_place(mode, format, bits_per_channel):
+    """Seuls les pixels changent ; l'image se relit aussi après décodage par Pillow."""
+    data = _image_bytes(mode, format, 64, 48)
+    stego = BitmapSteganography()
+    modified = stego.hide_data(data, "Message en place", bits_per_channel=bits_per_channel)
+    layout = read_layout(np.frombuffer(data, dtype=np.uint8))
+
+    assert len(modified) == len(data)
+    assert modified[:layout.offset] == data[:layout.offset]
+    assert Image.open(io.BytesIO(modified)).format == format
+    assert stego.extract_data(modified) == "Message en place"
+    assert ImageSteganography()._extract_pixels(Image.open(io.BytesIO(modified)), None) == "Message en place"
+
+
+def test_row_padding_untouched():
+    """Les octets de remplissage des lignes BMP ne sont pas modifiés."""
+    data = _image_bytes('RGB', 'BMP', 13, 40)
+    modified = BitmapSteganography().hide_data(data, "x" * 150)
+    layout = read_layout(np.frombuffer(data, dtype=np.uint8))
+
+    for row in range(layout.height):
+        start = layout.offset + row * layout.stride + layout.width * 3
+        end = layout.offset + (row + 1) * layout.stride
+        assert modified[start:end] == data[start:end]
+
+
+def test_image_engine_round_trip():
+    """Le moteur image relit une image produite en place, et inversement."""
+    data = _image_bytes('RGB', 'BMP', 64, 48)
+    stego = ImageSteganography()
+
+    in_place = stego.hide_data(data, "en place", password="secret", output='same')
+    assert len(in_place) == len(data)
+    assert stego.extract_data(in_place, "secret") == "en place"
+
+    decoded = stego.hide_data(data, "décodée", output='bmp')
+    assert BitmapSteganography().extract_data(decoded) == "décodée"
+
+
+def test_batches(monkeypatch):
+    """L'en-tête et le corps peuvent s'étendre sur plusieurs lots de lignes."""
+    monkeypatch.setattr(bitmap, 'BATCH_SIZE', 100)
+    monkeypatch.setattr(bitmap, 'FIRST_BATCH', 50)
+    data = _top_down(_image_bytes('RGB', 'BMP', 13, 200))
+    stego = BitmapSteganography()
+    message = "plusieurs lots " * 20
+
+    assert stego.extract_data(stego.hide_data(data, message, bits_per_channel=2)) == message
+
+
+def test_multiple_strips():
+    """Un TIFF découpé en plusieurs bandes contiguës est pris en charge."""
+    data = _image_bytes('RGB', 'TIFF', 300, 400, tiffinfo={278: 50})  # RowsPerStrip
+    stego = BitmapSteganography()
+
+    assert len(Image.open(io.BytesIO(data)).tag_v2[273]) == 8
+    assert read_layout(np.frombuffer(data, dtype=np.uint8)) is not None
+    assert stego.extract_data(stego.hide_data(data, "bandes")) == "bandes"
+
+
+def test_hide_file(tmp_path):
+    """hide_file modifie une copie de l'image sur le disque."""
+    source = tmp_path / 'image.bmp'
+    target = tmp_path / 'cachee.bmp'
+    source.write_bytes(_image_bytes('RGB', 'BMP', 64, 48))
+    original = source.read_bytes()
+    stego = BitmapSteganography()
+
+    stego.hide_file(str(source), str(target), "sur disque")
+
+    assert source.read_bytes() == original
+    assert stego.extract_data(str(target)) == "sur disque"
+    assert stego.hide_data(str(source), "copie sur écriture") != original
+    assert source.read_bytes() == original
+
+
+def test_data_too_large():
+    """Les données trop volumineuses sont refusées avant toute modification."""
+    data = _image_bytes('RGB', 'BMP', 10, 10)
+    stego = BitmapSteganography()
+
+    assert stego.get_capacity(data) == ImageSteganography().get_capacity(data)
+    with pytest.raises(ValueError):
+        stego.hide_data(data, "x" * 100)
@@ -0,0 +1,65 @@
+"""
+Tests pour la compression des données avant insertion.
+"""
+
+import json
+
+import pytest
+from stego.compression import (
+    COMPRESSION_NONE,
+    COMPRESSION_METHODS,
+    compress_data,
+    compression_ratio,
+    decompress_data,
+)
+
+
+@pytest.fixture
+def json_data():
+    """Données JSON très compressibles."""
+    records = [{'id': i, 'level': 'INFO', 'message': 'requete traitee'} for i in range(200)]
+    return json.dumps(records).encode()
+
+
+@pytest.mark.parametrize('method', sorted(COMPRESSION_METHODS))
+def test_compress_decompress_roundtrip(method, json_data):
+    """Aller-retour pour chaque algorithme."""
+    algorithm, compressed = compress_data(json_data, method)
+    
+    assert algorithm == COMPRESSION_METHODS[method]
+    assert len(compressed) < len(json_data)
+    assert decompress_data(compressed, algorithm, len(json_data)) == json_data
+
+
+def test_auto_keeps_smallest(json_data):
+    """Le mode auto garde le plus petit résultat."""
+    algorithm, compressed = compress_data(json_data, 'auto')
+    sizes = [len(compress_data(json_data, method)[1]) for method in COMPRESSION_METHODS]
+    
+    assert len(compressed) == min(sizes)
+    assert algorithm != COMPRESSION_NONE
+
+
+def test_auto_skips_incompressible():
+    """Des données incompressibles ne sont pas compressées."""
+    data = bytes(range(16))
+    assert compress_data(data, 'auto') == (COMPRESSION_NONE, data)
+
+
+def test_unknown_method():
+    """Une méthode inconnue est refusée."""
+    with pytest.raises(ValueError):
+        compress_data(b"data", 'zstd')
+
+
+def test_decompress_size_mismatch(json_data):
+    """Une taille annoncée incorrecte est détectée."""
+    algorithm, compressed = compress_data(json_data, 'zlib')
+    with pytest.raises(ValueError, match="incohérente"):
+        decompress_data(compressed, algorithm, 100)
+
+
+def test_compression_ratio(json_data):
+    """Le rapport reflète le gain de compression."""
+    assert compression_ratio(json_data) > 5
+    assert compression_ratio(b"") == 1.0
@@ -0,0 +1,121 @@
+"""
+Tests pour le chiffrement des données cachées.
+"""
+
+import io
+
+import pytest
+from stego.crypto import (
+    CIPHER_AES_GCM,
+    CIPHER_AES_GCM_STREAM,
+    CIPHER_CHACHA20,
+    CIPHER_FERNET,
+    NONCE_SIZE,
+    TAG_SIZE,
+    PasswordError,
+    cipher_id,
+    decrypt_payload,
+    encrypt_payload,
+    stream_decrypt,
+    stream_encrypt,
+    stream_encrypted_size,
+)
+from stego.kdf import legacy_key
+from stego.utils import encrypt_data
+
+KEY = bytes(range(32))
+
+
+@pytest.mark.parametrize('cipher', [CIPHER_FERNET, CIPHER_AES_GCM, CIPHER_CHACHA20, CIPHER_AES_GCM_STREAM])
+def test_encrypt_decrypt_roundtrip(cipher):
+    """Aller-retour pour chaque algorithme."""
+    data = b"\x00\xff donnees binaires"
+    encrypted = encrypt_payload(data, KEY, cipher)
+    
+    assert encrypted != data
+    assert decrypt_payload(encrypted, KEY, cipher) == data
+
+
+@pytest.mark.parametrize('cipher', [CIPHER_AES_GCM, CIPHER_CHACHA20])
+def test_aead_overhead(cipher):
+    """Le mode AEAD n'ajoute que le nonce et le tag, sans encodage texte."""
+    data = b"x" * 100
+    encrypted = encrypt_payload(data, KEY, cipher)
+    
+    assert len(encrypted) == len(data) + NONCE_SIZE + TAG_SIZE
+    assert len(encrypted) < len(encrypt_payload(data, KEY, CIPHER_FERNET))
+
+
+@pytest.mark.parametrize('cipher', [CIPHER_AES_GCM, CIPHER_CHACHA20])
+def test_aead_wrong_password(cipher):
+    """Un mauvais mot de passe est détecté par le tag d'authentification."""
+    encrypted = encrypt_payload(b"secret", legacy_key("correct"), cipher)
+    
+    with pytest.raises(ValueError, match="Mot de passe incorrect"):
+        decrypt_payload(encrypted, legacy_key("wrong"), cipher)
+
+
+def test_fernet_compatibility():
+    """Les jetons Fernet existants restent déchiffrables."""
+    token = encrypt_data(b"ancien", "password")
+    assert decrypt_payload(token, legacy_key("password"), CIPHER_FERNET) == b"ancien"
+
+
+def test_cipher_id():
+    """Résolution des noms d'algorithmes."""
+    assert cipher_id(None) == CIPHER_FERNET
+    assert cipher_id('aesgcm') == CIPHER_AES_GCM
+    with pytest.raises(ValueError):
+        cipher_id('des')
+
+
+@pytest.mark.parametrize('size', [0, 1, 100, 300])
+@pytest.mark.parametrize('workers', [1, 3])
+def test_stream_roundtrip(size, workers):
+    """Aller-retour segmenté, quels que soient la taille et le parallélisme."""
+    data = bytes(range(256)) * 2
+    data = data[:size]
+    segments = list(stream_encrypt(data, KEY, segment_size=64, workers=workers))
+    encrypted = b''.join(segments)
+    
+    assert len(encrypted) == stream_encrypted_size(size, 64)
+    assert all(len(segment) <= 64 + TAG_SIZE for segment in segments)
+    
+    decrypted = stream_decrypt(io.BytesIO(encrypted).read, KEY, len(encrypted), 64, workers)
+    assert b''.join(decrypted) == data
+
+
+def test_stream_shared_pool():
+    """Les flux réutilisent le pool de threads partagé au lieu d'en créer un chacun."""
+    from stego import lsb
+
+    list(stream_encrypt(bytes(300), KEY, segment_size=64, workers=3))
+    pool = lsb._pools[3]
+    encrypted = b''.join(stream_encrypt(bytes(300), KEY, segment_size=64, workers=3))
+    assert b''.join(stream_decrypt(io.BytesIO(encrypted).read, KEY, len(encrypted), 64, 3)) == bytes(300)
+    assert lsb._pools[3] is pool
+
+
+def test_stream_reads_incrementally():
+    """Le déchiffrement ne lit qu'un segment par thread à la fois."""
+    encrypted = b''.join(stream_encrypt(b"x" * 1000, KEY, segment_size=100))
+    reader = io.BytesIO(encrypted)
+    segments = stream_decrypt(reader.read, KEY, len(encrypted), 100)
+    
+    assert next(segments) == b"x" * 100
+    assert reader.tell() < 2 * (100 + TAG_SIZE)
+
+
+def test_stream_tampering_detected():
+    """Segments permutés ou flux tronqué sont rejetés."""
+    encrypted = b''.join(stream_encrypt(b"a" * 64 + b"b" * 64 + b"c", KEY, segment_size=64))
+    prefix, first, second = encrypted[:7], encrypted[7:87], encrypted[87:167]
+    swapped = prefix + second + first + encrypted[167:]
+    
+    with pytest.raises(PasswordError):
+        b''.join(stream_decrypt(io.BytesIO(swapped).read, KEY, len(swapped), 64))
+    
+    # Couper le dernier segment : l'avant-dernier n'est pas marqué comme tel
+    truncated = encrypted[:167]
+    with pytest.raises(PasswordError):
+        b''.join(stream_decrypt(io.BytesIO(truncated).read, KEY, len(truncated), 64))
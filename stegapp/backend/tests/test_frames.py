@@ -0,0 +1,144 @@
+"""
+Tests pour l'insertion répartie sur les vues des images animées et multipages.
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+from stego.frames import MultiFrameSteganography, frame_bytes
+from stego.image import ImageSteganography
+from stego.payload import HEADER_BITS
+
+
+def _frames(count=4, width=40, height=30, mode='RGB'):
+    bands = len(Image.new(mode, (1, 1)).getbands())
+    return [Image.fromarray(np.random.randint(0, 256, (height, width, bands), dtype=np.uint8).squeeze(), mode)
+            for _ in range(count)]
+
+
+def _save(frames, format, **options):
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format=format, save_all=True, append_images=frames[1:], **options)
+    return buffer.getvalue()
+
+
+def _animated_gif(count=4):
+    frames = [frame.quantize(64) for frame in _frames(count)]
+    return _save(frames, 'GIF', duration=[100, 150, 200, 250][:count], loop=0, optimize=False)
+
+
+def _decoded(data):
+    """Toutes les vues d'une image, en RGBA."""
+    return [np.array(frame.convert('RGBA')) for frame in ImageSequence.Iterator(Image.open(io.BytesIO(data)))]
+
+
+def test_frame_bytes():
+    """Chaque vue porte un nombre entier d'octets, sur un nombre entier de canaux."""
+    assert frame_bytes(1000, 0, 1) == 125
+    assert frame_bytes(1000, HEADER_BITS, 1) == (1000 - HEADER_BITS) // 8
+    assert frame_bytes(1000, 0, 3) == 1000 * 3 // 24 * 3
+    assert frame_bytes(10, HEADER_BITS, 1) == 0
+
+
+@pytest.mark.parametrize('format', ['GIF', 'PNG', 'TIFF'])
+def test_capacity_over_all_frames(format):
+    """La capacité est la somme des capacités des vues."""
+    data = _animated_gif() if format == 'GIF' else _save(_frames(), format)
+    stego = ImageSteganography()
+
+    assert stego.get_capacity(data) == 4 * 40 * 30 * 3 - HEADER_BITS
+    assert stego.get_capacity(data, 2) == 2 * (4 * 40 * 30 * 3 - HEADER_BITS)
+    assert MultiFrameSteganography().get_capacity(data) == stego.get_capacity(data)
+    assert MultiFrameSteganography().image_capacity(Image.open(io.BytesIO(data)), 2) == stego.get_capacity(data, 2)
+
+
+@pytest.mark.parametrize('format,output_format', [('GIF', 'PNG'), ('PNG', 'PNG'), ('TIFF', 'TIFF')])
+@pytest.mark.parametrize('bits_per_channel', [1, 3])
+def test_payload_spread_over_frames(format, output_format, bits_per_channel):
+    """Un message plus grand qu'une vue est réparti sur les suivantes ; aucune vue n'est perdue."""
+    data = _animated_gif() if format == 'GIF' else _save(_frames(), format)
+    stego = ImageSteganography()
+    message = np.random.bytes(40 * 30 * 3 * bits_per_channel * 5 // 16)
+
+    modified = stego.hide_data(data, message, bits_per_channel=bits_per_channel)
+    image = Image.open(io.BytesIO(modified))
+
+    assert image.format == output_format and image.n_frames == 4
+    assert stego.extract_data(modified) == message
+    original, frames = _decoded(data), _decoded(modified)
+    assert not np.array_equal(original[1], frames[1])
+    assert np.array_equal(original[3], frames[3])
+    assert all(np.abs(a.astype(int) - b).max() < 2 ** bits_per_channel for a, b in zip(original, frames))
+
+
+def test_animation_timing_kept():
+    """Les durées et le nombre de boucles d'un GIF sont repris dans le PNG animé."""
+    modified = ImageSteganography().hide_data(_animated_gif(), "durées", output='same')
+    image = Image.open(io.BytesIO(modified))
+
+    assert image.info['loop'] == 0
+    assert [frame.info['duration'] for frame in ImageSequence.Iterator(image)] == [100, 150, 200, 250]
+
+
+def test_tiff_pages_keep_mode_and_compression():
+    """Chaque page d'un TIFF garde son mode et sa compression sans perte."""
+    pages = _frames(2) + _frames(1, 25, 20, 'L')
+    data = _save(pages, 'TIFF', compression='tiff_lzw')
+    stego = ImageSteganography()
+    message = np.random.bytes(600)
+
+    modified = stego.hide_data(data, message, "secret")
+    image = Image.open(io.BytesIO(modified))
+
+    assert [(page.mode, page.size, page.info['compression']) for page in ImageSequence.Iterator(image)] == \
+        [('RGB', (40, 30), 'tiff_lzw')] * 2 + [('L', (25, 20), 'tiff_lzw')]
+    assert stego.extract_data(modified, "secret") == message
+
+
+def test_scattered_frames():
+    """Dispersion : chaque vue a sa permutation, le mot de passe reste requis."""
+    data = _save(_frames(), 'PNG')
+    stego = ImageSteganography()
+    message = np.random.bytes(2000)
+
+    modified = stego.hide_data(data, message, "secret", bits_per_channel=2, scatter=True)
+
+    assert stego.extract_data(modified, "secret") == message
+    with pytest.raises(ValueError):
+        stego.extract_data(modified)
+
+
+def test_first_frame_only_with_other_profile():
+    """Un profil de sortie explicite garde l'ancien comportement (première vue)."""
+    modified = ImageSteganography().hide_data(_animated_gif(), "première", output='bmp')
+
+    assert Image.open(io.BytesIO(modified)).format == 'BMP'
+    assert ImageSteganography().extract_data(modified) == "première"
+
+
+def test_hide_file(tmp_path):
+    """hide_file écrit les vues directement dans le fichier produit."""
+    source = tmp_path / 'anim.tiff'
+    target = tmp_path / 'cachee.tiff'
+    source.write_bytes(_save(_frames(), 'TIFF'))
+    stego = MultiFrameSteganography()
+
+    stego.hide_file(str(source), str(target), "sur disque")
+
+    assert Image.open(target).n_frames == 4
+    assert stego.extract_data(str(target)) == "sur disque"
+
+
+def test_errors():
+    """Données trop volumineuses, image fixe, vue sans message."""
+    stego = MultiFrameSteganography()
+    data = _save(_frames(2, 10, 10), 'PNG')
+
+    with pytest.raises(ValueError):
+        stego.hide_data(data, "x" * 100)
+    with pytest.raises(ValueError):
+        stego.hide_data(_save(_frames(1), 'PNG'), "fixe")
+    with pytest.raises(ValueError):
+        stego.extract_data(data)
@@ -6,7 +6,11 @@ import pytest
 import numpy as np
 from PIL import Image
 import io
-from stego.image import ImageSteganography
+from stego import image as image_module
+from stego import pixels as pixels_module
+from stego.image import ImageSteganography, decode_pixels, output_options, output_type
+from stego.payload import HEADER_BITS, HiddenFile
+from stego.utils import text_to_binary
 
 
 @pytest.fixture
@@ -89,8 +93,8 @@ def test_get_capacity(stego_instance, test_image):
     capacity = stego_instance.get_capacity(test_image)
     
     # L'image fait 100x100x3 = 30000 pixels
-    # Moins la taille du délimiteur
-    expected_capacity = 100 * 100 * 3 - len(stego_instance.delimiter)
+    # Moins la taille de l'en-tête du conteneur
+    expected_capacity = 100 * 100 * 3 - HEADER_BITS
     
     assert capacity == expected_capacity
 
@@ -113,3 +117,243 @@ def test_empty_data(stego_instance, test_image):
     extracted_data = stego_instance.extract_data(modified_image)
     
     assert extracted_data == test_data
+
+
+def test_extract_legacy_delimiter_format(stego_instance, test_image):
+    """Les images cachées avec l'ancien format (marqueur de fin) restent lisibles."""
+    image = Image.open(io.BytesIO(test_image))
+    img_array = np.array(image)
+    binary_data = text_to_binary("Ancien format") + "1111111111111110"
+    bits = np.array([int(bit) for bit in binary_data], dtype=np.uint8)
+    flat = img_array.reshape(-1)
+    flat[:bits.size] = (flat[:bits.size] & 0xFE) | bits
+    
+    buffer = io.BytesIO()
+    Image.fromarray(img_array).save(buffer, format='PNG')
+    
+    assert stego_instance.extract_data(buffer.getvalue()) == "Ancien format"
+
+
+def test_binary_file_payload(stego_instance, test_image):
+    """Test avec un fichier binaire : octets, nom et taille conservés."""
+    file_data = bytes(range(256)) * 4
+    
+    modified_image = stego_instance.hide_data(test_image, file_data, "secret", filename="cle.bin")
+    extracted = stego_instance.extract_data(modified_image, "secret")
+    
+    assert isinstance(extracted, HiddenFile)
+    assert extracted == file_data
+    assert extracted.filename == "cle.bin"
+    assert extracted.size == len(file_data)
+
+
+def test_stream_cipher_payload(stego_instance, test_image):
+    """Test avec le chiffrement segmenté : chiffré à l'insertion, déchiffré à l'extraction."""
+    file_data = np.random.bytes(3000)
+    
+    modified_image = stego_instance.hide_data(test_image, file_data, "secret", filename="data.bin",
+                                              cipher='aesgcm-stream')
+    
+    assert stego_instance.extract_data(modified_image, "secret") == file_data
+    with pytest.raises(ValueError, match="Mot de passe incorrect"):
+        stego_instance.extract_data(modified_image, "wrong")
+
+
+@pytest.mark.parametrize('bits_per_channel', [1, 2, 3, 4])
+def test_bits_per_channel(stego_instance, test_image, bits_per_channel):
+    """Plusieurs bits par canal : profondeur relue dans l'en-tête, capacité multipliée."""
+    capacity = stego_instance.get_capacity(test_image, bits_per_channel)
+    assert capacity == (100 * 100 * 3 - HEADER_BITS) * bits_per_channel
+    
+    test_data = np.random.bytes(capacity // 8 - 100)
+    modified_image = stego_instance.hide_data(test_image, test_data, bits_per_channel=bits_per_channel)
+    
+    assert stego_instance.extract_data(modified_image) == test_data
+    
+    # Les canaux ne s'écartent de l'original que des bits de poids faible
+    original = np.array(Image.open(io.BytesIO(test_image))).astype(int)
+    modified = np.array(Image.open(io.BytesIO(modified_image))).astype(int)
+    assert np.abs(original - modified).max() < 1 << bits_per_channel
+
+
+@pytest.mark.parametrize('output', ['png', 'tiff', 'webp', 'same'])
+def test_scattered_embedding(stego_instance, test_image, output):
+    """Données dispersées selon le mot de passe, relues quel que soit le lecteur."""
+    carrier = test_image if output != 'same' else _image_bytes(Image.open(io.BytesIO(test_image)), 'BMP')
+    test_data = np.random.bytes(2000)
+    
+    modified_image = stego_instance.hide_data(carrier, test_data, "secret", bits_per_channel=2,
+                                              output=output, scatter=True)
+    
+    assert stego_instance.extract_data(modified_image, "secret") == test_data
+    with pytest.raises(ValueError, match="Mot de passe incorrect"):
+        stego_instance.extract_data(modified_image, "wrong")
+    with pytest.raises(ValueError, match="mot de passe requis"):
+        stego_instance.extract_data(modified_image)
+    
+    # Hors en-tête, les canaux modifiés sont répartis sur toute l'image
+    original = np.array(Image.open(io.BytesIO(carrier))).reshape(-1)
+    changed = np.flatnonzero(np.array(Image.open(io.BytesIO(modified_image))).reshape(-1) != original)
+    changed = changed[changed >= HEADER_BITS]
+    assert changed.max() > original.size * 0.9
+    assert changed.size < original.size / 2
+
+
+def test_scatter_requires_password(stego_instance, test_image):
+    """La dispersion dépend du mot de passe : elle est refusée sans."""
+    with pytest.raises(ValueError):
+        stego_instance.hide_data(test_image, "x", scatter=True)
+
+
+def test_bits_per_channel_too_large(stego_instance, test_image):
+    """Les profondeurs hors de 1 à 4 sont refusées."""
+    with pytest.raises(ValueError):
+        stego_instance.hide_data(test_image, "x", bits_per_channel=5)
+    with pytest.raises(ValueError):
+        stego_instance.get_capacity(test_image, 0)
+
+
+def _image_bytes(image, format='PNG'):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('mode, shape, dtype', [
+    ('RGBA', (60, 50, 4), np.uint8),
+    ('L', (60, 50), np.uint8),
+    ('LA', (60, 50, 2), np.uint8),
+    ('I;16', (60, 50), np.uint16),
+])
+def test_native_modes(stego_instance, mode, shape, dtype):
+    """Les modes RGBA, L, LA et I;16 sont conservés, avec leur propre capacité."""
+    array = np.random.randint(0, np.iinfo(dtype).max, shape, dtype=dtype)
+    if mode == 'LA':
+        image = Image.fromarray(array[..., 0])
+        image.putalpha(Image.fromarray(array[..., 1]))
+    else:
+        image = Image.fromarray(array)
+    carrier = _image_bytes(image)
+    bands = len(Image.open(io.BytesIO(carrier)).getbands())
+    
+    capacity = stego_instance.get_capacity(carrier)
+    assert capacity == 60 * 50 * bands - HEADER_BITS
+    
+    test_data = np.random.bytes(capacity // 8 - 100)
+    modified_image = stego_instance.hide_data(carrier, test_data)
+    result = Image.open(io.BytesIO(modified_image))
+    
+    assert result.mode == mode
+    assert stego_instance.extract_data(modified_image) == test_data
+    original = np.array(Image.open(io.BytesIO(carrier))).astype(int)
+    assert np.abs(np.array(result).astype(int) - original).max() <= 1
+
+
+def test_palette_image_converted(stego_instance, test_image):
+    """Au-delà d'un bit par index, une image à palette est convertie en RGB."""
+    carrier = _image_bytes(Image.open(io.BytesIO(test_image)).convert('P'))
+    
+    modified_image = stego_instance.hide_data(carrier, "palette", bits_per_channel=2)
+    
+    assert Image.open(io.BytesIO(modified_image)).mode == 'RGB'
+    assert stego_instance.extract_data(modified_image) == "palette"
+
+
+@pytest.mark.parametrize('mode', ['RGB', 'RGBA', 'L', 'LA', 'I;16'])
+def test_decode_pixels_matches_numpy(mode, test_image):
+    """Le décodage direct donne les mêmes pixels que np.array."""
+    image = Image.open(io.BytesIO(test_image))
+    image = image.convert('I;16') if mode == 'I;16' else image.convert(mode)
+    
+    pixels = decode_pixels(image)
+    
+    assert pixels.flags.writeable
+    assert np.array_equal(pixels.reshape(np.array(image).shape), np.array(image))
+
+
+def test_decode_pixels_in_bands(monkeypatch, test_image):
+    """Décodage par bandes de quelques lignes (dernière bande incomplète)."""
+    image = Image.open(io.BytesIO(test_image)).convert('RGBA')
+    monkeypatch.setattr(pixels_module, 'BAND_SIZE', image.width * 4 * 7)
+    
+    assert np.array_equal(decode_pixels(image), np.array(image))
+
+
+@pytest.mark.parametrize('output, format', [
+    (None, 'PNG'),
+    ('fast', 'PNG'),
+    ('png:0', 'PNG'),
+    ('bmp', 'BMP'),
+    ('tiff', 'TIFF'),
+    ('webp', 'WEBP'),
+])
+def test_output_profiles(stego_instance, test_image, output, format):
+    """Chaque profil de sortie produit une image sans perte dans son format."""
+    modified_image = stego_instance.hide_data(test_image, "profil", output=output)
+    
+    assert Image.open(io.BytesIO(modified_image)).format == format
+    assert output_type(modified_image)[1] == format.lower()
+    assert stego_instance.extract_data(modified_image) == "profil"
+
+
+def test_output_same_as_input(stego_instance, test_image):
+    """Le profil 'same' garde le format d'origine (JPEG compris), et revient à PNG sinon."""
+    bmp = _image_bytes(Image.open(io.BytesIO(test_image)), 'BMP')
+    jpeg = _image_bytes(Image.open(io.BytesIO(test_image)), 'JPEG')
+    
+    assert Image.open(io.BytesIO(stego_instance.hide_data(bmp, "x", output='same'))).format == 'BMP'
+    assert Image.open(io.BytesIO(stego_instance.hide_data(jpeg, "x", output='same'))).format == 'JPEG'
+    assert Image.open(io.BytesIO(stego_instance.hide_data(jpeg, "x", output='same',
+                                                          bits_per_channel=2))).format == 'PNG'
+
+
+def test_output_profile_rejects_lossy_mode():
+    """Un profil qui ne conserve pas le mode de l'image est refusé."""
+    assert output_options('png:9', 'RGBA') == ('PNG', {'compress_level': 9})
+    with pytest.raises(ValueError):
+        output_options('bmp', 'RGBA')
+    with pytest.raises(ValueError):
+        output_options('jpeg', 'RGB')
+
+
+@pytest.mark.parametrize('options', [{}, {'bits_per_channel': 3}, {'output': 'bmp'}])
+def test_hide_many_matches_hide_data(stego_instance, test_image, monkeypatch, options):
+    """Chaque image produite par lot est celle de hide_data, y compris d'un lot à l'autre."""
+    monkeypatch.setattr(image_module, 'BATCH_BYTES', 3 * 100 * 100 * 3)
+    payloads = [f"destinataire {index}" * (index + 1) for index in range(7)] + [bytes(range(256))]
+    
+    results = stego_instance.hide_many(test_image, payloads, **options)
+    
+    assert results == [stego_instance.hide_data(test_image, data, **options) for data in payloads]
+    assert [stego_instance.extract_data(result) for result in results] == payloads
+
+
+def test_hide_many_scattered(stego_instance, test_image):
+    """Dispersion : chaque message a ses propres positions."""
+    results = stego_instance.hide_many(test_image, ["un", "deux"], "secret", scatter=True)
+    
+    assert [stego_instance.extract_data(result, "secret") for result in results] == ["un", "deux"]
+
+
+def test_hide_batch_mixed_carriers(stego_instance, test_image):
+    """Images de tailles et de formats différents : chaque élément suit son moteur."""
+    small = _image_bytes(Image.fromarray(np.random.randint(0, 256, (40, 30), dtype=np.uint8)))
+    palette = _image_bytes(Image.open(io.BytesIO(test_image)).quantize(64))
+    jpeg = _image_bytes(Image.open(io.BytesIO(test_image)), 'JPEG')
+    images = [test_image, small, palette, jpeg, test_image, jpeg]
+    payloads = [f"message {index}" for index in range(len(images))]
+    
+    results = stego_instance.hide_batch(images, payloads)
+    
+    assert [Image.open(io.BytesIO(result)).format for result in results] == ['PNG', 'PNG', 'PNG', 'JPEG',
+                                                                               'PNG', 'JPEG']
+    assert Image.open(io.BytesIO(results[2])).mode == 'P'
+    assert [stego_instance.extract_data(result) for result in results] == payloads
+
+
+def test_hide_batch_errors(stego_instance, test_image):
+    """Nombres d'images et de messages différents, message trop volumineux."""
+    with pytest.raises(ValueError):
+        stego_instance.hide_batch([test_image], ["un", "deux"])
+    with pytest.raises(ValueError):
+        stego_instance.hide_many(test_image, ["court", "x" * 5000])
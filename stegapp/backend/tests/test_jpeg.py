@@ -0,0 +1,120 @@
+"""
+Tests pour l'insertion dans les coefficients DCT des images JPEG.
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+from stego.image import ImageSteganography, output_type
+from stego.jpeg import JPEGImage, huffman_lookup
+from stego.payload import HEADER_BITS
+
+
+def _photo(width=320, height=240, mode='RGB'):
+    """Dégradé bruité : se comprime comme une photo."""
+    grid = np.add.outer(np.arange(height), np.arange(width)).astype(float)
+    pixels = np.stack([grid, grid[::-1], grid * 0.5], axis=-1) % 256
+    pixels = (pixels + np.random.randint(0, 40, pixels.shape)).clip(0, 255).astype(np.uint8)
+    return Image.fromarray(pixels).convert(mode)
+
+
+def _jpeg(image=None, **options):
+    buffer = io.BytesIO()
+    (image or _photo()).save(buffer, format='JPEG', **options)
+    return buffer.getvalue()
+
+
+def test_huffman_lookup():
+    """Chaque code occupe la plage des fenêtres de 16 bits qui commencent par lui."""
+    # Codes 0 (symbole 0x00 : fin de bloc) et 10 (0x12), 11 (0xF0)
+    counts = bytes([1, 2] + [0] * 14)
+    lookup = huffman_lookup(counts, bytes([0x00, 0x12, 0xF0]), ac=True)
+
+    assert lookup[0x0000] == lookup[0x7FFF] == 1 << 16
+    assert lookup[0x8000] == (2 + 2) << 16 | 2 << 8 | 2
+    assert lookup[0xFFFF] == 2 << 16 | 16 << 8
+
+
+@pytest.mark.parametrize('options', [{}, {'subsampling': 0}, {'quality': 95}, {'restart_marker_rows': 1}])
+def test_unchanged_without_data(options):
+    """Sans modification, le fichier est réécrit à l'identique."""
+    data = _jpeg(**options)
+    assert JPEGImage(data).save() == data
+
+
+@pytest.mark.parametrize('mode', ['RGB', 'L', 'CMYK'])
+def test_hide_and_extract(mode):
+    """Le message occupe toute la capacité ; le fichier garde sa taille."""
+    data = _jpeg(_photo(mode=mode))
+    stego = ImageSteganography()
+    message = np.random.bytes(JPEGImage(data).capacity // 8 - 64)
+
+    modified = stego.hide_data(data, message)
+
+    assert output_type(modified) == ('image/jpeg', 'jpg')
+    assert abs(len(modified) - len(data)) < len(data) // 100
+    assert stego.extract_data(modified) == message
+    original = np.asarray(Image.open(io.BytesIO(data)), dtype=int)
+    pixels = np.asarray(Image.open(io.BytesIO(modified)), dtype=int)
+    assert np.abs(original - pixels).mean() < 4
+
+
+def test_symbols_unchanged():
+    """Seuls les bits de magnitude changent : les coefficients porteurs restent aux mêmes positions."""
+    data = _jpeg()
+    carrier = JPEGImage(data)
+    positions = carrier.positions.copy()
+
+    modified = ImageSteganography().hide_data(data, "positions", "secret", scatter=True)
+
+    assert np.array_equal(JPEGImage(modified).positions, positions)
+
+
+def test_scattered():
+    """Dispersion : le mot de passe est requis pour relire le message."""
+    data = _jpeg(restart_marker_rows=2)
+    stego = ImageSteganography()
+
+    modified = stego.hide_data(data, "dispersé", "secret", scatter=True)
+
+    assert stego.extract_data(modified, "secret") == "dispersé"
+    with pytest.raises(ValueError):
+        stego.extract_data(modified)
+
+
+def test_image_engine_keeps_jpeg():
+    """ImageSteganography renvoie un JPEG par défaut ; capacité des coefficients DCT."""
+    data = _jpeg()
+    stego = ImageSteganography()
+
+    modified = stego.hide_data(data, "photo", "secret")
+    assert output_type(modified) == ('image/jpeg', 'jpg')
+    assert stego.extract_data(modified, "secret") == "photo"
+    assert stego.get_capacity(data) == JPEGImage(data).capacity
+
+    # Message trop grand pour les coefficients : erreur, sauf avec un autre profil
+    message = np.random.bytes(JPEGImage(data).capacity // 8 + 1024)
+    for output in (None, 'same'):
+        with pytest.raises(ValueError, match="trop volumineuses"):
+            stego.hide_data(data, message, output=output)
+        with pytest.raises(ValueError, match="trop volumineuses"):
+            stego.hide_batch([data], [message], output=output)
+    modified = stego.hide_data(data, message, output='png')
+    assert Image.open(io.BytesIO(modified)).format == 'PNG'
+    assert stego.extract_data(modified) == message
+    assert Image.open(io.BytesIO(stego.hide_data(data, "photo", output='png'))).format == 'PNG'
+
+
+def test_unsupported():
+    """JPEG progressif, fichier tronqué ; capacité hors en-tête."""
+    progressive = _jpeg(progressive=True)
+    data = _jpeg()
+
+    with pytest.raises(ValueError):
+        JPEGImage(progressive)
+    assert Image.open(io.BytesIO(ImageSteganography().hide_data(progressive, "x"))).format == 'PNG'
+    with pytest.raises(ValueError):
+        JPEGImage(data[:len(data) // 2])
+    assert JPEGImage(data).capacity == JPEGImage(data).positions.size - HEADER_BITS
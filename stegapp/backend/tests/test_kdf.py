@@ -0,0 +1,103 @@
+"""
+Tests pour la dérivation de clés et son cache.
+"""
+
+import pytest
+from stego import kdf
+from stego.kdf import KDFParams, cache_info, clear_cache, derive_key, new_key
+
+# Paramètres de coût réduits pour les tests
+FAST_SCRYPT = KDFParams.scrypt(n=1 << 10)
+FAST_PBKDF2 = KDFParams.pbkdf2(iterations=1000)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Chaque test part d'un cache vide."""
+    clear_cache()
+    yield
+    clear_cache()
+
+
+@pytest.mark.parametrize('params', [FAST_SCRYPT, FAST_PBKDF2])
+def test_derive_key(params):
+    """La clé dépend du mot de passe, du sel et des paramètres."""
+    key = derive_key("password", b"s" * 16, params)
+    
+    assert len(key) == kdf.KEY_SIZE
+    assert derive_key("password", b"s" * 16, params) == key
+    assert derive_key("other", b"s" * 16, params) != key
+    assert derive_key("password", b"t" * 16, params) != key
+
+
+def test_scrypt_and_pbkdf2_differ():
+    """Deux algorithmes donnent des clés différentes."""
+    assert derive_key("password", b"s" * 16, FAST_SCRYPT) != derive_key("password", b"s" * 16, FAST_PBKDF2)
+
+
+def test_cache_counters():
+    """Une dérivation répétée est servie par le cache."""
+    derive_key("password", b"s" * 16, FAST_SCRYPT)
+    derive_key("password", b"s" * 16, FAST_SCRYPT)
+    derive_key("password", b"t" * 16, FAST_SCRYPT)
+    
+    info = cache_info()
+    assert info['hits'] == 1
+    assert info['misses'] == 2
+    assert info['size'] == 2
+
+
+def test_cache_is_bounded(monkeypatch):
+    """Le cache évince les entrées les plus anciennes."""
+    monkeypatch.setattr(kdf, 'CACHE_SIZE', 2)
+    for salt in (b"a", b"b", b"c"):
+        derive_key("password", salt * 16, FAST_PBKDF2)
+    derive_key("password", b"a" * 16, FAST_PBKDF2)
+    
+    assert cache_info()['size'] == 2
+    assert cache_info()['hits'] == 0
+
+
+def test_new_key_fresh_salt():
+    """Chaque conteneur reçoit son propre sel, et donc sa propre clé."""
+    salt1, key1 = new_key("password", FAST_SCRYPT)
+    salt2, key2 = new_key("password", FAST_SCRYPT)
+    
+    assert salt1 != salt2 and key1 != key2
+    assert len(salt1) == kdf.SALT_SIZE
+    assert derive_key("password", salt1, FAST_SCRYPT) == key1
+    # Les clés tirées entrent dans le cache : la relecture ne les redérive pas
+    assert cache_info()['misses'] == 0 and cache_info()['hits'] == 1
+    assert cache_info()['size'] == 2
+
+
+@pytest.mark.parametrize('params', [FAST_SCRYPT, FAST_PBKDF2, KDFParams.scrypt(n=1 << 15, r=4, p=2)])
+def test_params_encoding(params):
+    """Les paramètres sont relus à l'identique depuis l'en-tête."""
+    decoded, rest = KDFParams.decode(params.encode() + b"sel")
+    
+    assert decoded.encode() == params.encode()
+    assert rest == b"sel"
+
+
+def test_invalid_params():
+    """Paramètres invalides refusés."""
+    with pytest.raises(ValueError):
+        KDFParams.scrypt(n=1000)
+    with pytest.raises(ValueError):
+        KDFParams.decode(b"\x09")
+
+
+@pytest.mark.parametrize('data', [
+    bytes([kdf.KDF_SCRYPT, kdf.MAX_LOG_N + 1, 8, 1]),
+    bytes([kdf.KDF_SCRYPT, 14, kdf.MAX_R + 1, 1]),
+    bytes([kdf.KDF_SCRYPT, 14, 8, kdf.MAX_P + 1]),
+    bytes([kdf.KDF_SCRYPT, 14, 0, 1]),
+    bytes([kdf.KDF_PBKDF2]) + (kdf.MAX_ITERATIONS + 1).to_bytes(4, 'big'),
+    bytes([kdf.KDF_PBKDF2, 0xFF]),
+])
+def test_decode_rejects_excessive_cost(data):
+    """Un en-tête forgé ne peut pas imposer un coût de dérivation démesuré."""
+    with pytest.raises(ValueError, match="dérivation"):
+        KDFParams.decode(data + b"s" * 16)
+
@@ -0,0 +1,69 @@
+"""
+Tests pour les primitives LSB communes aux moteurs.
+"""
+
+import numpy as np
+import pytest
+from stego.bitbuffer import BitReader, unpack_bits
+from stego.lsb import MIN_BAND, band_edges, embed_lsb, embed_lsb_chunks, embed_lsb_stack, iter_lsb_bytes
+
+
+def test_band_edges():
+    """Bandes contiguës, alignées après le début, couvrant tout l'intervalle."""
+    bands = band_edges(120, 120 + 8 * MIN_BAND, align=3000, workers=4)
+    
+    assert len(bands) == 4
+    assert bands[0][0] == 120 and bands[-1][1] == 120 + 8 * MIN_BAND
+    for (_, end), (start, _) in zip(bands, bands[1:]):
+        assert end == start
+        assert (start - 120) % 3000 == 0
+
+
+def test_band_edges_small_range():
+    """Un petit intervalle n'est pas découpé."""
+    assert band_edges(0, MIN_BAND, workers=8) == [(0, MIN_BAND)]
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+def test_parallel_matches_sequential(depth):
+    """Le découpage en bandes ne change pas le résultat."""
+    carrier = np.random.randint(0, 256, 3 * MIN_BAND * 4, dtype=np.uint8)
+    message = np.random.bytes(MIN_BAND)
+    bits = unpack_bits(message)
+    
+    sequential = carrier.copy()
+    embed_lsb(sequential, bits, 120, depth)
+    parallel = carrier.copy()
+    embed_lsb(parallel, bits, 120, depth, workers=4, align=300)
+    
+    assert np.array_equal(sequential, parallel)
+    chunks = iter_lsb_bytes(parallel, 120, depth=depth, workers=4, align=300)
+    assert BitReader(chunks).read_bytes(len(message)) == message
+
+
+def test_embed_chunks_across_boundaries():
+    """Les bits d'un élément peuvent provenir de deux blocs successifs."""
+    carrier = np.zeros(1000, dtype=np.uint8)
+    message = bytes(range(100))
+    
+    end = embed_lsb_chunks(carrier, [message[:7], message[7:50], message[50:]], depth=3)
+    
+    assert end == -(-len(message) * 8 // 3)
+    assert BitReader(iter_lsb_bytes(carrier, depth=3)).read_bytes(len(message)) == message
+
+
+@pytest.mark.parametrize('dtype,depth', [(np.uint8, 1), (np.uint8, 3), (np.dtype('<u2'), 2)])
+def test_embed_stack_matches_rows(dtype, depth):
+    """Une passe sur la pile équivaut à une insertion par ligne ; le reste des lignes est intact."""
+    stack = np.random.randint(0, 256, (4, 500)).astype(dtype)
+    bits = [unpack_bits(np.random.bytes(size)) for size in (10, 0, 50, 33)]
+    
+    expected = stack.copy()
+    for row, row_bits in zip(expected, bits):
+        if row_bits.size:
+            embed_lsb(row, row_bits, 40, depth)
+    embed_lsb_stack(stack, bits, 40, depth)
+    
+    assert np.array_equal(stack, expected)
+    with pytest.raises(ValueError):
+        embed_lsb_stack(stack, [unpack_bits(bytes(250))], 40, depth)
@@ -0,0 +1,121 @@
+"""
+Tests pour l'insertion dans les index des images à palette (PNG, GIF).
+"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+from stego.image import ImageSteganography
+from stego.palette import PaletteImage, sort_palette
+from stego.payload import HEADER_BITS, stream_payload
+
+
+def _gradient(side=120, colors=200):
+    """Dégradé bruité quantifié : image à palette réaliste."""
+    grid = np.add.outer(np.arange(side), np.arange(side)) // 2
+    pixels = np.stack([grid % 256, (grid * 2) % 256, (255 - grid) % 256], axis=-1)
+    pixels = (pixels + np.random.randint(0, 8, pixels.shape)).clip(0, 255).astype(np.uint8)
+    return Image.fromarray(pixels).quantize(colors)
+
+
+def _save(image, format='PNG', **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('format,output', [('PNG', None), ('PNG', 'same'), ('GIF', 'same')])
+def test_palette_kept(format, output):
+    """L'image reste à palette, dans son format, avec une taille proche."""
+    carrier = _save(_gradient(), format)
+    stego = ImageSteganography()
+    message = "index de palette " * 40
+
+    modified = stego.hide_data(carrier, message, output=output)
+    image = Image.open(io.BytesIO(modified))
+
+    assert image.mode == 'P' and image.format == format
+    assert len(modified) < len(carrier) * 1.2
+    assert stego.extract_data(modified) == message
+    original = np.array(Image.open(io.BytesIO(carrier)).convert('RGB'), dtype=np.int16)
+    assert np.abs(np.array(image.convert('RGB'), dtype=np.int16) - original).mean() < 2
+
+
+def test_palette_password_and_scatter():
+    """Chiffrement et dispersion s'appliquent aux index."""
+    carrier = _save(_gradient())
+    stego = ImageSteganography()
+    data = np.random.bytes(500)
+
+    modified = stego.hide_data(carrier, data, "secret", scatter=True)
+
+    assert Image.open(io.BytesIO(modified)).mode == 'P'
+    assert stego.extract_data(modified, "secret") == data
+
+
+def test_transparency_preserved():
+    """Les pixels transparents restent transparents et ne portent pas de données."""
+    pixels = np.random.randint(0, 256, (60, 60, 4), dtype=np.uint8)
+    pixels[:, :, 3] = np.where(np.arange(60)[:, None] < 20, 0, 255)
+    carrier = _save(Image.fromarray(pixels, 'RGBA').quantize(64))
+    stego = ImageSteganography()
+
+    modified = stego.hide_data(carrier, "transparence")
+    image = Image.open(io.BytesIO(modified))
+
+    assert image.mode == 'P'
+    alpha = np.array(image.convert('RGBA'))[:, :, 3]
+    assert np.array_equal(alpha, np.array(Image.open(io.BytesIO(carrier)).convert('RGBA'))[:, :, 3])
+    assert stego.extract_data(modified) == "transparence"
+
+
+def test_unused_colors_dropped():
+    """Les couleurs de remplissage (GIF) ne forment pas de paire avec une couleur utilisée."""
+    carrier = PaletteImage(Image.open(io.BytesIO(_save(_gradient(colors=31), 'GIF'))))
+
+    assert len(carrier.colors) == 32
+    assert carrier.indices.max() < 31
+
+
+def test_sort_palette_neighbours():
+    """Les deux couleurs de chaque paire sont plus proches qu'au hasard."""
+    colors = np.random.randint(0, 256, (256, 3), dtype=np.uint8)
+    order = sort_palette(colors, np.full(256, 255, dtype=np.uint8))
+    pairs = colors[order].astype(np.int32).reshape(128, 2, 3)
+    random_pairs = colors.astype(np.int32).reshape(128, 2, 3)
+
+    assert sorted(order) == list(range(256))
+    assert np.abs(pairs[:, 0] - pairs[:, 1]).sum() < np.abs(random_pairs[:, 0] - random_pairs[:, 1]).sum() / 2
+
+
+@pytest.mark.parametrize('output', [None, 'same'])
+def test_palette_too_small(output):
+    """Données trop volumineuses pour les index : erreur, la conversion RGB demande un autre profil."""
+    carrier = _save(_gradient(40))
+    stego = ImageSteganography()
+    message = "x" * 400
+
+    assert stego.get_capacity(carrier) < len(message) * 8
+    with pytest.raises(ValueError, match="trop volumineuses"):
+        stego.hide_data(carrier, message, output=output)
+    with pytest.raises(ValueError, match="trop volumineuses"):
+        stego.hide_batch([carrier], [message], output=output)
+
+    modified = stego.hide_data(carrier, message, output='bmp')
+    assert Image.open(io.BytesIO(modified)).mode == 'RGB'
+    assert stego.extract_data(modified) == message
+
+
+def test_palette_image():
+    """Index d'une image à palette seuls : capacité, insertion et relecture."""
+    carrier = _save(_gradient(40), 'GIF')
+    image = PaletteImage(Image.open(io.BytesIO(carrier)))
+
+    assert image.capacity == 40 * 40 - HEADER_BITS
+    assert ImageSteganography().get_capacity(carrier) == image.capacity
+    image.embed(stream_payload("index")[1])
+    modified = image.save('GIF', {'optimize': False})
+    assert PaletteImage(Image.open(io.BytesIO(modified)), sort=False).recover() == "index"
+
@@ -0,0 +1,183 @@
+"""
+Tests pour le format de conteneur des données cachées.
+"""
+
+import pytest
+from stego.crypto import PasswordError
+from stego.payload import (
+    FLAG_COMPRESSED,
+    FLAG_ENCRYPTED,
+    HEADER_SIZE,
+    HiddenFile,
+    MAGIC,
+    open_payload,
+    pack_payload,
+    prepare_payload,
+    read_payload,
+    recover_data,
+    stream_payload,
+)
+
+
+def _chunks(data, size=7):
+    """Découpe des octets en blocs, à la manière d'un moteur LSB."""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_pack_and_read_roundtrip():
+    """Aller-retour d'un conteneur avec champs d'extension."""
+    container = pack_payload(b"corps", FLAG_ENCRYPTED, {1: b"abc", 7: b""})
+    
+    assert container.startswith(MAGIC)
+    assert container[len(MAGIC):HEADER_SIZE - 8] == bytes([1, FLAG_ENCRYPTED, 0, 9])
+    assert int.from_bytes(container[HEADER_SIZE - 8:HEADER_SIZE - 4], 'big') == len(b"corps")
+    
+    payload = read_payload(_chunks(container + b"\x00" * 100))
+    assert payload.body == b"corps"
+    assert payload.flags == FLAG_ENCRYPTED
+    assert payload.fields == {1: b"abc", 7: b""}
+    assert not payload.legacy
+
+
+def test_read_stops_after_payload():
+    """Le flux n'est pas consommé au-delà du corps annoncé."""
+    container = pack_payload(b"x" * 10)
+    consumed = []
+    
+    def chunks():
+        for chunk in _chunks(container + b"\x00" * 1000, 4):
+            consumed.append(chunk)
+            yield chunk
+    
+    read_payload(chunks())
+    assert sum(len(chunk) for chunk in consumed) < HEADER_SIZE + 10 + 4
+
+
+def test_corrupted_payload():
+    """Un corps altéré est détecté par le CRC."""
+    container = bytearray(pack_payload(b"donnees"))
+    container[-1] ^= 0x01
+    
+    with pytest.raises(ValueError, match="CRC"):
+        read_payload(_chunks(bytes(container)))
+
+
+def test_truncated_payload():
+    """Un conteneur tronqué ne renvoie aucune donnée."""
+    container = pack_payload(b"donnees")
+    assert read_payload(_chunks(container[:-2])) is None
+
+
+def test_legacy_format():
+    """Les données de l'ancien format (marqueur 0xFFFE) sont lues."""
+    payload = read_payload(_chunks(b"ancien" + b"\xff\xfe" + b"\x00" * 20))
+    assert payload.legacy
+    assert payload.body == b"ancien"
+
+
+def test_no_payload():
+    """Aucun conteneur ni marqueur : aucune donnée."""
+    assert read_payload(_chunks(b"\x00" * 64)) is None
+
+
+def test_prepare_and_recover_with_password():
+    """Le chiffrement est signalé dans l'en-tête et requis à l'extraction."""
+    container = prepare_payload("Secret 世界", "password")
+    
+    assert recover_data(_chunks(container), "password") == "Secret 世界"
+    with pytest.raises(ValueError, match="mot de passe requis"):
+        recover_data(_chunks(container))
+
+
+def test_open_legacy_payload():
+    """Le texte de l'ancien format est décodé en Latin-1 si besoin."""
+    payload = read_payload(_chunks("café".encode('latin-1') + b"\xff\xfe"))
+    assert open_payload(payload) == "café"
+
+
+def test_prepare_and_recover_binary_file():
+    """Un fichier binaire est restitué tel quel avec ses métadonnées."""
+    file_data = b"\x00\xff\x80 archive"
+    container = prepare_payload(file_data, filename="archive.zip")
+    
+    extracted = recover_data(_chunks(container))
+    assert isinstance(extracted, HiddenFile)
+    assert extracted == file_data
+    assert extracted.filename == "archive.zip"
+
+
+def test_compressed_payload():
+    """La compression est enregistrée dans l'en-tête et annulée à l'extraction."""
+    text = "ligne de journal répétée\n" * 200
+    plain = prepare_payload(text)
+    container = prepare_payload(text, "password", compression='auto')
+    
+    assert len(container) < len(plain) // 5
+    assert read_payload(_chunks(container)).flags & FLAG_COMPRESSED
+    assert recover_data(_chunks(container), "password") == text
+
+
+@pytest.mark.parametrize('cipher', ['aesgcm', 'chacha20'])
+def test_aead_payload(cipher):
+    """Le mode AEAD est signalé dans l'en-tête et plus compact que Fernet."""
+    container = prepare_payload("Message secret", "password", cipher=cipher)
+    
+    assert len(container) < len(prepare_payload("Message secret", "password"))
+    assert recover_data(_chunks(container), "password") == "Message secret"
+    with pytest.raises(ValueError):
+        recover_data(_chunks(container), "wrong")
+
+
+def test_wrong_password_rejected_before_body():
+    """Un mauvais mot de passe est rejeté après l'en-tête, sans lire le corps."""
+    container = prepare_payload("x" * 10000, "correct", cipher='aesgcm')
+    consumed = []
+    
+    def chunks():
+        for chunk in _chunks(container, 16):
+            consumed.append(chunk)
+            yield chunk
+    
+    with pytest.raises(PasswordError, match="Mot de passe incorrect") as error:
+        read_payload(chunks(), "wrong")
+    assert error.value.code == 'invalid_password'
+    assert sum(len(chunk) for chunk in consumed) < 100
+
+
+def test_missing_password_code():
+    """L'absence de mot de passe a son propre code d'erreur."""
+    container = prepare_payload("secret", "password")
+    with pytest.raises(PasswordError) as error:
+        read_payload(_chunks(container), "")
+    assert error.value.code == 'password_required'
+
+
+def test_stream_payload_roundtrip():
+    """Le chiffrement segmenté est produit par blocs et déchiffré à la lecture."""
+    data = bytes(range(256)) * 1000
+    size, chunks = stream_payload(data, "password", filename="data.bin", cipher='aesgcm-stream')
+    chunks = list(chunks)
+    container = b''.join(chunks)
+    
+    assert len(container) == size
+    assert len(chunks) > 2
+    
+    payload = read_payload(_chunks(container, 4096), "password")
+    assert payload.decrypted
+    result = open_payload(payload, "password")
+    assert isinstance(result, HiddenFile)
+    assert result == data and result.filename == "data.bin"
+    
+    # Lecture sans mot de passe puis ouverture : même résultat
+    assert open_payload(read_payload(_chunks(container, 4096)), "password") == data
+    with pytest.raises(PasswordError):
+        recover_data(_chunks(container, 4096), "wrong")
+
+
+def test_stream_payload_corrupted_segment():
+    """Un segment altéré est détecté par son tag d'authentification."""
+    container = bytearray(prepare_payload("x" * 200000, "password", cipher='aesgcm-stream'))
+    container[-100] ^= 0xFF
+    
+    with pytest.raises(ValueError):
+        recover_data(_chunks(bytes(container), 4096), "password")
@@ -0,0 +1,693 @@
+"""
+Tests de performance (benchmarks) des moteurs de stéganographie.
+
+Ignorés par défaut (marqueur slow) ; lancer avec : make benchmark
+(ou pytest tests/ -k test_performance --runslow --log-cli-level=INFO)
+"""
+
+import io
+import logging
+import os
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+import pytest
+
+from stego.bitbuffer import BitReader, unpack_bits
+from stego.crypto import CIPHER_AES_GCM, decrypt_payload, encrypt_payload, stream_decrypt, stream_encrypt
+from stego.lsb import embed_lsb, iter_lsb_bytes, read_until
+
+logger = logging.getLogger(__name__)
+
+
+def _peak_memory(func):
+    """Retourne le pic d'allocation mémoire (en octets) d'un appel."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _best_time(func, repeat=3):
+    """Retourne le meilleur temps d'exécution (en secondes) sur plusieurs essais."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.slow
+def test_performance_image_embed_scales_with_payload():
+    """Le temps d'insertion dépend de la taille du message, pas du nombre de pixels."""
+    # Support de 2000x2000 pixels RGB (12M canaux)
+    pixels = np.random.randint(0, 256, (2000, 2000, 3), dtype=np.uint8)
+    flat = pixels.reshape(-1)
+
+    timings = {}
+    logger.info("Insertion LSB vectorisée (support 2000x2000 RGB)")
+    logger.info(f"{'message':>10} | {'temps (ms)':>10}")
+    for size in (1024, 16 * 1024, 256 * 1024, 1024 * 1024):
+        bits = unpack_bits(np.random.bytes(size))
+        timings[size] = _best_time(partial(embed_lsb, flat, bits))
+        logger.info(f"{size:>10} | {timings[size] * 1000:>10.3f}")
+
+    # Un petit message ne doit pas coûter le prix d'un parcours du support
+    assert timings[1024] < timings[1024 * 1024]
+
+    # Les LSB écrits correspondent bien au message
+    message = np.random.bytes(4096)
+    embed_lsb(flat, unpack_bits(message))
+    assert np.packbits(flat[:4096 * 8] & 1).tobytes() == message
+
+
+@pytest.mark.slow
+def test_performance_image_extract_scales_with_payload():
+    """L'extraction s'arrête au marqueur : son coût ne dépend pas de la taille du support."""
+    message = b"20 octets de message"
+    marker = b"\xff\xfe"
+    bits = unpack_bits(message + marker)
+
+    timings = {}
+    logger.info("Extraction LSB par blocs (message de 20 octets)")
+    logger.info(f"{'support':>12} | {'temps (ms)':>10}")
+    for side in (500, 2000, 5000):
+        flat = np.zeros(side * side * 3, dtype=np.uint8)
+        embed_lsb(flat, bits)
+        timings[side] = _best_time(lambda flat=flat: read_until(iter_lsb_bytes(flat), marker))
+        assert read_until(iter_lsb_bytes(flat), marker) == message
+        logger.info(f"{f'{side}x{side}':>12} | {timings[side] * 1000:>10.3f}")
+
+    # Un support 100 fois plus grand ne doit pas coûter 100 fois plus cher
+    assert timings[5000] < timings[500] * 10
+
+
+@pytest.mark.slow
+def test_performance_bitbuffer_vs_string_helpers():
+    """Tampon de bits compact contre les anciennes chaînes de '0'/'1'."""
+    data = np.random.bytes(256 * 1024)
+    text = data.decode('latin-1')
+
+    def string_encode():
+        return ''.join(format(ord(char), '08b') for char in text)
+
+    def string_decode(binary):
+        return ''.join(chr(int(binary[i:i+8], 2)) for i in range(0, len(binary), 8))
+
+    def packed_decode(bits):
+        return BitReader([np.packbits(bits).tobytes()]).read_bytes(len(data))
+
+    binary = string_encode()
+    bits = unpack_bits(data)
+    results = {
+        'chaîne -> bits': (_best_time(string_encode, 1), _peak_memory(string_encode)),
+        'bitbuffer -> bits': (_best_time(lambda: unpack_bits(data)), _peak_memory(lambda: unpack_bits(data))),
+        'bits -> chaîne': (_best_time(lambda: string_decode(binary), 1),
+                           _peak_memory(lambda: string_decode(binary))),
+        'bits -> bitbuffer': (_best_time(lambda: packed_decode(bits)), _peak_memory(lambda: packed_decode(bits))),
+    }
+
+    logger.info("Préparation d'un message de 256 Ko")
+    logger.info(f"{'opération':>18} | {'temps (ms)':>10} | {'pic mémoire (Ko)':>16}")
+    for name, (duration, peak) in results.items():
+        logger.info(f"{name:>18} | {duration * 1000:>10.2f} | {peak / 1024:>16.0f}")
+
+    assert packed_decode(bits) == data
+    assert results['bitbuffer -> bits'][0] * 10 < results['chaîne -> bits'][0]
+    assert results['bitbuffer -> bits'][1] * 4 < results['chaîne -> bits'][1]
+    assert results['bits -> bitbuffer'][0] * 10 < results['bits -> chaîne'][0]
+
+
+@pytest.mark.slow
+def test_performance_bitbuffer_small_reads():
+    """Petites lectures dans un grand bloc : coût linéaire, pas de recopie du tampon à chaque lecture."""
+    timings = {}
+    for size in (1 << 18, 1 << 20):
+        data = np.random.bytes(size)
+
+        def read(data=data):
+            reader = BitReader([data])
+            return b''.join(reader.read_bytes(16) for _ in range(len(data) // 16))
+
+        timings[size] = _best_time(read)
+        assert read() == data
+        logger.info(f"{size // 1024} Ko en lectures de 16 octets : {timings[size] * 1000:.1f} ms")
+
+    # 4 fois plus de données, environ 4 fois plus de temps (16 en quadratique)
+    assert timings[1 << 20] < timings[1 << 18] * 8
+
+
+@pytest.mark.slow
+def test_performance_stream_cipher():
+    """Chiffrement segmenté : parallélisme des segments et mémoire bornée."""
+    key = bytes(32)
+    data = np.random.bytes(16 * 1024 * 1024)
+    encrypted = b''.join(stream_encrypt(data, key))
+
+    def consume(workers):
+        for _ in stream_decrypt(io.BytesIO(encrypted).read, key, len(encrypted), workers=workers):
+            pass
+
+    whole = encrypt_payload(data, key, CIPHER_AES_GCM)
+    results = {
+        'aesgcm (bloc unique)': (_best_time(lambda: decrypt_payload(whole, key, CIPHER_AES_GCM)),
+                                 _peak_memory(lambda: decrypt_payload(whole, key, CIPHER_AES_GCM))),
+    }
+    for workers in (1, 4):
+        results[f'segmenté, {workers} thread(s)'] = (_best_time(partial(consume, workers)),
+                                                     _peak_memory(partial(consume, workers)))
+
+    logger.info("Déchiffrement de 16 Mo")
+    logger.info(f"{'mode':>22} | {'temps (ms)':>10} | {'pic mémoire (Ko)':>16}")
+    for name, (duration, peak) in results.items():
+        logger.info(f"{name:>22} | {duration * 1000:>10.2f} | {peak / 1024:>16.0f}")
+
+    # Le pic mémoire est borné par quelques segments, pas par la taille des données
+    assert results['segmenté, 4 thread(s)'][1] < len(data) // 8
+    assert results['aesgcm (bloc unique)'][1] >= len(data)
+
+
+@pytest.mark.slow
+def test_performance_image_bits_per_channel():
+    """Plusieurs bits par canal : moins de canaux modifiés et relus pour un même message."""
+    pixels = np.random.randint(0, 256, (2000, 2000, 3), dtype=np.uint8)
+    flat = pixels.reshape(-1)
+    message = np.random.bytes(1024 * 1024)
+    bits = unpack_bits(message)
+
+    logger.info("Insertion / extraction d'un message de 1 Mo (support 2000x2000 RGB)")
+    logger.info(f"{'bits/canal':>10} | {'canaux':>10} | {'insertion (ms)':>14} | {'extraction (ms)':>15}")
+    for depth in (1, 2, 3, 4):
+        original = flat.copy()
+        def read(depth=depth):
+            return BitReader(iter_lsb_bytes(flat, depth=depth)).read_bytes(len(message))
+
+        embed = _best_time(partial(embed_lsb, flat, bits, depth=depth))
+        extract = _best_time(read)
+        assert read() == message
+
+        # Seuls les premiers ceil(bits / depth) canaux sont modifiés
+        channels = -(-bits.size // depth)
+        assert np.array_equal(flat[channels:], original[channels:])
+        logger.info(f"{depth:>10} | {channels:>10} | {embed * 1000:>14.2f} | {extract * 1000:>15.2f}")
+
+
+@pytest.mark.slow
+def test_performance_image_banded_threads():
+    """Insertion et extraction par bandes de lignes sur 1 à N threads."""
+    pixels = np.random.randint(0, 256, (4000, 4000, 3), dtype=np.uint8)
+    flat = pixels.reshape(-1)
+    message = np.random.bytes(4 * 1024 * 1024)
+    bits = unpack_bits(message)
+    row = pixels.shape[1] * 3
+
+    logger.info(f"Message de 4 Mo, support 4000x4000 RGB ({os.cpu_count() or 1} cœur(s))")
+    logger.info(f"{'threads':>8} | {'insertion (ms)':>14} | {'extraction (ms)':>15}")
+    for workers in (1, 2, 4, 8):
+        def read(workers=workers):
+            return BitReader(iter_lsb_bytes(flat, workers=workers, align=row)).read_bytes(len(message))
+
+        embed = _best_time(partial(embed_lsb, flat, bits, workers=workers, align=row))
+        extract = _best_time(read)
+        assert read() == message
+        logger.info(f"{workers:>8} | {embed * 1000:>14.2f} | {extract * 1000:>15.2f}")
+
+
+@pytest.mark.slow
+def test_performance_image_native_pixel_buffer():
+    """Décodage direct dans le mode natif contre convert('RGB') + np.array + fromarray."""
+    from PIL import Image
+
+    from stego.image import decode_pixels, encode_pixels
+
+    side = 3000
+    images = {
+        'RGB': Image.fromarray(np.random.randint(0, 256, (side, side, 3), dtype=np.uint8)),
+        'RGBA': Image.fromarray(np.random.randint(0, 256, (side, side, 4), dtype=np.uint8)),
+        'L': Image.fromarray(np.random.randint(0, 256, (side, side), dtype=np.uint8)),
+    }
+
+    def converted(image):
+        array = np.array(image.convert('RGB'))
+        return Image.fromarray(array)
+
+    def native(image):
+        return encode_pixels(decode_pixels(image), image.mode)
+
+    # tracemalloc ne voit que les allocations Python/NumPy (pas celles de Pillow)
+    logger.info(f"Chaîne de pixels d'une requête, image {side}x{side}")
+    logger.info(f"{'mode':>5} | {'chemin':>9} | {'temps (ms)':>10} | {'pic mémoire (Mo)':>16}")
+    for mode, image in images.items():
+        image.load()
+        results = {}
+        for name, func in (('convert', converted), ('natif', native)):
+            results[name] = _peak_memory(partial(func, image))
+            duration = _best_time(partial(func, image))
+            logger.info(f"{mode:>5} | {name:>9} | {duration * 1000:>10.1f} | {results[name] / 2**20:>16.1f}")
+
+        # Un seul tableau de pixels, contre la copie tobytes + np.array
+        assert results['natif'] < results['convert']
+        assert np.array_equal(np.array(native(image)), np.array(image))
+
+
+@pytest.mark.slow
+def test_performance_image_output_profiles():
+    """Latence d'insertion et taille produite selon le profil de sortie."""
+    from PIL import Image
+
+    from stego.image import ImageSteganography
+
+    # Dégradé bruité : se compresse comme une photo, pas comme du bruit pur
+    side = 1000
+    gradient = np.add.outer(np.arange(side), np.arange(side)) // 16
+    pixels = np.stack([gradient, gradient[::-1], gradient.T], axis=-1) % 256
+    pixels = (pixels + np.random.randint(0, 4, pixels.shape)).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='PNG')
+    carrier = buffer.getvalue()
+
+    stego = ImageSteganography()
+    message = "message court"
+    logger.info(f"Insertion d'un message court, image {side}x{side} RGB")
+    logger.info(f"{'profil':>8} | {'temps (ms)':>10} | {'taille (Ko)':>11}")
+    timings = {}
+    for profile in ('png', 'png:9', 'fast', 'png:0', 'bmp', 'tiff', 'webp'):
+        result = stego.hide_data(carrier, message, output=profile)
+        timings[profile] = _best_time(partial(stego.hide_data, carrier, message, output=profile), 1)
+        assert stego.extract_data(result) == message
+        logger.info(f"{profile:>8} | {timings[profile] * 1000:>10.1f} | {len(result) / 1024:>11.0f}")
+
+    assert timings['fast'] < timings['png']
+    assert timings['bmp'] < timings['png']
+
+
+def _photo_png(side, **options):
+    """Dégradé en plan enregistré par Pillow : filtres adaptatifs, Paeth sur presque toutes les lignes."""
+    from PIL import Image
+
+    y, x = np.mgrid[:side, :side]
+    pixels = np.stack([(x * 3 + y * 5) // 8, (x * 5 + y * 2) // 8, (x + y * 7) // 8], axis=-1) % 256
+    buffer = io.BytesIO()
+    Image.fromarray(pixels.astype(np.uint8)).save(buffer, format='PNG', **options)
+    return buffer.getvalue()
+
+
+def _row_filters(data):
+    """Filtre de chaque ligne d'un PNG."""
+    from stego import png
+
+    stream = io.BytesIO(data)
+    info = png.read_info(stream)
+    raw = b''.join(png._inflate(stream))
+    return [raw[row * (info.stride + 1)] for row in range(info.height)]
+
+
+def _count_rows(monkeypatch):
+    """Compte les lignes PNG décodées par les extractions qui suivent."""
+    from stego import png
+
+    decoded = []
+    iter_rows = png.iter_rows
+
+    def counted(stream, info):
+        for row in iter_rows(stream, info):
+            decoded.append(row.size)
+            yield row
+
+    monkeypatch.setattr(png, 'iter_rows', counted)
+    return decoded
+
+
+@pytest.mark.slow
+def test_performance_png_streaming_extraction(monkeypatch):
+    """Extraire un petit message ne décode que les premières lignes d'un grand PNG (lignes Paeth comprises)."""
+    from PIL import Image
+
+    from stego.image import ImageSteganography
+
+    stego = ImageSteganography()
+    message = np.random.bytes(1024)
+    decoded = _count_rows(monkeypatch)
+    logger.info("Extraction d'un message de 1 Ko d'un PNG")
+    logger.info(f"{'image':>11} | {'Pillow (ms)':>11} | {'lignes (ms)':>11} | {'lignes lues':>11}")
+    timings = {}
+    for side in (1000, 4000):
+        carrier = stego.hide_data(_photo_png(side), message, output='fast')
+        assert 4 in _row_filters(carrier)[:10]
+
+        full = _best_time(lambda carrier=carrier: np.asarray(Image.open(io.BytesIO(carrier))), 1)
+        timings[side] = _best_time(lambda carrier=carrier: stego.extract_data(carrier))
+        decoded.clear()
+        assert stego.extract_data(carrier) == message
+        logger.info(f"{f'{side}x{side}':>11} | {full * 1000:>11.1f} | {timings[side] * 1000:>11.1f} | {len(decoded):>11}")
+        assert len(decoded) < 10
+
+    # 16 fois plus de pixels, même coût d'extraction
+    assert timings[4000] < timings[1000] * 3
+    assert timings[4000] * 20 < full
+
+
+@pytest.mark.slow
+def test_performance_png_average_paeth_rows(monkeypatch):
+    """PNG réenregistré avec filtres Average ou Paeth : lignes lues selon la taille du message, pas l'image entière."""
+    from PIL import Image
+
+    from stego.image import ImageSteganography
+
+    stego = ImageSteganography()
+    side = 2000
+    source = _photo_png(side)
+    decoded = _count_rows(monkeypatch)
+    logger.info(f"Extraction d'un PNG {side}x{side} optimisé (filtres Average, Paeth)")
+    logger.info(f"{'message':>8} | {'temps (ms)':>10} | {'lignes lues':>11}")
+    rows, timings = {}, {}
+    for size in (1024, 16 * 1024, 128 * 1024):
+        message = np.random.bytes(size)
+        buffer = io.BytesIO()
+        Image.open(io.BytesIO(stego.hide_data(source, message))).save(buffer, format='PNG', optimize=True)
+        carrier = buffer.getvalue()
+        assert set(_row_filters(carrier)[:10]) & {3, 4}
+
+        timings[size] = _best_time(lambda carrier=carrier: stego.extract_data(carrier))
+        decoded.clear()
+        assert stego.extract_data(carrier) == message
+        rows[size] = len(decoded)
+        logger.info(f"{size // 1024:>5} Ko | {timings[size] * 1000:>10.1f} | {rows[size]:>11}")
+
+    full = _best_time(lambda: np.asarray(Image.open(io.BytesIO(carrier))), 1)
+    logger.info(f"décodage complet par Pillow : {full * 1000:.1f} ms")
+    # Les lignes lues suivent la taille du message : ni repli sur un décodage
+    # complet, ni lecture de toute l'image
+    assert rows[1024] < rows[16 * 1024] < rows[128 * 1024] < side // 2
+    assert rows[1024] <= 2
+    assert timings[1024] * 10 < full
+
+
+@pytest.mark.slow
+def test_performance_bitmap_in_place(tmp_path):
+    """Insertion en place dans un grand BMP : ni décodage, ni copie de l'image."""
+    from PIL import Image
+
+    from stego.bitmap import BitmapSteganography
+    from stego.image import ImageSteganography
+
+    side = 3000
+    source = tmp_path / 'image.bmp'
+    target = tmp_path / 'cachee.bmp'
+    Image.fromarray(np.random.randint(0, 256, (side, side, 3), dtype=np.uint8)).save(source, format='BMP')
+    message = np.random.bytes(64 * 1024)
+    bitmap_stego = BitmapSteganography()
+    image_stego = ImageSteganography()
+
+    decoded = _best_time(lambda: image_stego.hide_data(str(source), message, output='bmp'), 1)
+    decoded_memory = _peak_memory(lambda: image_stego.hide_data(str(source), message, output='bmp'))
+    in_place = _best_time(lambda: bitmap_stego.hide_file(str(source), str(target), message), 1)
+    in_place_memory = _peak_memory(lambda: bitmap_stego.hide_file(str(source), str(target), message))
+    assert bitmap_stego.extract_data(str(target)) == message
+
+    logger.info(f"Insertion de 64 Ko, BMP {side}x{side} ({source.stat().st_size // 2 ** 20} Mo)")
+    logger.info(f"{'méthode':>10} | {'temps (ms)':>10} | {'pic (Mo)':>8}")
+    logger.info(f"{'décodage':>10} | {decoded * 1000:>10.1f} | {decoded_memory / 2 ** 20:>8.1f}")
+    logger.info(f"{'en place':>10} | {in_place * 1000:>10.1f} | {in_place_memory / 2 ** 20:>8.1f}")
+
+    # La mémoire allouée ne dépend que du message, pas de la taille de l'image
+    assert in_place_memory < source.stat().st_size / 4
+    assert in_place < decoded
+
+
+@pytest.mark.slow
+def test_performance_scattered_embedding():
+    """Insertion dispersée sur un support de 100 millions d'éléments, sans table d'index."""
+    from PIL import Image
+
+    from stego.image import ImageSteganography
+    from stego.lsb import embed_lsb_chunks
+    from stego.scatter import Permutation, embed_scattered
+
+    carrier = np.random.randint(0, 256, 10 ** 8, dtype=np.uint8)
+    permutation = Permutation(carrier.size, b'cle')
+    logger.info("Insertion brute, support de 100 M éléments")
+    logger.info(f"{'message':>8} | {'séquentiel (ms)':>15} | {'dispersé (ms)':>13} | {'pic dispersé (Mo)':>17}")
+    for size in (64 * 1024, 1024 * 1024):
+        message = np.random.bytes(size)
+        sequential = _best_time(partial(embed_lsb_chunks, carrier, [message]), 1)
+        scattered = _best_time(partial(embed_scattered, carrier, [message], permutation), 1)
+        memory = _peak_memory(partial(embed_scattered, carrier, [message], permutation))
+        logger.info(f"{size // 1024:>6}Ko | {sequential * 1000:>15.1f} | {scattered * 1000:>13.1f} | "
+                    f"{memory / 2 ** 20:>17.1f}")
+        # Mémoire de travail bornée (une table d'index de np.random.permutation
+        # occuperait 800 Mo)
+        assert memory < 32 * 2 ** 20
+    del carrier
+
+    # De bout en bout, le décodage et l'encodage de l'image dominent
+    side = 3000
+    buffer = io.BytesIO()
+    Image.fromarray(np.random.randint(0, 256, (side, side, 3), dtype=np.uint8)).save(buffer, format='BMP')
+    image = buffer.getvalue()
+    stego = ImageSteganography()
+    message = np.random.bytes(256 * 1024)
+    sequential = _best_time(lambda: stego.hide_data(image, message, "secret", output='bmp'), 1)
+    scattered = _best_time(lambda: stego.hide_data(image, message, "secret", output='bmp', scatter=True), 1)
+    result = stego.hide_data(image, message, "secret", output='bmp', scatter=True)
+    assert stego.extract_data(result, "secret") == message
+    logger.info(f"Image {side}x{side}, 256 Ko : séquentiel {sequential * 1000:.1f} ms, dispersé {scattered * 1000:.1f} ms")
+    assert scattered < sequential * 3
+
+
+@pytest.mark.slow
+def test_performance_audio_vectorized_embed():
+    """WAV stéréo de 10 minutes, message de 1 Mo : insertion vectorisée contre la boucle par bit."""
+    import wave
+
+    from stego.audio import AudioSteganography
+    from stego.payload import prepare_payload
+
+    rate, seconds = 44100, 600
+    samples = np.random.randint(-20000, 20000, rate * seconds * 2, dtype=np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as output:
+        output.setnchannels(2)
+        output.setsampwidth(2)
+        output.setframerate(rate)
+        output.writeframes(samples)
+    carrier = buffer.getvalue()
+    message = np.random.bytes(1024 * 1024)
+    stego = AudioSteganography()
+
+    def loop_embed():
+        # Ancienne implémentation : un tour de boucle Python par bit, puis astype
+        audio_array = samples.copy()
+        bits = unpack_bits(prepare_payload(message))
+        for i in range(bits.size):
+            audio_array[i] = (audio_array[i] & 0xFFFE) | bits[i]
+        return audio_array.astype(np.int16).tobytes()
+
+    loop = _best_time(loop_embed, 1)
+    vectorized = _best_time(lambda: stego.hide_data(carrier, message), 1)
+    memory = _peak_memory(lambda: stego.hide_data(carrier, message))
+    assert stego.extract_data(stego.hide_data(carrier, message)) == message
+
+    logger.info(f"WAV stéréo {seconds // 60} min ({len(carrier) // 2 ** 20} Mo), message de 1 Mo : "
+                f"boucle {loop:.2f} s, vectorisé {vectorized * 1000:.0f} ms (fichier complet), "
+                f"pic {memory / 2 ** 20:.0f} Mo")
+    assert vectorized < loop / 10
+    # Copie des échantillons et fichier produit, sans copie astype supplémentaire
+    assert memory < len(carrier) * 2.5
+
+
+@pytest.mark.slow
+def test_performance_audio_extract_reads_payload_only(tmp_path):
+    """Message de 30 octets dans un WAV de 1 Go : quelques Ko lus, mémoire constante."""
+    import struct
+    import wave
+
+    from stego.audio import AudioSteganography
+
+    stego = AudioSteganography()
+    message = "x" * 30
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as output:
+        output.setnchannels(2)
+        output.setsampwidth(2)
+        output.setframerate(44100)
+        output.writeframes(np.random.randint(-20000, 20000, 44100 * 2, dtype=np.int16))
+    head = stego.hide_data(buffer.getvalue(), message)
+    # Fichier creux de 1 Go : en-tête WAV et début des échantillons réels
+    size = 1 << 30
+    path = tmp_path / 'long.wav'
+    with open(path, 'wb') as stream:
+        stream.write(head[:4] + struct.pack('<I', size - 8) + head[8:40] + struct.pack('<I', size - 44) + head[44:])
+        stream.truncate(size)
+
+    elapsed = _best_time(lambda: stego.extract_data(str(path)))
+    memory = _peak_memory(lambda: stego.extract_data(str(path)))
+    assert stego.extract_data(str(path)) == message
+
+    logger.info(f"Extraction de 30 octets d'un WAV de 1 Go : {elapsed * 1000:.2f} ms, pic {memory / 1024:.0f} Ko")
+    assert memory < 1 << 20
+
+
+@pytest.mark.slow
+def test_performance_audio_streamed_rf64(tmp_path):
+    """Message de 1 Mo dans un RF64 creux de 5 Go : insertion en flux, mémoire bornée par un bloc."""
+    import struct
+
+    from stego.audio import AudioSteganography
+    from stego.wav import MAX_READ
+
+    stego = AudioSteganography()
+    message = np.random.bytes(1024 * 1024)
+    size = 5 << 30
+    fmt = b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 2, 44100, 44100 * 4, 4, 16)
+    head = b'WAVE' + b'ds64' + struct.pack('<IQQQI', 28, size - 8, size - 80, (size - 80) // 4, 0) + fmt
+    head = b'RF64' + struct.pack('<I', 0xFFFFFFFF) + head + b'data' + struct.pack('<I', 0xFFFFFFFF)
+    path = tmp_path / 'long.wav'
+    with open(path, 'wb') as stream:
+        stream.write(head)
+        stream.write(np.random.randint(-20000, 20000, 1 << 24, dtype=np.int16).tobytes())
+        stream.truncate(size)
+
+    def hide():
+        with open(path, 'rb') as source:
+            return sum(len(piece) for piece in stego.hide_stream(source, message))
+
+    elapsed = _best_time(hide, 1)
+    memory = _peak_memory(hide)
+    with open(path, 'rb') as source:
+        pieces = stego.hide_stream(source, message)
+        start = b''.join(next(pieces) for _ in range(6))
+    assert stego.extract_data(start) == message
+    assert hide() == size
+
+    logger.info(f"RF64 de 5 Go, message de 1 Mo : {elapsed:.2f} s ({size / elapsed / 2 ** 30:.1f} Go/s), "
+                f"pic {memory / 2 ** 20:.1f} Mo")
+    # Un bloc de frames (4 Mo), les bits d'une tranche du message (8 Mo) et
+    # le message, quelle que soit la taille du fichier
+    assert memory < MAX_READ * 4 + (16 << 20)
+
+
+@pytest.mark.slow
+def test_performance_image_hide_many():
+    """Un message par destinataire dans un même modèle : lot empilé contre appels séparés."""
+    from PIL import Image
+
+    from stego.image import ImageSteganography
+
+    side, count = 1000, 32
+    buffer = io.BytesIO()
+    Image.fromarray(np.random.randint(0, 256, (side, side, 3), dtype=np.uint8)).save(buffer, format='PNG')
+    template = buffer.getvalue()
+    payloads = [f"destinataire {index:04d} ".encode() * 200 for index in range(count)]
+    stego = ImageSteganography()
+
+    logger.info(f"{count} messages dans un modèle {side}x{side} RGB (temps par image)")
+    logger.info(f"{'profil':>8} | {'séparés (ms)':>12} | {'hide_many (ms)':>14}")
+    timings = {}
+    for profile in ('bmp', 'png'):
+        separate = _best_time(lambda profile=profile: [stego.hide_data(template, data, output=profile)
+                                                       for data in payloads], 1)
+        batched = _best_time(partial(stego.hide_many, template, payloads, output=profile), 1)
+        timings[profile] = (separate, batched)
+        logger.info(f"{profile:>8} | {separate / count * 1000:>12.1f} | {batched / count * 1000:>14.1f}")
+
+    results = stego.hide_many(template, payloads, output='bmp')
+    assert [stego.extract_data(result) for result in results[:4]] == payloads[:4]
+    # Décodage du modèle et passe d'insertion partagés
+    assert timings['bmp'][1] < timings['bmp'][0]
+
+
+@pytest.mark.slow
+def test_performance_jpeg_coefficients():
+    """Photo JPEG : insertion dans les coefficients DCT, contre décodage et PNG."""
+    from PIL import Image
+
+    from stego.image import ImageSteganography
+
+    width, height = 2000, 1500
+    gradient = np.add.outer(np.arange(height), np.arange(width)) // 8
+    pixels = np.stack([gradient, gradient[::-1], gradient * 3], axis=-1) % 256
+    pixels = (pixels + np.random.randint(0, 24, pixels.shape)).clip(0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=90)
+    carrier = buffer.getvalue()
+    del pixels, gradient
+
+    stego = ImageSteganography()
+    message = np.random.bytes(16 * 1024)
+    jpeg = stego.hide_data(carrier, message)
+    png = stego.hide_data(carrier, message, output='png')
+    coefficients = _best_time(lambda: stego.hide_data(carrier, message), 1)
+    decoded = _best_time(lambda: stego.hide_data(carrier, message, output='png'), 1)
+    extract = _best_time(lambda: stego.extract_data(jpeg), 1)
+    assert stego.extract_data(jpeg) == message
+    assert Image.open(io.BytesIO(jpeg)).format == 'JPEG'
+
+    logger.info(f"Photo {width}x{height} ({len(carrier) // 1024} Ko), message de 16 Ko")
+    logger.info(f"coefficients DCT : {coefficients * 1000:.0f} ms, {len(jpeg) // 1024} Ko ; "
+                f"pixels (PNG) : {decoded * 1000:.0f} ms, {len(png) // 1024} Ko ; extraction {extract * 1000:.0f} ms")
+    assert len(jpeg) < len(carrier) * 1.01
+    assert len(png) > len(carrier) * 3
+
+
+@pytest.mark.slow
+def test_performance_multi_frame_streaming(tmp_path):
+    """Insertion dans un TIFF de 40 pages : la mémoire suit la taille d'une page, pas leur nombre."""
+    from PIL import Image
+
+    from stego.frames import MultiFrameSteganography
+
+    side, count = 500, 40
+    pages = [Image.fromarray(np.random.randint(0, 256, (side, side, 3), dtype=np.uint8)) for _ in range(count)]
+    source = tmp_path / 'pages.tiff'
+    target = tmp_path / 'cachee.tiff'
+    pages[0].save(source, format='TIFF', save_all=True, append_images=pages[1:])
+    del pages
+    page_size = side * side * 3
+    stego = MultiFrameSteganography()
+    # Message réparti sur toutes les pages
+    message = np.random.bytes(stego.get_capacity(str(source)) // 8 - 1024)
+
+    elapsed = _best_time(lambda: stego.hide_file(str(source), str(target), message), 1)
+    memory = _peak_memory(lambda: stego.hide_file(str(source), str(target), message))
+    assert stego.extract_data(str(target)) == message
+
+    logger.info(f"Insertion de {len(message) // 2 ** 20} Mo dans {count} pages {side}x{side} : "
+                f"{elapsed * 1000:.1f} ms, pic {memory / 2 ** 20:.1f} Mo (page : {page_size / 2 ** 20:.1f} Mo)")
+    # Le message lui-même (chiffré par blocs) et quelques pages au plus
+    assert memory < len(message) + 8 * page_size
+
+
+@pytest.mark.slow
+def test_performance_video_streaming(tmp_path):
+    """Insertion dans une vidéo Y4M de 120 images : mémoire d'une image, quelle que soit la durée."""
+    from stego.video import VideoSteganography
+
+    width, height, count = 640, 360, 120
+    frame_size = width * height * 3 // 2
+    source = tmp_path / 'clip.y4m'
+    target = tmp_path / 'cachee.y4m'
+    with open(source, 'wb') as stream:
+        stream.write(f"YUV4MPEG2 W{width} H{height} F25:1 C420jpeg\n".encode())
+        frame = np.random.bytes(frame_size)
+        for _ in range(count):
+            stream.write(b'FRAME\n' + frame)
+    stego = VideoSteganography()
+    message = np.random.bytes(1024 * 1024)
+
+    elapsed = _best_time(lambda: stego.hide_file(str(source), str(target), message), 1)
+    memory = _peak_memory(lambda: stego.hide_file(str(source), str(target), message))
+    extract = _best_time(lambda: stego.extract_data(str(target)), 1)
+    assert stego.extract_data(str(target)) == message
+
+    size = source.stat().st_size
+    logger.info(f"Vidéo {width}x{height}, {count} images ({size // 2 ** 20} Mo), message de 1 Mo")
+    logger.info(f"insertion {elapsed * 1000:.1f} ms ({size / elapsed / 2 ** 20:.0f} Mo/s), pic {memory / 2 ** 20:.1f} Mo, "
+                f"extraction {extract * 1000:.1f} ms")
+    # Le message et quelques images, pas la vidéo entière
+    assert memory < len(message) * 2 + 8 * frame_size
@@ -0,0 +1,185 @@
+"""
+Tests pour la lecture incrémentale des images PNG.
+"""
+
+import io
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+from stego import png
+from stego.bitmap import recover_rows
+from stego.image import ImageSteganography
+
+
+def _chunk(chunk_type, data):
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+
+def _filter_row(filter_type, row, prior, pixel_size):
+    """Applique un filtre PNG à une ligne (opération inverse du décodeur)."""
+    out = bytearray(len(row))
+    for i in range(len(row)):
+        a = row[i - pixel_size] if i >= pixel_size else 0
+        b = prior[i]
+        c = prior[i - pixel_size] if i >= pixel_size else 0
+        if filter_type == 0:
+            predictor = 0
+        elif filter_type == 1:
+            predictor = a
+        elif filter_type == 2:
+            predictor = b
+        elif filter_type == 3:
+            predictor = (a + b) // 2
+        else:
+            pa, pb, pc = abs(b - c), abs(a - c), abs(a + b - 2 * c)
+            predictor = a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+        out[i] = (row[i] - predictor) & 0xFF
+    return bytes([filter_type]) + bytes(out)
+
+
+def _encode_png(array, filter_type, color_type=2, bit_depth=8, idat_size=100):
+    """Encode une image PNG avec un filtre donné sur toutes les lignes (ou un filtre par ligne)."""
+    height, width = array.shape[:2]
+    rows = array.astype('>u2' if bit_depth == 16 else np.uint8).reshape(height, -1)
+    pixel_size = rows.shape[1] * rows.itemsize // width
+    raw = b''
+    prior = bytes(rows.shape[1] * rows.itemsize)
+    filters = filter_type if isinstance(filter_type, list) else [filter_type] * height
+    for row, row_filter in zip(rows, filters):
+        row = row.tobytes()
+        raw += _filter_row(row_filter, row, prior, pixel_size)
+        prior = row
+    compressed = zlib.compress(raw)
+    ihdr = struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)
+    # Plusieurs blocs IDAT, comme les encodeurs courants
+    idat = b''.join(_chunk(b'IDAT', compressed[i:i + idat_size]) for i in range(0, len(compressed), idat_size))
+    return png.PNG_SIGNATURE + _chunk(b'IHDR', ihdr) + idat + _chunk(b'IEND', b'')
+
+
+@pytest.mark.parametrize('filter_type', [0, 1, 2, 3, 4])
+def test_unfilter_matches_pillow(filter_type):
+    """Chaque filtre est défait comme le fait Pillow."""
+    array = np.random.randint(0, 256, (20, 30, 3), dtype=np.uint8)
+    data = _encode_png(array, filter_type)
+
+    stream = io.BytesIO(data)
+    rows = list(png.iter_rows(stream, png.read_info(stream)))
+
+    assert np.array_equal(np.array(Image.open(io.BytesIO(data))), array)
+    assert np.array_equal(np.stack(rows).reshape(array.shape), array)
+
+
+def test_average_paeth_rows_streamed():
+    """Average et Paeth sont défaits ligne par ligne : la lecture s'arrête aux lignes demandées."""
+    array = np.random.randint(0, 256, (60, 30, 4), dtype=np.uint8)
+    data = _encode_png(array, [1, 2, 0, 4, 1, 3] * 10, color_type=6, idat_size=256)
+
+    stream = io.BytesIO(data)
+    rows = list(png.iter_rows(stream, png.read_info(stream)))
+    assert np.array_equal(np.stack(rows).reshape(array.shape), array)
+
+    stream = io.BytesIO(data)
+    rows = png.iter_rows(stream, png.read_info(stream))
+    first = [next(rows) for _ in range(6)]
+    assert np.array_equal(np.stack(first).reshape(6, 30, 4), array[:6])
+    assert stream.tell() < len(data) // 2
+
+
+def test_scattered_body_decoded_by_pillow(monkeypatch):
+    """Un corps dispersé demande toutes les lignes : l'image est décodée d'un bloc."""
+    stego = ImageSteganography()
+    carrier = io.BytesIO()
+    Image.fromarray(np.random.randint(0, 256, (80, 60, 3), dtype=np.uint8)).save(carrier, format='PNG')
+    modified_image = stego.hide_data(carrier.getvalue(), "dispersé", "secret", scatter=True)
+    calls = []
+    read_pixels = png.read_pixels
+    monkeypatch.setattr(png, 'read_pixels', lambda *args: calls.append(args) or read_pixels(*args))
+
+    assert stego.extract_data(modified_image, "secret") == "dispersé"
+    assert len(calls) == 1
+
+
+def test_16_bit_grayscale():
+    """Les échantillons 16 bits sont relus en entiers natifs."""
+    array = np.random.randint(0, 65536, (10, 12), dtype=np.uint16)
+    data = _encode_png(array, 4, color_type=0, bit_depth=16)
+
+    stream = io.BytesIO(data)
+    rows = list(png.iter_rows(stream, png.read_info(stream)))
+
+    assert np.array_equal(np.stack(rows), array)
+
+
+def test_unsupported_png():
+    """PNG entrelacé ou à palette : pris en charge par Pillow, pas par le lecteur."""
+    interlaced = bytearray(_encode_png(np.zeros((4, 4, 3), dtype=np.uint8), 0))
+    interlaced[28] = 1  # Octet d'entrelacement de IHDR
+    assert png.read_info(io.BytesIO(bytes(interlaced))) is None
+
+    buffer = io.BytesIO()
+    Image.new('P', (4, 4)).save(buffer, format='PNG')
+    assert png.read_info(io.BytesIO(buffer.getvalue())) is None
+    assert png.read_info(io.BytesIO(b'GIF89a')) is None
+
+
+def test_corrupted_idat():
+    """Un bloc IDAT altéré est détecté par son CRC."""
+    data = bytearray(_encode_png(np.random.randint(0, 256, (20, 30, 3), dtype=np.uint8), 0))
+    data[60] ^= 0xFF  # Dans le premier bloc IDAT
+
+    stream = io.BytesIO(bytes(data))
+    with pytest.raises(ValueError):
+        list(png.iter_rows(stream, png.read_info(stream)))
+
+
+def test_extraction_decodes_only_needed_rows():
+    """L'extraction d'un petit message s'arrête aux premières lignes."""
+    stego = ImageSteganography()
+    carrier = io.BytesIO()
+    Image.fromarray(np.random.randint(0, 256, (200, 100, 3), dtype=np.uint8)).save(carrier, format='PNG')
+    modified_image = stego.hide_data(carrier.getvalue(), "court")
+
+    stream = io.BytesIO(modified_image)
+    info = png.read_info(stream)
+    decoded = []
+
+    def rows():
+        for row in png.iter_rows(stream, info):
+            decoded.append(row)
+            yield row
+
+    assert recover_rows(rows(), None) == "court"
+    assert len(decoded) < 5
+
+
+@pytest.mark.parametrize('mode', ['RGB', 'RGBA', 'L', 'I;16'])
+def test_animation_writer(mode):
+    """Les images écrites une à une sont relues à l'identique par Pillow, avec leur durée."""
+    dtype = np.uint16 if mode == 'I;16' else np.uint8
+    shape = (20, 30) if mode in ('L', 'I;16') else (20, 30, len(mode))
+    frames = [np.random.randint(0, np.iinfo(dtype).max + 1, shape, dtype=dtype) for _ in range(3)]
+    buffer = io.BytesIO()
+    writer = png.AnimationWriter(buffer, 3, loop=2)
+    for index, frame in enumerate(frames):
+        writer.add_frame(Image.fromarray(frame, mode), duration=100 * (index + 1))
+    writer.close()
+
+    image = Image.open(io.BytesIO(buffer.getvalue()))
+    assert image.n_frames == 3 and image.info['loop'] == 2
+    for index, frame in enumerate(frames):
+        image.seek(index)
+        assert image.info['duration'] == 100 * (index + 1)
+        assert np.array_equal(np.array(image), frame)
+
+
+def test_animation_writer_checks_frames():
+    """Nombre d'images annoncé et taille des images sont vérifiés."""
+    writer = png.AnimationWriter(io.BytesIO(), 2)
+    writer.add_frame(Image.new('RGB', (10, 10)))
+    with pytest.raises(ValueError):
+        writer.add_frame(Image.new('RGB', (10, 12)))
+    with pytest.raises(ValueError):
+        writer.close()
@@ -0,0 +1,145 @@
+"""
+Tests pour la dispersion des données selon une permutation à clé.
+"""
+
+import numpy as np
+import pytest
+from stego import kdf
+from stego.crypto import PasswordError
+from stego.kdf import KDFParams, cache_info, clear_cache
+from stego.payload import (HEADER_BITS, HEADER_SIZE, SCATTER_PREFIX_SIZE, payload_scattered, prepare_payload,
+                           recover_data)
+from stego.scatter import (Permutation, ScatteredStream, embed_scattered, iter_scattered_bytes,
+                           read_scatter_prefix, scatter_permutation)
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 17, 1000, 4097, 65536, 100003])
+def test_permutation_is_bijective(size):
+    """Chaque index du domaine a une image distincte dans [0, size)."""
+    values = Permutation(size, b'cle')(np.arange(size))
+
+    assert values.min() >= 0 and values.max() < size
+    assert np.unique(values).size == size
+
+
+def test_permutation_batches_and_keys():
+    """Le résultat ne dépend pas du découpage en lots, mais de la clé."""
+    permutation = Permutation(10 ** 6, b'cle')
+    whole = permutation(np.arange(5000))
+
+    assert np.array_equal(np.concatenate([permutation(np.arange(0, 1234)), permutation(np.arange(1234, 5000))]),
+                          whole)
+    assert not np.array_equal(Permutation(10 ** 6, b'autre')(np.arange(5000)), whole)
+    # Les premières positions sont réparties sur tout le support
+    assert whole.max() > 9 * 10 ** 5 and whole.min() < 10 ** 5
+
+
+def test_permutation_large_domain():
+    """Au-delà de 2^32 éléments, les positions sont calculées en 64 bits."""
+    size = 3 * 2 ** 33
+    values = Permutation(size, b'cle')(np.arange(1000))
+
+    assert values.max() < size and np.unique(values).size == 1000
+
+
+@pytest.mark.parametrize('depth', [1, 3])
+def test_embed_and_read_scattered(depth):
+    """Les octets écrits aux positions permutées sont relus à l'identique."""
+    carrier = np.random.randint(0, 256, 20000, dtype=np.uint8)
+    original = carrier.copy()
+    data = np.random.bytes(1000)
+    permutation = Permutation(carrier.size - 100, b'cle')
+
+    count = embed_scattered(carrier, [data[:333], data[333:]], permutation, 100, depth)
+
+    assert count == -(-len(data) * 8 // depth)
+    assert np.array_equal(carrier[:100], original[:100])
+    assert b''.join(iter_scattered_bytes(carrier, permutation, 100, depth))[:len(data)] == data
+
+
+@pytest.mark.parametrize('depth', [1, 3])
+def test_scattered_stream_blocks(depth):
+    """Écriture et lecture par blocs successifs : mêmes éléments qu'en accès direct."""
+    carrier = np.random.randint(-1000, 1000, 30000, dtype=np.int16)
+    expected = carrier.copy()
+    data = np.random.bytes(1200)
+    permutation = Permutation(carrier.size - 100, b'cle')
+    embed_scattered(expected, [data], permutation, 100, depth)
+
+    writer = ScatteredStream(permutation, -(-len(data) * 8 // depth), 100, depth)
+    writer.load([data[:500], data[500:]])
+    for offset in range(0, carrier.size, 7000):
+        writer.write(carrier[offset:offset + 7000])
+
+    assert writer.finished
+    assert np.array_equal(carrier, expected)
+    reader = ScatteredStream(permutation, -(-len(data) * 8 // depth // 8) * 8, 100, depth)
+    for offset in range(0, carrier.size, 4096):
+        reader.read(carrier[offset:offset + 4096])
+    assert reader.data()[:len(data)] == data
+
+
+def test_scattered_view():
+    """Une vue non contiguë est modifiée en place, sans copie à plat."""
+    buffer = np.random.randint(0, 256, (50, 40, 4), dtype=np.uint8)
+    view = buffer[::-1, :, 2::-1]
+    permutation = Permutation(view.size, b'cle')
+
+    embed_scattered(view, [b'vue'], permutation)
+
+    assert b''.join(iter_scattered_bytes(view, permutation))[:3] == b'vue'
+    assert b''.join(iter_scattered_bytes(np.ascontiguousarray(view), permutation))[:3] == b'vue'
+
+
+def test_scattered_payload():
+    """Le conteneur annonce la dispersion, qui exige un mot de passe."""
+    container = prepare_payload("dispersé", password="secret", scatter=True)
+
+    assert payload_scattered(container[:HEADER_SIZE])
+    assert not payload_scattered(prepare_payload("séquentiel")[:HEADER_SIZE])
+    assert recover_data([container], "secret") == "dispersé"
+    with pytest.raises(ValueError):
+        prepare_payload("dispersé", scatter=True)
+    with pytest.raises(PasswordError) as error:
+        scatter_permutation(container[:HEADER_SIZE], None, 1000)
+    assert error.value.code == 'password_required'
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+def test_scatter_key_needs_kdf(depth):
+    """Paramètres de clé lisibles sans mot de passe ; chaque essai de mot de passe coûte une dérivation."""
+    container = prepare_payload("dispersé", password="secret", depth=depth, scatter=True)
+    prefix = container[:SCATTER_PREFIX_SIZE]
+    KDFParams.decode(prefix[HEADER_SIZE:])
+    carrier = np.random.randint(0, 256, 20000, dtype=np.uint8)
+    layout = scatter_permutation(prefix, "secret", carrier.size - HEADER_BITS, depth)
+    embed_scattered(carrier, [container[HEADER_SIZE:]], layout, HEADER_BITS, depth)
+
+    # Les paramètres de clé suivent l'en-tête, sans permutation
+    assert read_scatter_prefix(carrier, container[:HEADER_SIZE], depth) == prefix
+    clear_cache()
+    for password in ("a", "b", "c"):
+        scatter_permutation(prefix, password, carrier.size - HEADER_BITS, depth)
+    assert cache_info()['misses'] == 3
+    with pytest.raises(ValueError):
+        scatter_permutation(prefix, "secret", 10, depth)
+
+
+def test_scatter_single_derivation(monkeypatch):
+    """Cacher un conteneur dispersé ne dérive la clé qu'une fois."""
+    derive = kdf._derive
+    calls = []
+
+    def spy(*args):
+        calls.append(args)
+        return derive(*args)
+
+    monkeypatch.setattr(kdf, '_derive', spy)
+    clear_cache()
+    container = prepare_payload("dispersé", password="secret", scatter=True)
+    scatter_permutation(container[:SCATTER_PREFIX_SIZE], "secret", 10000)
+
+    assert len(calls) == 1
+    assert recover_data([container], "secret") == "dispersé"
+    assert len(calls) == 1
+
@@ -127,6 +127,7 @@ def test_calculate_lsb_capacity():
     # Capacité = largeur * hauteur * 3 canaux RGB
     expected_capacity = 100 * 200 * 3
     assert capacity == expected_capacity
+    assert calculate_lsb_capacity(image_size, bits_per_channel=2) == expected_capacity * 2
 
 
 def test_validate_file_type():
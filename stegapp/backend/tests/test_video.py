@@ -0,0 +1,172 @@
+"""
+Tests pour la stéganographie dans les vidéos non compressées (YUV4MPEG2, AVI).
+"""
+
+import io
+import struct
+
+import numpy as np
+import pytest
+from stego.payload import HEADER_BITS
+from stego.video import AVIReader, VideoSteganography, Y4MReader, open_video, output_type
+
+
+def _y4m(width, height, count, colorspace='420jpeg', frame_params=b''):
+    """Vidéo YUV4MPEG2 aléatoire."""
+    stream = io.BytesIO()
+    stream.write(f"YUV4MPEG2 W{width} H{height} F25:1 Ip A1:1 C{colorspace}\n".encode())
+    frame_size = Y4MReader(io.BytesIO(stream.getvalue())).frame_size
+    for _ in range(count):
+        stream.write(b'FRAME' + frame_params + b'\n')
+        stream.write(np.random.bytes(frame_size))
+    return stream.getvalue()
+
+
+def _chunk(chunk_id, data):
+    return struct.pack('<4sI', chunk_id, len(data)) + data + b'\0' * (len(data) & 1)
+
+
+def _list(form, *chunks):
+    return _chunk(b'LIST', form + b''.join(chunks))
+
+
+def _avi(width, height, count, bit_count=24):
+    """AVI RGB non compressé aléatoire, avec un flux audio entrelacé."""
+    stride = (width * bit_count // 8 + 3) & ~3
+    frame_size = stride * height
+    bitmap_info = struct.pack('<IiiHHIIiiII', 40, width, height, 1, bit_count, 0, frame_size, 0, 0, 0, 0)
+    video = _list(b'strl', _chunk(b'strh', b'vidsDIB ' + bytes(48)), _chunk(b'strf', bitmap_info))
+    audio = _list(b'strl', _chunk(b'strh', b'auds' + bytes(52)), _chunk(b'strf', bytes(18)))
+    chunks = []
+    for _ in range(count):
+        chunks += [_chunk(b'00db', np.random.bytes(frame_size)), _chunk(b'01wb', np.random.bytes(101))]
+    body = (b'AVI ' + _list(b'hdrl', _chunk(b'avih', bytes(56)), video, audio)
+            + _list(b'movi', *chunks) + _chunk(b'idx1', bytes(16 * count)))
+    return struct.pack('<4sI', b'RIFF', len(body)) + body
+
+
+@pytest.mark.parametrize('colorspace,frame_size', [
+    ('420jpeg', 33 * 17 + 2 * 17 * 9), ('422', 33 * 17 + 2 * 17 * 17), ('444', 3 * 33 * 17),
+    ('mono', 33 * 17), ('444alpha', 4 * 33 * 17), ('420p10', 2 * (33 * 17 + 2 * 17 * 9)),
+])
+def test_y4m_frame_size(colorspace, frame_size):
+    """La taille des images suit le sous-échantillonnage et la profondeur."""
+    reader = Y4MReader(io.BytesIO(_y4m(33, 17, 2, colorspace)))
+
+    assert reader.frame_size == frame_size
+    assert reader.frame_channels() == [33 * 17, 33 * 17]
+
+
+@pytest.mark.parametrize('colorspace', ['420jpeg', '444', '420p10'])
+@pytest.mark.parametrize('bits_per_channel', [1, 3])
+def test_y4m_luma_only(colorspace, bits_per_channel):
+    """Seul le plan de luminance change ; le message s'étend sur plusieurs images."""
+    data = _y4m(40, 30, 4, colorspace, b' Ixyz')
+    stego = VideoSteganography()
+    message = np.random.bytes(40 * 30 * bits_per_channel * 2 // 8)
+
+    modified = stego.hide_data(data, message, bits_per_channel=bits_per_channel)
+
+    assert len(modified) == len(data)
+    assert stego.extract_data(modified) == message
+    reader = Y4MReader(io.BytesIO(data))
+    original = io.BytesIO(data)
+    changed = io.BytesIO(modified)
+    assert original.readline() == changed.readline()
+    luma_bytes = reader.luma_size * reader.dtype.itemsize
+    for index in range(4):
+        assert original.readline() == changed.readline() == b'FRAME Ixyz\n'
+        before, after = original.read(reader.frame_size), changed.read(reader.frame_size)
+        assert before[luma_bytes:] == after[luma_bytes:]
+        assert (before == after) == (index == 3)
+
+
+@pytest.mark.parametrize('bit_count', [24, 32])
+def test_avi_round_trip(bit_count):
+    """Seuls les octets des pixels changent : remplissage, audio et index sont recopiés."""
+    data = _avi(13, 7, 6, bit_count)
+    stego = VideoSteganography()
+    message = np.random.bytes(stego.get_capacity(data) // 8 - 60)
+
+    modified = stego.hide_data(data, message)
+
+    assert len(modified) == len(data)
+    assert stego.extract_data(modified) == message
+    movi = data.index(b'movi')
+    assert modified[:movi] == data[:movi]
+    assert modified[data.index(b'idx1'):] == data[data.index(b'idx1'):]
+    offset = movi + 4
+    stride = (13 * bit_count // 8 + 3) & ~3
+    for _ in range(6):
+        offset += 8
+        for row in range(7):
+            start = offset + row * stride + 13 * bit_count // 8
+            assert modified[start:offset + (row + 1) * stride] == data[start:offset + (row + 1) * stride]
+        offset += stride * 7
+        assert modified[offset:offset + 110] == data[offset:offset + 110]
+        offset += 110
+
+
+def test_capacity():
+    """La capacité est la somme des capacités des images."""
+    stego = VideoSteganography()
+
+    assert stego.get_capacity(_y4m(40, 30, 5)) == 5 * 40 * 30 - HEADER_BITS
+    assert stego.get_capacity(_y4m(40, 30, 5), 2) == 2 * (5 * 40 * 30 - HEADER_BITS)
+    assert stego.get_capacity(_avi(16, 8, 3, 32)) == 3 * 16 * 8 * 4 - HEADER_BITS
+
+
+def test_scatter_and_password():
+    """Chiffrement et dispersion, comme pour les images."""
+    data = _y4m(40, 30, 3)
+    stego = VideoSteganography()
+
+    modified = stego.hide_data(data, "dispersé", "secret", bits_per_channel=2, scatter=True)
+
+    assert stego.extract_data(modified, "secret") == "dispersé"
+    with pytest.raises(ValueError):
+        stego.extract_data(modified)
+
+
+def test_hide_file(tmp_path):
+    """hide_file lit et écrit les images directement sur le disque."""
+    source = tmp_path / 'clip.y4m'
+    target = tmp_path / 'cachee.y4m'
+    source.write_bytes(_y4m(40, 30, 3))
+    stego = VideoSteganography()
+
+    stego.hide_file(str(source), str(target), "sur disque")
+
+    assert stego.extract_data(str(target)) == "sur disque"
+    assert output_type(str(target)) == ('video/x-yuv4mpeg', 'y4m')
+
+
+def test_hide_stream():
+    """hide_stream produit, image par image, le même fichier que hide_data."""
+    data = _y4m(40, 30, 3)
+    stego = VideoSteganography()
+
+    pieces = list(stego.hide_stream(io.BytesIO(data), "en flux", "secret", scatter=True))
+
+    assert len(pieces) > 3
+    modified = b''.join(pieces)
+    assert len(modified) == len(data)
+    assert stego.extract_stream(io.BytesIO(modified), "secret") == "en flux"
+    with pytest.raises(ValueError):
+        stego.hide_stream(io.BytesIO(data), "x" * 10000)
+
+
+def test_unsupported_videos():
+    """Formats inconnus, AVI compressé, vidéo trop petite."""
+    stego = VideoSteganography()
+    compressed = _avi(16, 8, 2).replace(struct.pack('<HI', 24, 0), struct.pack('<H4s', 24, b'MJPG'), 1)
+
+    with pytest.raises(ValueError):
+        open_video(io.BytesIO(b'\x00\x00\x00\x18ftypmp42'))
+    with pytest.raises(ValueError):
+        stego.get_capacity(compressed)
+    with pytest.raises(ValueError):
+        stego.hide_data(_y4m(8, 8, 2), "x" * 100)
+    with pytest.raises(ValueError):
+        stego.extract_data(_y4m(40, 30, 2))
+    assert isinstance(open_video(io.BytesIO(_avi(4, 4, 1))), AVIReader)